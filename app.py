@@ -6,7 +6,6 @@ AI采茶动作捕捉系统 V2.0 - WebRTC云端完整版
 import streamlit as st
 import cv2
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
 import time
 import av
 from streamlit_webrtc import webrtc_streamer, WebRtcMode, RTCConfiguration
@@ -14,10 +13,23 @@ import threading
 from datetime import datetime
 import os
 
-from core.pose_detector import PoseDetector
-from core.hand_detector import HandDetector
-from core.action_analyzer import TeaPickingAnalyzer
+from core.detector_pool import get_detector_pool
+from core.hand_detector import HAND_DETECTOR_OPTIONS
+from core.action_analyzer import TeaPickingAnalyzer, MultiHandAnalyzer
+from core.hand_tracker import HandTracker
+from core.frame_context import FrameContext
+from core.pipeline import InferencePipeline
+from core.frame_scheduler import AdaptiveFrameScheduler
+from core.recorder import SessionRecorder, new_session_dir
+from core.session_state import SessionState, StatsSnapshot
+from core.overlay import OverlayRenderer
+from core.quality_governor import QualityGovernor, QUALITY_LEVELS, DEFAULT_LEVEL
+from core.reference_motion import get_reference_library, PickClipBuffer
+from core.pose_index import get_pose_index
+from core.stage_timer import StageTimers, STAGE_NAMES, start_exporter_from_env
 from utils.helpers import get_score_color, get_score_level
+from utils.landmarks import landmarks_to_array
+from utils.score_card import render_score_card, card_filename
 
 # WebRTC 配置 - 使用多个 STUN/TURN 服务器提高连接成功率
 RTC_CONFIGURATION = RTCConfiguration(
@@ -30,6 +42,16 @@ RTC_CONFIGURATION = RTCConfiguration(
     ]}
 )
 
+# 传承模式录制的会话存放目录
+SESSIONS_DIR = os.path.join(os.path.dirname(__file__), 'data', 'sessions')
+# 多手模式下同时检测和跟踪的最多手数
+MULTI_HAND_MAX = 4
+# 应用启动时预热的检测器配置
+WARMUP_SPECS = [('pose', dict(model_complexity=1)),
+                ('hands', dict(max_num_hands=2, model_complexity=1, **HAND_DETECTOR_OPTIONS))]
+# 采集分辨率上限（浏览器尽量满足），推理分辨率另由画质调节器决定
+VIDEO_CONSTRAINTS = {"video": {"width": {"ideal": 1280}, "height": {"ideal": 720}}, "audio": False}
+
 # 页面配置
 st.set_page_config(page_title="智茶 AI", page_icon="🍵", layout="wide", initial_sidebar_state="expanded")
 
@@ -68,79 +90,330 @@ def get_score_level_en(score):
         return "Newbie"
 
 
+def frame_timestamp(frame):
+    """视频帧的显示时间（秒），帧没有时间戳时返回None"""
+    pts = frame.pts
+    if pts is None or frame.time_base is None:
+        return None
+    return float(pts * frame.time_base)
+
+
 class VideoProcessor:
     """视频处理器 - 处理每一帧并进行动作分析"""
-    lock = threading.Lock()
-    # 使用共享字典存储数据
-    shared_data = {
-        'score': 0,
-        'feedback': [],
-        'stats': {'pick_count': 0, 'current_score': 0, 'average_score': 0, 'total_actions': 0},
-        'scores_history': [],
-        'start_time': time.time(),
-        'last_update': 0
-    }
 
     def __init__(self):
-        self.pose_detector = PoseDetector()
-        # 降低检测置信度，更容易检测到手
-        self.hand_detector = HandDetector(
-            min_detection_confidence=0.3,
-            min_tracking_confidence=0.3
-        )
-        self.analyzer = TeaPickingAnalyzer()
+        # 检测器从进程级池中借出（通常已预热），会话结束时归还
+        self.pose_detector = get_detector_pool().acquire('pose', model_complexity=1)
+        self.hand_detector = self._acquire_hand_detector(2, 1)
+        # 建立了手势索引（data/pose_index）时，手型得分由标注样本的近邻投票给出
+        # analyzer 为当前给出得分和反馈的分析器：单手模式下固定，多手模式下为主手轨迹的分析器
+        self.single_analyzer = TeaPickingAnalyzer(pose_index=get_pose_index())
+        self.analyzer = self.single_analyzer
+        # 多手模式：每只手按轨迹编号独立分析，支持多人同时采摘
+        self.multi_hand = False
+        self.hand_tracker = HandTracker(max_tracks=MULTI_HAND_MAX)
+        self.multi_analyzer = MultiHandAnalyzer(max_tracks=MULTI_HAND_MAX)
+        # 多手模式下每条轨迹一个完整的分析器（滤波、分段、稳定性状态不会在不同的手之间混用）
+        self.track_analyzers = {}
+        # 分阶段计时（固定大小直方图），供侧边栏延迟面板和指标导出使用
+        self.timers = StageTimers()
+        self.frame_ctx = FrameContext(flip=True, timers=self.timers)
         self.show_pose = True
         self.show_hands = True
         self.show_fps = True
+        # 叠加信息（骨骼、HUD）渲染器；关闭后不做任何绘制
+        self.draw_overlay = True
+        self.overlay = OverlayRenderer()
+        # 流水线模式：推理在后台线程进行，姿态与手部检测并行；关闭时走串行路径
+        self.use_pipeline = False
+        self._pipeline = None
+        # 自适应跳帧：根据耗时和动作速度决定推理间隔，跳过的帧外推关键点
+        self.adaptive_skip = False
+        self.scheduler = AdaptiveFrameScheduler()
+        # 自动画质：按实测耗时调整推理分辨率和模型复杂度
+        self.auto_quality = False
+        self.governor = QualityGovernor()
+        # 教学模式：每次采摘完成后与参考库中的标准动作对比
+        self.compare_reference = False
+        self.clip_buffer = PickClipBuffer()
+        self._reference_stats = {}
+        # 手部 ROI 模式：只在姿态估计出的手腕区域内检测手部
+        self.roi_hands = False
+        # 传承模式：录制逐帧关键点与评分
+        self.recording = False
+        self.session_name = ""
+        self.recorder = None
         self.fps = 0
         self.frame_count = 0
         self.fps_time = time.time()
         self._last_feedback = []  # 保存最新反馈
+        self._skipped_frames = 0
+        # 每个会话独立的统计状态，快照通过推送通道发布给界面
+        self.session = SessionState()
 
     def recv(self, frame):
+        if self.hand_detector is None:
+            # 会话已结束，检测器已归还
+            return frame
+        start = time.perf_counter()
         img = frame.to_ndarray(format="bgr24")
-        img = cv2.flip(img, 1)
+        timestamp = frame_timestamp(frame)
+        lap = self.timers.lap('decode', start)
+
+        if not self.use_pipeline:
+            if self._pipeline is not None:
+                self._stop_pipeline()
+            output = self._process(img, timestamp)
+            return self._encode(output, start, time.perf_counter())
+
+        if self._pipeline is None:
+            self._pipeline = InferencePipeline(self._process_for_pipeline)
+            self._pipeline.start()
+
+        # 回调线程只负责解码和入队，返回最近一次处理完成的画面
+        self._pipeline.submit((img, timestamp))
+        output = self._pipeline.latest()
+        if output is None:
+            output = cv2.flip(img, 1)
+        return self._encode(output, start, lap)
+
+    def _encode(self, img, start, lap):
+        """编码输出帧，并记录编码与整帧耗时（流水线模式下整帧只含回调线程的部分）"""
+        out = av.VideoFrame.from_ndarray(img, format="bgr24")
+        self.timers.record('total', self.timers.lap('encode', lap) - start)
+        return out
+
+    def on_ended(self):
+        """视频流结束时由 streamlit-webrtc 调用"""
+        self._stop_pipeline()
+        self._stop_recording()
+        self._release_detectors()
+
+    @staticmethod
+    def _acquire_hand_detector(max_num_hands, model_complexity):
+        return get_detector_pool().acquire('hands', max_num_hands=max_num_hands, model_complexity=model_complexity,
+                                           **HAND_DETECTOR_OPTIONS)
+
+    def _release_detectors(self):
+        """把检测器归还到池中，供下一个会话复用"""
+        pool = get_detector_pool()
+        pool.release(self.pose_detector)
+        pool.release(self.hand_detector)
+        self.pose_detector = None
+        self.hand_detector = None
+
+    def _sync_detectors(self):
+        """按多手模式和画质档位更换检测器（从池中借用，切换回原档位时直接复用）"""
+        settings = self.governor.settings if self.auto_quality else QUALITY_LEVELS[DEFAULT_LEVEL]
+        self.frame_ctx.inference_scale = settings['scale']
+        pool = get_detector_pool()
+
+        if self.pose_detector.model_complexity != settings['pose_complexity']:
+            pool.release(self.pose_detector)
+            self.pose_detector = pool.acquire('pose', model_complexity=settings['pose_complexity'])
+
+        max_num_hands = MULTI_HAND_MAX if self.multi_hand else 2
+        hand_detector = self.hand_detector
+        if (hand_detector.max_num_hands, hand_detector.model_complexity) != (max_num_hands, settings['hand_complexity']):
+            pool.release(hand_detector)
+            self.hand_detector = self._acquire_hand_detector(max_num_hands, settings['hand_complexity'])
+            if hand_detector.max_num_hands != max_num_hands:
+                self.hand_tracker.reset()
+                self.multi_analyzer.reset()
+                self.track_analyzers.clear()
+                self.clip_buffer.clear()
+
+    def _track_analyzer(self, track_id):
+        """获取（必要时创建）某条轨迹的分析器"""
+        analyzer = self.track_analyzers.get(track_id)
+        if analyzer is None:
+            analyzer = self.track_analyzers[track_id] = TeaPickingAnalyzer(pose_index=get_pose_index())
+        return analyzer
+
+    def _detect_pose(self, frame_ctx):
+        with self.timers.time('pose'):
+            self.pose_detector.detect(frame_ctx)
+
+    def _detect_hands(self, frame_ctx, wrist_regions=None):
+        with self.timers.time('hands'):
+            self.hand_detector.detect(frame_ctx, wrist_regions)
+
+    def _update_counters(self):
+        """把丢帧、跳帧等计数同步到计时器"""
+        timers = self.timers
+        pipeline = self._pipeline
+        timers.set_counter('dropped_frames', pipeline.dropped_frames if pipeline is not None else 0)
+        timers.set_counter('pipeline_errors', pipeline.failed_frames if pipeline is not None else 0)
+        timers.set_counter('skipped_frames', self._skipped_frames)
+        timers.set_counter('recorder_dropped_frames', self.recorder.frames_dropped if self.recorder else 0)
+
+    def _stop_recording(self):
+        """结束录制，剩余数据在后台线程中写盘"""
+        if self.recorder is not None:
+            threading.Thread(target=self.recorder.close, daemon=True).start()
+            self.recorder = None
+
+    def _stop_pipeline(self):
+        """停止后台推理流水线"""
+        if self._pipeline is not None:
+            self._pipeline.stop()
+            self._pipeline = None
+
+    def _process_for_pipeline(self, item):
+        """流水线线程中的处理函数，返回结果的独立拷贝，避免与下一帧共用缓冲区"""
+        img, timestamp = item
+        return self._process(img, timestamp).copy()
+
+    def _process(self, img, timestamp=None):
+        """
+        处理单帧：检测、分析并绘制叠加信息
+
+        Args:
+            img: 解码后的BGR图像（未翻转）
+            timestamp: 视频帧的时间戳（秒），没有时使用处理时刻
+
+        Returns:
+            绘制后的BGR图像
+        """
+        # 界面请求的重置在视频线程中执行，避免跨线程修改分析器状态
+        if self.session.consume_reset():
+            self.single_analyzer.reset()
+            self.track_analyzers.clear()
+            self.scheduler.reset()
+            self.hand_tracker.reset()
+            self.multi_analyzer.reset()
+            self.timers.reset()
+            self.clip_buffer.clear()
+            self._reference_stats = {}
+            self._skipped_frames = 0
+        self._sync_detectors()
+
+        # 画质调节的计时从检测器就绪后开始，切换档位时构建模型的耗时不计入窗口
+        process_start = time.perf_counter()
+
+        # 翻转和颜色转换只做一次，两个检测器共享同一个 RGB 缓冲区
+        frame_ctx = self.frame_ctx.update(img)
+        img = frame_ctx.bgr
+
+        now = time.monotonic()
+        frame_time = timestamp if timestamp is not None else now
+        run_inference = not self.adaptive_skip or self.scheduler.should_infer()
+
+        if run_inference:
+            infer_start = time.perf_counter()
+            # 姿态与手部检测：流水线模式下并行执行（ROI 模式依赖姿态结果，只能串行）
+            pipeline = self._pipeline
+            self.hand_detector.roi_mode = self.roi_hands
+            if self.roi_hands:
+                self._detect_pose(frame_ctx)
+                self._detect_hands(frame_ctx, self.pose_detector.get_hand_regions())
+            elif self.use_pipeline and pipeline is not None and pipeline.running:
+                pipeline.run_parallel(
+                    lambda: self._detect_pose(frame_ctx),
+                    lambda: self._detect_hands(frame_ctx)
+                )
+            else:
+                self._detect_pose(frame_ctx)
+                self._detect_hands(frame_ctx)
+            hands_data = self.hand_detector.get_all_hands()
 
-        # 姿态检测
-        self.pose_detector.detect(img)
+            infer_seconds = time.perf_counter() - infer_start
+        else:
+            # 跳过推理，外推手部关键点；骨骼绘制沿用最近一次检测结果
+            self.scheduler.mark_skipped()
+            self._skipped_frames += 1
+            hands_data = self.scheduler.predict_hands(now)
+
+        # 骨骼直接从关键点数组绘制；跳帧时绘制的是外推后的手部关键点
+        draw_start = time.perf_counter()
+        self.overlay.enabled = self.draw_overlay
         if self.show_pose:
-            self.pose_detector.draw_landmarks(img)
-
-        # 手部检测
-        self.hand_detector.detect(img)
+            self.overlay.draw_pose(img, self.pose_detector.get_landmarks())
         if self.show_hands:
-            self.hand_detector.draw_landmarks(img)
+            self.overlay.draw_hands(img, hands_data)
+        analysis_start = time.perf_counter()
+        draw_seconds = analysis_start - draw_start
+
+        # 多手模式：所有轨迹一次向量化计数，主手（持续最久的轨迹）由该轨迹自己的分析器给出得分和反馈
+        primary = 0 if hands_data else None
+        if not self.multi_hand:
+            if self.analyzer is not self.single_analyzer:
+                self.clip_buffer.clear()
+                self.analyzer = self.single_analyzer
+        else:
+            points = (np.stack([landmarks_to_array(h['landmarks']) for h in hands_data])
+                      if hands_data else np.empty((0, 21, 3), dtype=np.float32))
+            track_ids = self.hand_tracker.update(hands_data, points)
+            active = self.hand_tracker.active_ids
+            self.multi_analyzer.sync(active)
+            for track_id in [t for t in self.track_analyzers if t not in active]:
+                del self.track_analyzers[track_id]
+            primary = None
+            if hands_data:
+                self.multi_analyzer.analyze(points, track_ids, timestamp=frame_time)
+                primary_id = self.hand_tracker.primary_id()
+                if primary_id not in track_ids:
+                    primary_id = next((t for t in track_ids if t is not None), None)
+                if primary_id is not None:
+                    primary = track_ids.index(primary_id)
+                    analyzer = self._track_analyzer(primary_id)
+                    if analyzer is not self.analyzer:
+                        # 主手换成另一只手：缓存的关键点属于之前的手，不能拼进新手的动作片段
+                        self.clip_buffer.clear()
+                    self.analyzer = analyzer
+
+        # 跳帧调度：先用本次检测（多手模式下按轨迹编号区分各只手）更新运动速度，再按最新速度和耗时计算跳帧间隔
+        if run_inference and self.adaptive_skip:
+            self.scheduler.observe_hands(hands_data, now, track_ids if self.multi_hand else None)
+            self.scheduler.record_inference(infer_seconds)
 
         # 分析手部动作
-        hands_data = self.hand_detector.get_all_hands()
-        hand_count = len(hands_data)
-
-        # 在画面上显示手部检测状态
-        cv2.putText(img, f"Hands: {hand_count}", (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-
-        if hands_data:
+        result = None
+        if primary is not None:
             result = self.analyzer.analyze_hand(
-                hands_data[0]['landmarks'],
-                hands_data[0]['handedness']
+                hands_data[primary]['landmarks'],
+                hands_data[primary]['handedness'],
+                timestamp=frame_time
             )
             # 保存反馈到实例变量
             self._last_feedback = result['feedback'].copy()
 
-            with VideoProcessor.lock:
-                VideoProcessor.shared_data['score'] = result['score']
-                VideoProcessor.shared_data['feedback'] = result['feedback'].copy()
-                VideoProcessor.shared_data['stats'] = self.analyzer.get_statistics()
-                VideoProcessor.shared_data['last_update'] = time.time()
-                if result['score'] > 0:
-                    history = VideoProcessor.shared_data['scores_history']
-                    if len(history) == 0 or history[-1] != result['score']:
-                        history.append(result['score'])
-                        if len(history) > 100:
-                            VideoProcessor.shared_data['scores_history'] = history[-100:]
-
-            # 显示捏取距离
-            cv2.putText(img, f"Pinch: {result['pinch_distance']:.3f}", (10, 180), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            cv2.putText(img, f"Picking: {result['is_pinching']}", (10, 210), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+            # 教学模式：缓存最近几秒的主手关键点，采摘完成时截取该次动作与标准动作对比
+            if self.compare_reference:
+                self.clip_buffer.append(landmarks_to_array(hands_data[primary]['landmarks']), frame_time)
+                event = result['event']
+                if event is not None:
+                    match = get_reference_library().compare(self.clip_buffer.clip(event.start, event.end),
+                                                            hands_data[primary]['handedness'])
+                    if match is not None:
+                        self._reference_stats = match.stats()
+
+            # 捏取距离接近判定阈值时每帧推理，保证计数准确
+            if self.adaptive_skip:
+                self.scheduler.set_critical(
+                    self.analyzer.pinch_threshold * 0.8 < result['pinch_distance'] < self.analyzer.release_threshold * 1.2
+                )
+
+            # 发布本会话的新快照（内容不变时不会唤醒界面）
+            stats = self.analyzer.get_statistics()
+            if self.multi_hand:
+                stats['pick_count'] = self.multi_analyzer.total_picks
+                stats['track_count'] = len(self.hand_tracker.active_ids)
+            if self.auto_quality:
+                stats.update(self.governor.state(timing=False))
+            stats.update(self._reference_stats)
+            self.session.publish(result['score'], result['feedback'], stats)
+        self.timers.lap('analysis', analysis_start)
+
+        # 传承模式：逐帧记录关键点与评分，磁盘写入由后台线程完成
+        if self.recording:
+            if self.recorder is None:
+                # 按多手模式的上限分配列，录制中途打开多手模式也不会丢掉第3、4只手
+                self.recorder = SessionRecorder(new_session_dir(SESSIONS_DIR, self.session_name or None),
+                                                max_hands=MULTI_HAND_MAX)
+            self.recorder.append(frame_time, self.pose_detector.get_landmarks(), hands_data, result)
+        elif self.recorder is not None:
+            self._stop_recording()
 
         # FPS计算
         self.frame_count += 1
@@ -149,18 +422,28 @@ class VideoProcessor:
             self.fps_time = time.time()
             self.frame_count = 0
 
-        # 在画面上显示信息
-        if self.show_fps:
-            cv2.putText(img, f"FPS: {self.fps:.1f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-
-        score_color = get_score_color(VideoProcessor.shared_data['score'])
-        cv2.putText(img, f"Score: {VideoProcessor.shared_data['score']}", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.2, score_color, 2)
-
-        # 显示等级
-        level = get_score_level_en(VideoProcessor.shared_data['score'])
-        cv2.putText(img, level, (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 165, 0), 2)
-
-        return av.VideoFrame.from_ndarray(img, format="bgr24")
+        # 在画面上显示信息（HUD 合成后一次性混合）
+        hud_start = time.perf_counter()
+        if self.draw_overlay:
+            score = self.session.snapshot.score
+            hud_lines = []
+            if self.show_fps:
+                hud_lines.append(("FPS: ", f"{self.fps:.1f}", 30, 0.8, (0, 255, 0)))
+            hud_lines.append(("Score: ", str(score), 70, 1.2, get_score_color(score)))
+            hud_lines.append((get_score_level_en(score), "", 105, 0.8, (255, 165, 0)))
+            hud_lines.append(("Hands: ", str(len(hands_data)), 140, 0.7, (255, 255, 0)))
+            if result is not None:
+                hud_lines.append(("Pinch: ", f"{result['pinch_distance']:.3f}", 172, 0.7, (255, 255, 0)))
+                hud_lines.append(("Picking: ", str(result['is_pinching']), 204, 0.7, (255, 255, 0)))
+            self.overlay.draw_hud(img, hud_lines)
+        self.timers.record('draw', draw_seconds + time.perf_counter() - hud_start)
+        self._update_counters()
+
+        # 画质调节只看完整推理的帧，跳过的帧耗时不代表当前档位的开销
+        if self.auto_quality and run_inference:
+            self.governor.record(time.perf_counter() - process_start)
+
+        return img
 
 
 def rgb_to_hex(bgr):
@@ -168,14 +451,20 @@ def rgb_to_hex(bgr):
     return f"#{bgr[2]:02x}{bgr[1]:02x}{bgr[0]:02x}"
 
 
-def reset_stats():
-    """重置统计数据"""
-    with VideoProcessor.lock:
-        VideoProcessor.shared_data['score'] = 0
-        VideoProcessor.shared_data['feedback'] = []
-        VideoProcessor.shared_data['stats'] = {'pick_count': 0, 'current_score': 0, 'average_score': 0, 'total_actions': 0}
-        VideoProcessor.shared_data['start_time'] = time.time()
-        VideoProcessor.shared_data['scores_history'] = []
+def apply_processor_options(ctx, options):
+    """将侧边栏选项同步到视频处理器实例"""
+    if ctx and ctx.video_processor:
+        for name, value in options.items():
+            setattr(ctx.video_processor, name, value)
+        # 侧边栏的重置按钮在视频组件创建之前渲染，这里再执行
+        if st.session_state.pop('reset_requested', False):
+            reset_stats(ctx)
+
+
+def reset_stats(ctx):
+    """重置当前会话的统计数据（由视频线程在下一帧执行）"""
+    if ctx and ctx.video_processor:
+        ctx.video_processor.session.request_reset()
 
 
 def export_score_card(user_name, ctx):
@@ -188,7 +477,9 @@ def export_score_card(user_name, ctx):
     if ctx and ctx.video_processor and hasattr(ctx.video_processor, 'analyzer'):
         analyzer = ctx.video_processor.analyzer
         score = int(analyzer.current_score)
-        stats = analyzer.get_statistics()
+        # 使用会话快照中的统计（多手模式下采摘次数为所有手的总和），逐帧计数在 counters 中
+        snapshot = ctx.video_processor.session.snapshot
+        stats = dict(snapshot.stats, **snapshot.counters)
         scores_history = getattr(analyzer, 'scores_history', [])
 
     if not user_name:
@@ -200,84 +491,12 @@ def export_score_card(user_name, ctx):
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    width, height = 600, 800
-    img = Image.new('RGB', (width, height), '#E8F5E9')
-    draw = ImageDraw.Draw(img)
-
-    # 渐变背景
-    for y in range(height):
-        r = int(232 - (y / height) * 30)
-        g = int(245 - (y / height) * 20)
-        b = int(233 - (y / height) * 30)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-
-    # 边框
-    draw.rectangle([20, 20, width-20, height-20], outline='#2E7D32', width=3)
-
-    # 字体 - 云端兼容
-    try:
-        # 尝试 Windows 字体
-        title_font = ImageFont.truetype("msyh.ttc", 36)
-        large_font = ImageFont.truetype("msyh.ttc", 48)
-        normal_font = ImageFont.truetype("msyh.ttc", 24)
-        small_font = ImageFont.truetype("msyh.ttc", 18)
-    except:
-        try:
-            # 尝试 Linux 中文字体
-            title_font = ImageFont.truetype("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 36)
-            large_font = ImageFont.truetype("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 48)
-            normal_font = ImageFont.truetype("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 24)
-            small_font = ImageFont.truetype("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 18)
-        except:
-            try:
-                # 尝试 DejaVu 字体
-                title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 36)
-                large_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 48)
-                normal_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
-                small_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-            except:
-                title_font = large_font = normal_font = small_font = ImageFont.load_default()
-
-    # 标题
-    draw.text((width//2, 60), "智茶AI", font=title_font, fill='#1B5E20', anchor='mm')
-    draw.text((width//2, 100), "- 采茶成绩卡 -", font=normal_font, fill='#2E7D32', anchor='mm')
-    draw.line([(50, 140), (width-50, 140)], fill='#81C784', width=2)
-
-    # 用户信息
-    draw.text((width//2, 180), f"使用者: {user_name}", font=normal_font, fill='#333333', anchor='mm')
-    draw.text((width//2, 220), datetime.now().strftime("%Y年%m月%d日 %H:%M"), font=small_font, fill='#666666', anchor='mm')
-
-    # 分数
-    draw.text((width//2, 320), str(score), font=large_font, fill='#2E7D32', anchor='mm')
-    draw.text((width//2, 370), "当前得分", font=small_font, fill='#666666', anchor='mm')
-    level_text = get_score_level(score).split()[0]
-    draw.text((width//2, 420), level_text, font=normal_font, fill='#FF6F00', anchor='mm')
-
-    draw.line([(50, 470), (width-50, 470)], fill='#81C784', width=1)
-
-    # 统计
-    draw.text((150, 520), "采摘次数", font=small_font, fill='#666666', anchor='mm')
-    draw.text((150, 560), str(stats.get('pick_count', 0)), font=normal_font, fill='#1976D2', anchor='mm')
-    draw.text((300, 520), "平均得分", font=small_font, fill='#666666', anchor='mm')
-    draw.text((300, 560), str(stats.get('average_score', 0)), font=normal_font, fill='#1976D2', anchor='mm')
-    draw.text((450, 520), "总动作数", font=small_font, fill='#666666', anchor='mm')
-    draw.text((450, 560), str(stats.get('total_actions', 0)), font=normal_font, fill='#1976D2', anchor='mm')
-
-    draw.line([(50, 610), (width-50, 610)], fill='#81C784', width=1)
-
-    # 历史
-    draw.text((width//2, 650), "最近得分记录", font=small_font, fill='#666666', anchor='mm')
-    if scores_history:
-        recent = scores_history[-5:]
-        draw.text((width//2, 690), " → ".join([f"{s:.3f}" for s in recent]), font=small_font, fill='#333333', anchor='mm')
-    else:
-        draw.text((width//2, 690), "暂无记录", font=small_font, fill='#999999', anchor='mm')
-
-    draw.text((width//2, 760), "© 2026 智茶AI", font=small_font, fill='#999999', anchor='mm')
+    # 复制缓存的静态模板，只绘制动态内容
+    now = datetime.now()
+    img = render_score_card(user_name, score, stats, scores_history, now)
 
     # 保存
-    filename = f"{user_name}_efficiency_{timestamp}.png"
+    filename = card_filename(user_name, now)
     filepath = os.path.join(data_dir, filename)
     img.save(filepath, 'PNG')
     st.image(img, caption=f"🎴 {user_name} 的成绩卡", use_container_width=False)
@@ -285,7 +504,30 @@ def export_score_card(user_name, ctx):
 
 
 
+def render_startup_profile():
+    """显示 mediapipe 导入与检测器预热耗时"""
+    profile = get_detector_pool().profile()
+    warmup = profile['warmup']
+    if profile['mediapipe_error']:
+        st.warning(f"MediaPipe 不可用（{profile['mediapipe_error']}），不会检测到关键点")
+    if profile['backend'] != 'mediapipe':
+        st.caption(f"检测后端: {profile['backend']}")
+    if not profile['mediapipe_import'] and not warmup:
+        st.caption("检测器预热中…")
+        return
+    st.caption(f"MediaPipe 导入: {profile['mediapipe_import']:.2f} 秒")
+    names = {'pose': '姿态检测器', 'hands': '手部检测器'}
+    for kind, seconds in warmup.items():
+        st.caption(f"{names.get(kind, kind)}预热: {seconds:.2f} 秒")
+    st.caption(f"检测器新建 {profile['created']} 次 · 复用 {profile['reused']} 次 · 空闲 {profile['idle']} 个")
+
+
 def main():
+    # 后台预热检测器（进程内只执行一次），会话开始时直接借用
+    get_detector_pool().warm_up(WARMUP_SPECS)
+    # 配置了 TEA_AI_METRICS_FILE / TEA_AI_METRICS_PORT 时导出各阶段延迟指标
+    start_exporter_from_env()
+
     st.markdown('<h1 class="main-title">🍵 智茶 AI · 采茶动作捕捉系统</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-title">🌿 传承千年茶艺，智能科技赋能 | AI-Powered Tea Picking</p>', unsafe_allow_html=True)
 
@@ -308,27 +550,154 @@ def main():
         show_pose = st.checkbox("显示身体骨骼", value=True)
         show_hands = st.checkbox("显示手部骨骼", value=True)
         show_fps = st.checkbox("显示帧率", value=True)
+        draw_overlay = st.checkbox("绘制画面叠加信息", value=True,
+                                   help="关闭后不绘制骨骼和文字，节省低性能设备的算力")
+
+        st.divider()
+        st.subheader("🏆 传承模式")
+        recording = st.checkbox("录制动作存档", value=False,
+                                help="逐帧保存关键点与评分到 data/sessions，可用于回放和重新评分")
+
+        st.divider()
+        st.subheader("⚙️ 性能选项")
+        use_pipeline = st.checkbox("并行推理流水线", value=False,
+                                   help="姿态与手部检测并行执行，解码与推理解耦；关闭则逐帧串行处理")
+        adaptive_skip = st.checkbox("自适应跳帧", value=False,
+                                    help="设备性能不足或手部静止时隔帧推理，跳过的帧插值关键点")
+        roi_hands = st.checkbox("手腕区域检测", value=False,
+                                help="只在身体姿态估计出的手腕附近检测手部，适合远距离广角摄像头")
+        auto_quality = st.checkbox("自动画质调节", value=False,
+                                   help="处理跟不上时降低推理分辨率和模型复杂度，性能有余量时再逐步恢复")
+        multi_hand = st.checkbox("多手/多人分析", value=False,
+                                 help=f"最多同时跟踪 {MULTI_HAND_MAX} 只手，每只手独立计数，采摘次数为全部手的总和")
+        with st.expander("⏱️ 启动耗时", expanded=False):
+            render_startup_profile()
+        with st.expander("📈 实时延迟", expanded=False):
+            latency_slot = st.empty()
 
         st.divider()
         if st.button("🔄 重置统计", use_container_width=True):
-            reset_stats()
+            st.session_state['reset_requested'] = True
             st.success("✅ 统计已重置！")
 
         st.markdown('<p style="text-align:center;color:#999;font-size:0.8rem;">Version 2.0 WebRTC<br>© 2026 智茶AI</p>', unsafe_allow_html=True)
 
+    # 传递给视频处理器的选项
+    options = {
+        'show_pose': show_pose,
+        'show_hands': show_hands,
+        'show_fps': show_fps,
+        'draw_overlay': draw_overlay,
+        'use_pipeline': use_pipeline,
+        'adaptive_skip': adaptive_skip,
+        'roi_hands': roi_hands,
+        'multi_hand': multi_hand,
+        'auto_quality': auto_quality,
+        'recording': recording,
+        'session_name': user_name,
+    }
+
     # 根据模式渲染
     if mode == "🎮 体验模式":
-        render_experience_mode(user_name, show_pose, show_hands, show_fps)
+        render_experience_mode(user_name, options, latency_slot)
     elif mode == "📊 效率模式":
-        render_efficiency_mode(user_name, show_pose, show_hands, show_fps)
+        render_efficiency_mode(user_name, options, latency_slot)
     elif mode == "✅ 质控模式":
-        render_quality_mode(user_name, show_pose, show_hands, show_fps)
+        render_quality_mode(user_name, options, latency_slot)
     elif mode == "📚 教学模式":
-        render_teaching_mode(user_name, show_pose, show_hands, show_fps)
-
+        render_teaching_mode(user_name, options, latency_slot)
+
+
+
+def run_live_panels(ctx, panels, refresh_key, tick=1.0, latency_slot=None):
+    """
+    渲染右侧数据面板，并在视频流播放期间订阅处理器的推送更新
+
+    每个面板由 (占位符, 取值函数, 渲染函数) 组成：取值函数从快照中取出该面板
+    实际展示的数据，只有取值发生变化的面板才会重新渲染，不再整页 st.rerun()。
+
+    Args:
+        ctx: webrtc_streamer 返回的上下文
+        panels: 面板列表
+        refresh_key: 未播放时“刷新数据”按钮的 key
+        tick: 没有新数据时的最长等待时间（秒），用于更新计时类面板和检测停止
+        latency_slot: 侧边栏延迟面板的占位符，每个 tick 刷新一次
+    """
+    processor = ctx.video_processor
+    if latency_slot is not None:
+        panels = list(panels) + [(latency_slot, lambda s: int(time.monotonic() / tick),
+                                  lambda s: render_latency_panel(processor))]
+    last_keys = [None] * len(panels)
+
+    def render(snapshot):
+        for i, (placeholder, key_fn, render_fn) in enumerate(panels):
+            key = key_fn(snapshot)
+            if key != last_keys[i]:
+                last_keys[i] = key
+                with placeholder.container():
+                    render_fn(snapshot)
+
+    channel = processor.session.channel if processor else None
+    render(channel.snapshot if channel else StatsSnapshot())
+
+    if ctx.state and ctx.state.playing and channel:
+        status = st.empty()
+        status_text = None
+        version = channel.version
+        # 推送循环：阻塞等待新版本，界面交互触发的重跑会在下一次输出时中断本循环
+        while ctx.state.playing and ctx.video_processor is processor:
+            version, snapshot = channel.wait(version, timeout=tick)
+            render(snapshot)
+            # 状态行只显示到秒，秒数变化时才重写
+            text = f"🟢 实时更新中 · {datetime.now().strftime('%H:%M:%S')}"
+            if text != status_text:
+                status_text = text
+                status.caption(text)
+    elif st.button("🔄 刷新数据", key=refresh_key, use_container_width=True):
+        st.rerun()
+
+
+def render_latency_panel(processor):
+    """各处理阶段的 p50/p95 延迟与丢帧计数"""
+    if processor is None:
+        st.caption("开始检测后显示各阶段耗时")
+        return
+    summary = processor.timers.summary()
+    rows = ["| 阶段 | 次数 | p50 (ms) | p95 (ms) |", "|---|---:|---:|---:|"]
+    for stage, s in summary['stages'].items():
+        if s['count']:
+            rows.append(f"| {STAGE_NAMES.get(stage, stage)} | {s['count']} | {s['p50_ms']:.1f} | {s['p95_ms']:.1f} |")
+    if len(rows) == 2:
+        st.caption("暂无数据")
+        return
+    st.markdown("\n".join(rows))
+    counters = summary['counters']
+    st.caption(f"流水线丢帧 {counters.get('dropped_frames', 0)} · "
+               f"处理失败 {counters.get('pipeline_errors', 0)} · 跳帧 {counters.get('skipped_frames', 0)} · "
+               f"录制丢帧 {counters.get('recorder_dropped_frames', 0)}")
+    if processor.auto_quality:
+        q = processor.governor.state()
+        st.caption(f"画质档位 {q['quality_level']} · 推理分辨率 ×{q['inference_scale']} · "
+                   f"姿态模型 {q['pose_complexity']} · 手部模型 {q['hand_complexity']} · 切换 {q['quality_changes']} 次")
+
+
+def elapsed_seconds(snapshot):
+    """从快照计算已用时间（秒）"""
+    start_time = snapshot.start_time
+    return time.time() - start_time if start_time else 0
+
+
+def render_feedback(snapshot):
+    """实时反馈列表"""
+    feedback = snapshot.feedback
+    if feedback:
+        for fb in feedback:
+            st.markdown(f'<div class="feedback-item">{fb}</div>', unsafe_allow_html=True)
+    else:
+        st.info("等待检测手部动作...")
 
 
-def render_experience_mode(user_name, show_pose, show_hands, show_fps):
+def render_experience_mode(user_name, options, latency_slot=None):
     """🎮 体验模式"""
     st.markdown('<p class="mode-title">🎮 体验模式 - 趣味互动，挑战采茶大师！</p>', unsafe_allow_html=True)
 
@@ -343,72 +712,65 @@ def render_experience_mode(user_name, show_pose, show_hands, show_fps):
             mode=WebRtcMode.SENDRECV,
             rtc_configuration=RTC_CONFIGURATION,
             video_processor_factory=VideoProcessor,
-            media_stream_constraints={"video": True, "audio": False},
+            media_stream_constraints=VIDEO_CONSTRAINTS,
             async_processing=True,
         )
+        apply_processor_options(ctx, options)
 
-    with col2:
-        st.subheader("🏆 实时成绩")
-
-        # 从视频处理器实例获取数据
-        score = 0
-        stats = {'pick_count': 0, 'current_score': 0, 'average_score': 0, 'total_actions': 0}
-        feedback = []
-
-        if ctx.video_processor:
-            score = getattr(ctx.video_processor, 'analyzer', None)
-            if score and hasattr(score, 'current_score'):
-                analyzer = ctx.video_processor.analyzer
-                score = int(analyzer.current_score)
-                stats = analyzer.get_statistics()
-                feedback = getattr(ctx.video_processor, '_last_feedback', [])
-            else:
-                score = 0
+    def score_panel(snapshot):
+        score = int(snapshot.score)
+        score_color = rgb_to_hex(get_score_color(score))
+        st.markdown(f'<p class="score-display" style="color:{score_color}">{score}</p>', unsafe_allow_html=True)
+        st.markdown(f'<p style="text-align:center;font-size:1.5rem;">{get_score_level(score)}</p>', unsafe_allow_html=True)
 
-        score_color = rgb_to_hex(get_score_color(int(score)))
-        st.markdown(f'<p class="score-display" style="color:{score_color}">{int(score)}</p>', unsafe_allow_html=True)
-        st.markdown(f'<p style="text-align:center;font-size:1.5rem;">{get_score_level(int(score))}</p>', unsafe_allow_html=True)
-
-        st.divider()
-        st.subheader("🎖️ 成就徽章")
-        achievements = []
-        if stats.get('pick_count', 0) >= 1: achievements.append("🌱 初次采摘")
-        if stats.get('pick_count', 0) >= 10: achievements.append("🍃 采茶新秀")
-        if stats.get('pick_count', 0) >= 50: achievements.append("🌿 采茶达人")
-        if stats.get('average_score', 0) >= 80: achievements.append("⭐ 高分选手")
+    def achievement_key(snapshot):
+        stats = snapshot.stats
+        pick_count = stats.get('pick_count', 0)
+        return (pick_count >= 1, pick_count >= 10, pick_count >= 50, stats.get('average_score', 0) >= 80)
 
+    def achievement_panel(snapshot):
+        achievements = [name for name, unlocked in zip(
+            ["🌱 初次采摘", "🍃 采茶新秀", "🌿 采茶达人", "⭐ 高分选手"], achievement_key(snapshot)) if unlocked]
         if achievements:
             st.markdown("".join([f'<span class="achievement-badge">{a}</span>' for a in achievements]), unsafe_allow_html=True)
         else:
             st.markdown('<span style="color:#999;">继续努力解锁成就！</span>', unsafe_allow_html=True)
 
-        st.divider()
-        st.subheader("📊 统计数据")
+    def stats_panel(snapshot):
+        stats = snapshot.stats
         st.markdown(f"""
         - 🍃 采摘次数: **{stats.get('pick_count', 0)}**
         - 📊 当前评分: **{stats.get('current_score', 0)}**
         - 📈 平均评分: **{stats.get('average_score', 0)}**
         """)
 
+    with col2:
+        st.subheader("🏆 实时成绩")
+        score_slot = st.empty()
+
+        st.divider()
+        st.subheader("🎖️ 成就徽章")
+        achievement_slot = st.empty()
+
+        st.divider()
+        st.subheader("📊 统计数据")
+        stats_slot = st.empty()
+
         st.divider()
         st.subheader("💡 实时反馈")
-        if feedback:
-            for fb in feedback:
-                st.markdown(f'<div class="feedback-item">{fb}</div>', unsafe_allow_html=True)
-        else:
-            st.info("等待检测手部动作...")
+        feedback_slot = st.empty()
 
-        # 自动刷新：当视频流活跃时
-        if ctx.state and ctx.state.playing:
-            time.sleep(0.5)
-            st.rerun()
-        else:
-            if st.button("🔄 刷新数据", key="refresh_exp", use_container_width=True):
-                st.rerun()
+        run_live_panels(ctx, [
+            (score_slot, lambda s: int(s.score), score_panel),
+            (achievement_slot, achievement_key, achievement_panel),
+            (stats_slot, lambda s: (s.stats.get('pick_count', 0), s.stats.get('current_score', 0),
+                                    s.stats.get('average_score', 0)), stats_panel),
+            (feedback_slot, lambda s: tuple(s.feedback), render_feedback),
+        ], refresh_key="refresh_exp", latency_slot=latency_slot)
 
 
 
-def render_efficiency_mode(user_name, show_pose, show_hands, show_fps):
+def render_efficiency_mode(user_name, options, latency_slot=None):
     """📊 效率模式"""
     st.markdown('<p class="mode-title">📊 效率模式 - 统计采摘效率，提升工作表现！</p>', unsafe_allow_html=True)
 
@@ -423,71 +785,73 @@ def render_efficiency_mode(user_name, show_pose, show_hands, show_fps):
             mode=WebRtcMode.SENDRECV,
             rtc_configuration=RTC_CONFIGURATION,
             video_processor_factory=VideoProcessor,
-            media_stream_constraints={"video": True, "audio": False},
+            media_stream_constraints=VIDEO_CONSTRAINTS,
             async_processing=True,
         )
+        apply_processor_options(ctx, options)
 
         if st.button("🎴 生成成绩卡", use_container_width=True, key="eff_export"):
             export_score_card(user_name, ctx)
 
-    with col2:
-        st.subheader("⏱️ 效率数据")
-
-        # 从视频处理器实例获取数据
-        stats = {'pick_count': 0, 'current_score': 0, 'average_score': 0, 'total_actions': 0}
-        feedback = []
-        elapsed = 0
-
-        if ctx.video_processor and hasattr(ctx.video_processor, 'analyzer'):
-            analyzer = ctx.video_processor.analyzer
-            stats = analyzer.get_statistics()
-            feedback = getattr(ctx.video_processor, '_last_feedback', [])
-            elapsed = time.time() - getattr(ctx.video_processor, 'fps_time', time.time())
-
-        speed = stats.get('pick_count', 0) / (elapsed / 60) if elapsed > 60 else stats.get('pick_count', 0)
+    def pick_speed(snapshot):
+        pick_count = snapshot.stats.get('pick_count', 0)
+        elapsed = elapsed_seconds(snapshot)
+        return pick_count / (elapsed / 60) if elapsed > 60 else pick_count
 
+    def counter_panel(snapshot):
         col_a, col_b = st.columns(2)
         with col_a:
             st.markdown("**采摘次数**")
-            st.markdown(f'<p class="big-number">{stats.get("pick_count", 0)}</p>', unsafe_allow_html=True)
+            st.markdown(f'<p class="big-number">{snapshot.stats.get("pick_count", 0)}</p>', unsafe_allow_html=True)
         with col_b:
             st.markdown("**每分钟速度**")
-            st.markdown(f'<p class="big-number">{speed:.1f}</p>', unsafe_allow_html=True)
+            st.markdown(f'<p class="big-number">{pick_speed(snapshot):.1f}</p>', unsafe_allow_html=True)
 
-        st.divider()
-        st.subheader("📈 效率趋势")
-        st.progress(min(stats.get('pick_count', 0) / 100, 1.0), text=f"目标: 100次")
+    def progress_panel(snapshot):
+        st.progress(min(snapshot.stats.get('pick_count', 0) / 100, 1.0), text=f"目标: 100次")
 
-        st.divider()
-        st.subheader("📋 详细统计")
+    def detail_key(snapshot):
+        return (int(elapsed_seconds(snapshot)), snapshot.stats.get('pick_count', 0),
+                snapshot.stats.get('average_score', 0))
+
+    def detail_panel(snapshot):
+        stats = snapshot.stats
+        elapsed = elapsed_seconds(snapshot)
         minutes = int(elapsed // 60) if elapsed > 0 else 0
         seconds = int(elapsed % 60) if elapsed > 0 else 0
         st.markdown(f"""
         - ⏱️ 已用时间: **{minutes}分{seconds}秒**
         - 🎯 采摘次数: **{stats.get('pick_count', 0)}**
-        - 📈 平均速度: **{speed:.1f}次/分钟**
+        - 📈 平均速度: **{pick_speed(snapshot):.1f}次/分钟**
         - 💯 平均质量: **{stats.get('average_score', 0)}分**
         """)
 
+    with col2:
+        st.subheader("⏱️ 效率数据")
+        counter_slot = st.empty()
+
+        st.divider()
+        st.subheader("📈 效率趋势")
+        progress_slot = st.empty()
+
+        st.divider()
+        st.subheader("📋 详细统计")
+        detail_slot = st.empty()
+
         st.divider()
         st.subheader("💡 实时反馈")
-        if feedback:
-            for fb in feedback:
-                st.markdown(f'<div class="feedback-item">{fb}</div>', unsafe_allow_html=True)
-        else:
-            st.info("等待检测手部动作...")
+        feedback_slot = st.empty()
 
-        # 自动刷新：当视频流活跃时
-        if ctx.state and ctx.state.playing:
-            time.sleep(0.5)
-            st.rerun()
-        else:
-            if st.button("🔄 刷新数据", key="refresh_eff", use_container_width=True):
-                st.rerun()
+        run_live_panels(ctx, [
+            (counter_slot, lambda s: (s.stats.get('pick_count', 0), round(pick_speed(s), 1)), counter_panel),
+            (progress_slot, lambda s: s.stats.get('pick_count', 0), progress_panel),
+            (detail_slot, detail_key, detail_panel),
+            (feedback_slot, lambda s: tuple(s.feedback), render_feedback),
+        ], refresh_key="refresh_eff", latency_slot=latency_slot)
 
 
 
-def render_quality_mode(user_name, show_pose, show_hands, show_fps):
+def render_quality_mode(user_name, options, latency_slot=None):
     """✅ 质控模式"""
     st.markdown('<p class="mode-title">✅ 质控模式 - 规范动作，保证茶叶品质！</p>', unsafe_allow_html=True)
 
@@ -502,64 +866,82 @@ def render_quality_mode(user_name, show_pose, show_hands, show_fps):
             mode=WebRtcMode.SENDRECV,
             rtc_configuration=RTC_CONFIGURATION,
             video_processor_factory=VideoProcessor,
-            media_stream_constraints={"video": True, "audio": False},
+            media_stream_constraints=VIDEO_CONSTRAINTS,
             async_processing=True,
         )
+        apply_processor_options(ctx, options)
 
-    with col2:
-        st.subheader("📋 质量评估")
-
-        # 从视频处理器实例获取数据
-        score = 0
-        stats = {'pick_count': 0, 'current_score': 0, 'average_score': 0, 'total_actions': 0}
-        feedback = []
-
-        if ctx.video_processor and hasattr(ctx.video_processor, 'analyzer'):
-            analyzer = ctx.video_processor.analyzer
-            score = int(analyzer.current_score)
-            stats = analyzer.get_statistics()
-            feedback = getattr(ctx.video_processor, '_last_feedback', [])
+    def quality_key(snapshot):
+        score = int(snapshot.score)
+        return 2 if score >= 80 else 1 if score >= 60 else 0
 
+    def quality_panel(snapshot):
+        score = int(snapshot.score)
         quality_level = "优秀 ✅" if score >= 80 else "良好 👍" if score >= 60 else "需改进 ⚠️"
         quality_color = "#4caf50" if score >= 80 else "#ff9800" if score >= 60 else "#f44336"
         st.markdown(f'<p style="font-size:2rem;text-align:center;color:{quality_color}">{quality_level}</p>', unsafe_allow_html=True)
 
-        st.divider()
-        st.subheader("⚠️ 实时提醒")
-        warnings = [fb for fb in feedback if '✗' in fb or '△' in fb]
+    def warning_key(snapshot):
+        return tuple(fb for fb in snapshot.feedback if '✗' in fb or '△' in fb)
+
+    def warning_panel(snapshot):
+        warnings = warning_key(snapshot)
         if warnings:
             st.markdown('<div class="warning-box">' + '<br>'.join(warnings) + '</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="success-box">✅ 动作规范，继续保持！</div>', unsafe_allow_html=True)
 
-        st.divider()
-        st.subheader("✅ 规范检查项")
+    def check_key(snapshot):
+        score = int(snapshot.score)
+        return (score >= 70, score >= 60, score >= 50)
+
+    def check_panel(snapshot):
+        pinch_ok, finger_ok, stable_ok = check_key(snapshot)
         st.markdown(f"""
-        - {'✅' if score >= 70 else '❌'} 捏取姿势规范
-        - {'✅' if score >= 60 else '❌'} 手指姿态自然
-        - {'✅' if score >= 50 else '❌'} 动作稳定流畅
+        - {'✅' if pinch_ok else '❌'} 捏取姿势规范
+        - {'✅' if finger_ok else '❌'} 手指姿态自然
+        - {'✅' if stable_ok else '❌'} 动作稳定流畅
         """)
 
-        st.divider()
-        st.subheader("📊 质量统计")
+    def quality_stats_panel(snapshot):
+        stats = snapshot.stats
         good_rate = (stats.get('average_score', 0) / 100) * 100
         st.markdown(f"""
         - 📊 合格率: **{good_rate:.1f}%**
-        - 🔢 检测次数: **{stats.get('total_actions', 0)}**
+        - 🔢 检测次数: **{snapshot.counters.get('total_actions', 0)}**
         - 📈 平均得分: **{stats.get('average_score', 0)}**
+        - 🍃 采摘质量: **{stats.get('pick_quality', 0)}**
         """)
 
-        # 自动刷新：当视频流活跃时
-        if ctx.state and ctx.state.playing:
-            time.sleep(0.5)
-            st.rerun()
-        else:
-            if st.button("🔄 刷新数据", key="refresh_qc", use_container_width=True):
-                st.rerun()
+    with col2:
+        st.subheader("📋 质量评估")
+        quality_slot = st.empty()
 
+        st.divider()
+        st.subheader("⚠️ 实时提醒")
+        warning_slot = st.empty()
+
+        st.divider()
+        st.subheader("✅ 规范检查项")
+        check_slot = st.empty()
+
+        st.divider()
+        st.subheader("📊 质量统计")
+        stats_slot = st.empty()
 
+        run_live_panels(ctx, [
+            (quality_slot, quality_key, quality_panel),
+            (warning_slot, warning_key, warning_panel),
+            (check_slot, check_key, check_panel),
+            # 检测次数每帧变化，按秒刷新
+            (stats_slot, lambda s: (int(elapsed_seconds(s)), s.stats.get('average_score', 0),
+                                    s.stats.get('pick_quality', 0)),
+             quality_stats_panel),
+        ], refresh_key="refresh_qc", latency_slot=latency_slot)
 
-def render_teaching_mode(user_name, show_pose, show_hands, show_fps):
+
+
+def render_teaching_mode(user_name, options, latency_slot=None):
     """📚 教学模式"""
     st.markdown('<p class="mode-title">📚 教学模式 - 学习标准采茶技艺！</p>', unsafe_allow_html=True)
 
@@ -601,48 +983,58 @@ def render_teaching_mode(user_name, show_pose, show_hands, show_fps):
             mode=WebRtcMode.SENDRECV,
             rtc_configuration=RTC_CONFIGURATION,
             video_processor_factory=VideoProcessor,
-            media_stream_constraints={"video": True, "audio": False},
+            media_stream_constraints=VIDEO_CONSTRAINTS,
             async_processing=True,
         )
+        apply_processor_options(ctx, {**options, 'compare_reference': True})
 
-    with col2:
-        st.subheader("📝 动作评价")
-
-        # 从视频处理器实例获取数据
-        score = 0
-        stats = {'pick_count': 0, 'current_score': 0, 'average_score': 0, 'total_actions': 0}
-        feedback = []
-
-        if ctx.video_processor and hasattr(ctx.video_processor, 'analyzer'):
-            analyzer = ctx.video_processor.analyzer
-            score = int(analyzer.current_score)
-            stats = analyzer.get_statistics()
-            feedback = getattr(ctx.video_processor, '_last_feedback', [])
-
+    def grade_panel(snapshot):
+        score = int(snapshot.score)
         score_color = rgb_to_hex(get_score_color(score))
         grade = "优秀" if score >= 80 else "良好" if score >= 60 else "继续练习"
         st.markdown(f'<p style="font-size:2.5rem;text-align:center;color:{score_color}">{score}分 - {grade}</p>', unsafe_allow_html=True)
 
+    def learning_panel(snapshot):
+        progress_pct = min(snapshot.stats.get('average_score', 0) / 100, 1.0)
+        st.progress(progress_pct, text=f"掌握程度: {int(progress_pct*100)}%")
+
+    def reference_key(snapshot):
+        stats = snapshot.stats
+        return (stats.get('reference_name'), stats.get('reference_similarity'), stats.get('reference_deviation'))
+
+    def reference_panel(snapshot):
+        name, similarity, deviation = reference_key(snapshot)
+        if name is None:
+            if len(get_reference_library()) == 0:
+                st.caption("参考动作库为空，可用 `python -m core.reference_motion add 会话目录 --name 名称` 添加专家动作")
+            else:
+                st.caption("完成一次采摘后显示与标准动作的对比")
+            return
+        st.progress(similarity / 100, text=f"与标准动作 {name} 的相似度: {similarity}%")
+        st.markdown("偏差最大的部位（手掌长度）：\n" + "\n".join(f"- {joint}: **{value:.2f}**" for joint, value in deviation))
+
+    with col2:
+        st.subheader("📝 动作评价")
+        grade_slot = st.empty()
+
         st.divider()
         st.subheader("💡 改进建议")
-        if feedback:
-            for fb in feedback:
-                st.markdown(f'<div class="feedback-item">{fb}</div>', unsafe_allow_html=True)
-        else:
-            st.info("等待检测手部动作...")
+        feedback_slot = st.empty()
 
         st.divider()
-        st.subheader("📈 学习进度")
-        progress_pct = min(stats.get('average_score', 0) / 100, 1.0)
-        st.progress(progress_pct, text=f"掌握程度: {int(progress_pct*100)}%")
+        st.subheader("🎯 标准动作对比")
+        reference_slot = st.empty()
 
-        # 自动刷新：当视频流活跃时
-        if ctx.state and ctx.state.playing:
-            time.sleep(0.5)
-            st.rerun()
-        else:
-            if st.button("🔄 刷新数据", key="refresh_teach", use_container_width=True):
-                st.rerun()
+        st.divider()
+        st.subheader("📈 学习进度")
+        learning_slot = st.empty()
+
+        run_live_panels(ctx, [
+            (grade_slot, lambda s: int(s.score), grade_panel),
+            (feedback_slot, lambda s: tuple(s.feedback), render_feedback),
+            (reference_slot, reference_key, reference_panel),
+            (learning_slot, lambda s: s.stats.get('average_score', 0), learning_panel),
+        ], refresh_key="refresh_teach", latency_slot=latency_slot)
 
 
 if __name__ == "__main__":
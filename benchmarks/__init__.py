@@ -0,0 +1,2 @@
+# 性能基准测试
+# 用法: python -m benchmarks.run --help
@@ -0,0 +1,249 @@
+"""
+基准测试项目 - 每项单独测量一个热点路径，end_to_end 测量完整的单帧处理
+
+每个构建函数返回 (被测函数, 清理函数)。与分辨率有关的项目在每个分辨率下各测一次。
+没有提供录像时使用合成画面；MediaPipe 在空白画面上检测不到人，
+检测器的耗时会偏低，测量检测器时建议用 --video 提供真实录像。
+"""
+import io
+import itertools
+from collections import namedtuple
+from datetime import datetime
+
+import cv2
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.action_analyzer import TeaPickingAnalyzer
+from core.detector_backend import get_backend
+from core.frame_context import FrameContext
+from core.overlay import OverlayRenderer
+from core.synthetic_backend import SyntheticScript
+from utils.helpers import calculate_angle, calculate_distance, draw_chinese_text
+from utils.landmarks import hand_features
+from utils.score_card import render_score_card
+
+Point = namedtuple('Point', 'x y z')
+
+# 与分辨率无关的项目使用的分辨率标记
+NO_RESOLUTION = '-'
+
+SAMPLE_STATS = {'pick_count': 42, 'current_score': 86, 'average_score': 81.5,
+                'recent_average_score': 84.2, 'best_score': 93, 'total_actions': 1280}
+
+
+def load_frames(resolution, video=None, count=60, seed=0):
+    """
+    准备测试画面
+
+    Args:
+        resolution: (宽, 高)
+        video: 录像路径，为None时生成合成画面
+        count: 画面数量
+        seed: 合成画面的随机种子
+
+    Returns:
+        BGR 图像列表
+    """
+    width, height = resolution
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ok, img = cap.read()
+            if not ok:
+                break
+            frames.append(cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA))
+        cap.release()
+        if not frames:
+            raise ValueError(f"无法读取录像: {video}")
+        return frames
+
+    # 合成画面：绿色渐变背景加噪声，避免全零图像的特殊优化
+    rng = np.random.default_rng(seed)
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+    base[..., 1] = np.linspace(80, 200, height, dtype=np.uint8)[:, None]
+    for _ in range(min(count, 8)):
+        noise = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+        frames.append(cv2.add(base, noise))
+    return frames
+
+
+def sample_hands(count=120):
+    """合成脚本生成的手部关键点序列 [((21, 3) 数组, 左右手), ...]"""
+    script = SyntheticScript(num_hands=1)
+    return [script.hands(i, 1)[0] for i in range(count)]
+
+
+def _cycle(items):
+    it = itertools.cycle(items)
+    return lambda: next(it)
+
+
+def bench_frame_prep(frames, backend):
+    """翻转 + BGR→RGB（FrameContext 复用缓冲区）"""
+    ctx = FrameContext(flip=True)
+    next_frame = _cycle(frames)
+    return (lambda: ctx.update(next_frame())), None
+
+
+def bench_frame_prep_naive(frames, backend):
+    """翻转 + BGR→RGB（每帧分配新数组，作为对照）"""
+    next_frame = _cycle(frames)
+    return (lambda: cv2.cvtColor(cv2.flip(next_frame(), 1), cv2.COLOR_BGR2RGB)), None
+
+
+def bench_pose_detect(frames, backend):
+    """PoseDetector.detect"""
+    detector = get_backend(backend)['pose']()
+    contexts = [FrameContext(flip=True).update(f) for f in frames]
+    next_ctx = _cycle(contexts)
+    return (lambda: detector.detect(next_ctx())), detector.release
+
+
+def bench_hand_detect(frames, backend):
+    """HandDetector.detect"""
+    detector = get_backend(backend)['hands']()
+    contexts = [FrameContext(flip=True).update(f) for f in frames]
+    next_ctx = _cycle(contexts)
+    return (lambda: detector.detect(next_ctx())), detector.release
+
+
+def bench_draw_landmarks(frames, backend):
+    """骨骼绘制（姿态 + 两只手）"""
+    overlay = OverlayRenderer()
+    script = SyntheticScript(num_hands=2)
+    pose = script.pose(0)
+    hands = [{'landmarks': p, 'handedness': h} for p, h in script.hands(0, 2)]
+    images = [f.copy() for f in frames]
+    next_img = _cycle(images)
+
+    def run():
+        img = next_img()
+        overlay.draw_pose(img, pose)
+        overlay.draw_hands(img, hands)
+    return run, None
+
+
+def bench_draw_hud(frames, backend):
+    """HUD 文字合成"""
+    overlay = OverlayRenderer()
+    images = [f.copy() for f in frames]
+    next_img = _cycle(images)
+    counter = itertools.count()
+
+    def run():
+        i = next(counter)
+        overlay.draw_hud(next_img(), [
+            ("FPS: ", f"{25 + i % 10:.1f}", 30, 0.8, (0, 255, 0)),
+            ("Score: ", str(60 + i % 40), 70, 1.2, (0, 255, 255)),
+            ("Hands: ", "1", 140, 0.7, (255, 255, 0)),
+            ("Pinch: ", f"{(i % 100) / 1000:.3f}", 172, 0.7, (255, 255, 0)),
+        ])
+    return run, None
+
+
+def bench_draw_chinese_text(frames, backend):
+    """draw_chinese_text"""
+    images = [f.copy() for f in frames]
+    next_img = _cycle(images)
+    return (lambda: draw_chinese_text(next_img(), "捏取姿势标准", (20, 40), 28)), None
+
+
+def bench_analyze_hand(frames, backend):
+    """TeaPickingAnalyzer.analyze_hand"""
+    analyzer = TeaPickingAnalyzer()
+    next_hand = _cycle(sample_hands())
+    return (lambda: analyzer.analyze_hand(*next_hand())), None
+
+
+def bench_calculate_score(frames, backend):
+    """TeaPickingAnalyzer._calculate_score"""
+    analyzer = TeaPickingAnalyzer()
+    prepared = []
+    for points, handedness in sample_hands():
+        result = analyzer.analyze_hand(points, handedness)
+        prepared.append((result, hand_features(points), analyzer.frame_interval))
+    next_item = _cycle(prepared)
+    return (lambda: analyzer._calculate_score(*next_item())), None
+
+
+def bench_helpers_geometry(frames, backend):
+    """utils.helpers 中逐点计算的角度与距离"""
+    hands = [[Point(*p) for p in points] for points, _ in sample_hands()]
+    next_hand = _cycle(hands)
+
+    def run():
+        lm = next_hand()
+        calculate_distance(lm[4], lm[8])
+        calculate_angle(lm[0], lm[9], lm[12])
+    return run, None
+
+
+def bench_landmark_features(frames, backend):
+    """utils.landmarks.hand_features（数组批量计算，作为对照）"""
+    next_hand = _cycle([points for points, _ in sample_hands()])
+    return (lambda: hand_features(next_hand())), None
+
+
+def bench_score_card(frames, backend):
+    """成绩卡生成并编码为 PNG"""
+    history = [70.0, 74.5, 78.2, 80.1, 83.6]
+    when = datetime(2026, 1, 1, 9, 30)
+
+    def run():
+        img = render_score_card("测试学员", 86, SAMPLE_STATS, history, when)
+        img.save(io.BytesIO(), 'PNG')
+    return run, None
+
+
+def bench_end_to_end(frames, backend):
+    """完整的单帧处理：预处理、姿态与手部检测、分析、绘制"""
+    kinds = get_backend(backend)
+    pose_detector = kinds['pose']()
+    hand_detector = kinds['hands'](min_detection_confidence=0.3, min_tracking_confidence=0.3)
+    analyzer = TeaPickingAnalyzer()
+    overlay = OverlayRenderer()
+    ctx = FrameContext(flip=True)
+    next_frame = _cycle(frames)
+
+    def run():
+        frame_ctx = ctx.update(next_frame())
+        img = frame_ctx.bgr
+        pose_detector.detect(frame_ctx)
+        hand_detector.detect(frame_ctx)
+        hands_data = hand_detector.get_all_hands()
+        overlay.draw_pose(img, pose_detector.get_landmarks())
+        overlay.draw_hands(img, hands_data)
+        score = 0
+        if hands_data:
+            score = analyzer.analyze_hand(hands_data[0]['landmarks'], hands_data[0]['handedness'])['score']
+        overlay.draw_hud(img, [("Score: ", str(score), 70, 1.2, (0, 255, 255)),
+                               ("Hands: ", str(len(hands_data)), 140, 0.7, (255, 255, 0))])
+
+    def close():
+        pose_detector.release()
+        hand_detector.release()
+    return run, close
+
+
+# 项目名 -> (是否与分辨率有关, 是否需要检测模型, 构建函数)
+CASES = {
+    'frame_prep': (True, False, bench_frame_prep),
+    'frame_prep_naive': (True, False, bench_frame_prep_naive),
+    'pose_detect': (True, True, bench_pose_detect),
+    'hand_detect': (True, True, bench_hand_detect),
+    'draw_landmarks': (True, False, bench_draw_landmarks),
+    'draw_hud': (True, False, bench_draw_hud),
+    'draw_chinese_text': (True, False, bench_draw_chinese_text),
+    'analyze_hand': (False, False, bench_analyze_hand),
+    'calculate_score': (False, False, bench_calculate_score),
+    'helpers_geometry': (False, False, bench_helpers_geometry),
+    'landmark_features': (False, False, bench_landmark_features),
+    'score_card': (False, False, bench_score_card),
+    'end_to_end': (True, True, bench_end_to_end),
+}
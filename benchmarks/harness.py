@@ -0,0 +1,111 @@
+"""
+基准测试工具 - 计时、延迟分位数、峰值内存与基线对比
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def measure(fn, iterations=200, warmup=10):
+    """
+    重复执行并统计单次耗时
+
+    Args:
+        fn: 无参数的被测函数
+        iterations: 计时次数
+        warmup: 预热次数（不计时）
+
+    Returns:
+        summarize() 的结果
+    """
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return summarize(samples)
+
+
+def summarize(samples):
+    """
+    汇总耗时样本
+
+    Args:
+        samples: 单次耗时数组（秒）
+
+    Returns:
+        字典：iterations、mean_ms、p50_ms、p95_ms、p99_ms、fps
+    """
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+    mean = float(samples.mean())
+    return {
+        'iterations': len(samples),
+        'mean_ms': round(mean * 1000, 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'fps': round(1 / mean, 1) if mean > 0 else None,
+    }
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），平台不支持时返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / scale, 1)
+
+
+def save_results(path, report):
+    """保存结果为 JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path):
+    """读取 save_results() 保存的结果"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(report, baseline, metric='p95_ms', tolerance=0.15):
+    """
+    与基线对比
+
+    Args:
+        report: 本次结果
+        baseline: 基线结果
+        metric: 对比的指标
+        tolerance: 允许的变慢比例，超过即视为退化
+
+    Returns:
+        列表，每项为 {case, resolution, baseline, current, ratio, regressed}；
+        只包含两边都有的项目
+    """
+    base = {(r['case'], r['resolution']): r for r in baseline['results']}
+    rows = []
+    for r in report['results']:
+        b = base.get((r['case'], r['resolution']))
+        if b is None or not b.get(metric) or r.get(metric) is None:
+            continue
+        ratio = r[metric] / b[metric]
+        rows.append({
+            'case': r['case'],
+            'resolution': r['resolution'],
+            'baseline': b[metric],
+            'current': r[metric],
+            'ratio': round(ratio, 3),
+            'regressed': ratio > 1 + tolerance,
+        })
+    return rows
@@ -0,0 +1,166 @@
+"""
+运行基准测试
+
+用法:
+    python -m benchmarks.run [-r 640x480 1280x720] [--video 录像] [--backend synthetic]
+                             [-o benchmark_results.json] [--baseline 基线.json] [--tolerance 0.15]
+
+输出每个项目的 p50/p95/p99 延迟、帧率和峰值内存，结果写入 JSON；
+指定 --baseline 时与基线对比，p95 变慢超过容差即以非零状态退出，可用于CI。
+--isolate 让每个项目在独立进程中运行，峰值内存才是该项目自身的数值。
+"""
+import argparse
+import platform
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.cases import CASES, NO_RESOLUTION, load_frames
+from benchmarks.harness import measure, peak_rss_mb, save_results, load_results, compare
+from core.detector_backend import default_backend, available_backends
+from core.mediapipe_loader import mediapipe_available, mediapipe_error
+
+DEFAULT_RESOLUTIONS = ['640x480', '1280x720', '1920x1080']
+
+
+def parse_resolution(text):
+    """'1280x720' -> (1280, 720)"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def run_case(name, resolution, video=None, backend=None, iterations=200, warmup=10):
+    """
+    运行单个项目
+
+    Args:
+        name: CASES 中的项目名
+        resolution: '宽x高'，与分辨率无关的项目为 NO_RESOLUTION
+        video: 录像路径
+        backend: 检测后端名
+        iterations: 计时次数
+        warmup: 预热次数
+
+    Returns:
+        结果字典
+    """
+    backend = backend or default_backend()
+    size = parse_resolution(resolution) if resolution != NO_RESOLUTION else (640, 480)
+    frames = load_frames(size, video)
+    fn, close = CASES[name][2](frames, backend)
+    try:
+        stats = measure(fn, iterations, warmup)
+    finally:
+        if close is not None:
+            close()
+    return dict(case=name, resolution=resolution, **stats, peak_rss_mb=peak_rss_mb())
+
+
+def plan(cases, resolutions, backend):
+    """
+    列出要运行的 (项目, 分辨率)
+
+    使用 MediaPipe 后端但其不可用时跳过依赖模型的项目。
+    """
+    skip_models = backend == 'mediapipe' and not mediapipe_available()
+    if skip_models:
+        print(f"⚠️ MediaPipe 不可用（{mediapipe_error()}），跳过检测相关项目；"
+              f"可使用 --backend synthetic", file=sys.stderr)
+    jobs = []
+    for name in cases:
+        per_resolution, needs_model, _ = CASES[name]
+        if needs_model and skip_models:
+            continue
+        for resolution in (resolutions if per_resolution else [NO_RESOLUTION]):
+            jobs.append((name, resolution))
+    return jobs
+
+
+def run_all(jobs, video=None, backend=None, iterations=200, warmup=10, isolate=False):
+    """
+    依次运行所有项目
+
+    Args:
+        isolate: 每个项目使用独立进程（spawn），峰值内存互不影响
+
+    Returns:
+        结果列表
+    """
+    results = []
+    for name, resolution in jobs:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                result = executor.submit(run_case, name, resolution, video, backend, iterations, warmup).result()
+        else:
+            result = run_case(name, resolution, video, backend, iterations, warmup)
+        results.append(result)
+        print(f"{name:<20} {resolution:>10}  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+              f"p99 {result['p99_ms']:>9.3f} ms  {result['fps'] or 0:>10.1f} FPS  "
+              f"RSS {result['peak_rss_mb'] or 0:>7.1f} MB")
+    return results
+
+
+def environment(backend, video):
+    """记录运行环境，便于判断两次结果是否可比"""
+    import cv2
+    return {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'backend': backend,
+        'video': video,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="采茶动作分析流程性能基准测试")
+    parser.add_argument('-r', '--resolutions', nargs='+', default=DEFAULT_RESOLUTIONS, help="测试分辨率，如 1280x720")
+    parser.add_argument('-c', '--cases', nargs='+', choices=list(CASES), default=list(CASES), help="只运行指定项目")
+    parser.add_argument('--video', default=None, help="用录像的前若干帧代替合成画面")
+    parser.add_argument('--backend', choices=available_backends(), default=None,
+                        help="检测后端（默认由 TEA_AI_BACKEND 决定，未设置时为 mediapipe）")
+    parser.add_argument('-n', '--iterations', type=int, default=200, help="每个项目的计时次数")
+    parser.add_argument('--warmup', type=int, default=10, help="每个项目的预热次数")
+    parser.add_argument('--isolate', action='store_true', help="每个项目在独立进程中运行")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="结果文件")
+    parser.add_argument('--baseline', default=None, help="对比的基线结果文件")
+    parser.add_argument('--metric', default='p95_ms', choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'],
+                        help="与基线对比的指标")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="允许变慢的比例")
+    args = parser.parse_args(argv)
+
+    backend = args.backend or default_backend()
+    jobs = plan(args.cases, args.resolutions, backend)
+    results = run_all(jobs, args.video, backend, args.iterations, args.warmup, args.isolate)
+
+    report = {'environment': environment(backend, args.video), 'results': results}
+    save_results(args.output, report)
+    print(f"结果已保存到 {args.output}")
+
+    if args.baseline:
+        rows = compare(report, load_results(args.baseline), args.metric, args.tolerance)
+        regressed = [r for r in rows if r['regressed']]
+        print(f"\n与基线对比（{args.metric}，容差 {args.tolerance:.0%}）:")
+        for r in rows:
+            mark = '✗' if r['regressed'] else '✓'
+            print(f"{mark} {r['case']:<20} {r['resolution']:>10}  {r['baseline']:>9.3f} → {r['current']:>9.3f} ms"
+                  f"  ×{r['ratio']:.2f}")
+        if regressed:
+            print(f"{len(regressed)} 个项目性能退化", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
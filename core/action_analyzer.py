@@ -9,14 +9,72 @@ import os
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.helpers import calculate_angle, calculate_distance, smooth_value
+from utils.filters import make_filter, time_constant_alpha, TrackFilters
+from utils.ring_buffer import RingBuffer
+from utils.landmarks import landmarks_to_array, hand_features, joint_angles, POSE_ANGLE_TRIPLETS
+from core.pick_segmenter import PickSegmenter
+from core.stability import StabilityBank, StabilityTracker
+
+# 稳定性满分
+STABILITY_MAX_SCORE = 30
+
+# 手指姿态得分对应的反馈
+FINGER_FEEDBACK = {
+    30: "✓ 手指姿态自然",
+    20: "△ 手指可以更放松",
+    10: "✗ 手指姿态需调整",
+}
+
+# 按手势索引评分时的反馈（规范概率从高到低）
+POSE_QUALITY_FEEDBACK = (
+    "✓ 手型与规范动作一致",
+    "△ 手型与规范动作略有差异",
+    "✗ 手型接近不规范动作",
+)
+
+
+def pinch_scores(pinch_distance, is_pinching):
+    """
+    捏取姿势得分（40分），标量和数组均可
+
+    Args:
+        pinch_distance: 平滑后的捏取距离
+        is_pinching: 是否处于捏取状态
+
+    Returns:
+        捏取得分
+    """
+    # 捏取时，距离越小越好；未捏取时给基础分
+    return np.where(is_pinching, np.maximum(0, 40 - np.asarray(pinch_distance) * 400), 20)
+
+
+def finger_scores(other_fingers_dist):
+    """
+    手指姿态得分（30分），标量和数组均可
+
+    Args:
+        other_fingers_dist: 中指、无名指、小指指尖到手腕的平均距离
+
+    Returns:
+        手指姿态得分
+    """
+    d = np.asarray(other_fingers_dist)
+    return np.where((d > 0.15) & (d < 0.35), 30,
+                    np.where((d > 0.1) & (d < 0.4), 20, 10))
 
 
 class TeaPickingAnalyzer:
     """采茶动作分析器"""
     
-    def __init__(self):
-        """初始化分析器"""
+    def __init__(self, history_size=100, landmark_filter='one_euro', pose_index=None):
+        """
+        初始化分析器
+
+        Args:
+            history_size: 得分记录窗口大小
+            landmark_filter: 关键点滤波器（'one_euro' / 'kalman'），None 表示不滤波
+            pose_index: 手势近邻索引（PoseIndex），提供时手型得分由近邻投票给出，否则使用距离阈值
+        """
         # 动作状态
         self.current_state = "待机"
         self.pick_count = 0
@@ -24,77 +82,121 @@ class TeaPickingAnalyzer:
         self.is_picking = False
         
         # 评分相关
-        self.scores_history = []
+        self.history_size = history_size
+        self.scores_history = RingBuffer(history_size)
         self.current_score = 0
         
-        # 阈值配置
-        self.pinch_threshold = 0.05  # 捏取判定阈值
-        self.release_threshold = 0.08  # 释放判定阈值
-        
-        # 平滑参数
-        self.smooth_alpha = 0.3
+        # 平滑参数：关键点按时间戳滤波，得分按时间常数（秒）平滑，与帧率无关
+        self.landmark_filter = make_filter(landmark_filter) if landmark_filter else None
+        self.score_tau = 0.15
+
+        # 采摘事件分段（计数依据，同时保存捏取/释放阈值）；调用方不提供时间戳时按名义帧间隔推算
+        self.segmenter = PickSegmenter(pinch_threshold=0.05, release_threshold=0.08)
+        self.frame_interval = 1 / 30
+        self.last_timestamp = None
+        self.last_event = None
+
+        # 手腕与指尖轨迹的稳定性
+        self.stability = StabilityTracker()
+
+        # 手势近邻索引
+        self.pose_index = pose_index if pose_index is not None and len(pose_index) else None
+
+    @property
+    def pinch_threshold(self):
+        """捏取判定阈值（与分段器共用）"""
+        return self.segmenter.pinch_threshold
+
+    @pinch_threshold.setter
+    def pinch_threshold(self, value):
+        self.segmenter.pinch_threshold = value
+
+    @property
+    def release_threshold(self):
+        """释放判定阈值（与分段器共用）"""
+        return self.segmenter.release_threshold
+
+    @release_threshold.setter
+    def release_threshold(self, value):
+        self.segmenter.release_threshold = value
         
-    def analyze_hand(self, hand_landmarks, handedness="Right"):
+    def analyze_hand(self, hand_landmarks, handedness="Right", timestamp=None):
         """
         分析单只手的采茶动作
         
         Args:
-            hand_landmarks: 手部关键点列表
+            hand_landmarks: 手部关键点列表，或 (21, 3) 关键点数组
             handedness: 左手/右手
+            timestamp: 帧时间戳（秒），实时画面取自视频帧，回放取自录制数据
             
         Returns:
-            分析结果字典
+            分析结果字典；event 为本帧完成的 PickEvent（没有则为None），phase 为当前动作阶段
         """
         result = {
             'pinch_distance': 0,
             'is_pinching': False,
             'hand_angle': 0,
             'score': 0,
-            'feedback': []
+            'feedback': [],
+            'phase': self.segmenter.phase,
+            'event': None,
+            'pose_quality': None
         }
         
         if hand_landmarks is None:
             return result
+
+        if timestamp is None:
+            timestamp = 0.0 if self.last_timestamp is None else self.last_timestamp + self.frame_interval
+        dt = self.frame_interval if self.last_timestamp is None else max(timestamp - self.last_timestamp, 0.0)
+        self.last_timestamp = timestamp
         
-        # 1. 计算捏取距离（拇指-食指）
-        thumb_tip = hand_landmarks[4]   # THUMB_TIP
-        index_tip = hand_landmarks[8]   # INDEX_FINGER_TIP
+        # 每帧只转换一次关键点并整体滤波，所有几何特征批量计算
+        points = landmarks_to_array(hand_landmarks)
+        if self.landmark_filter is not None:
+            points = self.landmark_filter(points, timestamp)
+        features = hand_features(points)
+        self.stability.update(points, timestamp)
         
-        pinch_distance = calculate_distance(thumb_tip, index_tip)
-        pinch_distance = smooth_value(pinch_distance, self.last_pinch_distance, self.smooth_alpha)
+        # 1. 计算捏取距离（拇指-食指）
+        pinch_distance = float(features['pinch_distance'])
         self.last_pinch_distance = pinch_distance
         
         result['pinch_distance'] = pinch_distance
         
-        # 2. 判断是否在捏取
-        if pinch_distance < self.pinch_threshold:
-            result['is_pinching'] = True
-            if not self.is_picking:
-                self.is_picking = True
-                self.pick_count += 1
-        elif pinch_distance > self.release_threshold:
-            result['is_pinching'] = False
-            self.is_picking = False
-        
-        # 3. 计算手腕角度
-        wrist = hand_landmarks[0]       # WRIST
-        middle_mcp = hand_landmarks[9]  # MIDDLE_FINGER_MCP
-        middle_tip = hand_landmarks[12] # MIDDLE_FINGER_TIP
+        # 2. 采摘分段：靠近 → 捏取 → 上提 → 释放，释放完成计一次
+        event = self.segmenter.update(timestamp, pinch_distance, points[0, :2])
+        if event is not None:
+            self.last_event = event
+        self.pick_count = self.segmenter.event_count
+        self.is_picking = self.segmenter.holding
+        result['is_pinching'] = self.is_picking
+        result['phase'] = self.segmenter.phase
+        result['event'] = event
         
-        hand_angle = calculate_angle(wrist, middle_mcp, middle_tip)
-        result['hand_angle'] = hand_angle
+        # 3. 计算手腕角度（手腕-中指根-中指尖）
+        result['hand_angle'] = float(features['hand_angle'])
+
+        # 手型与标注样本的相似程度（规范手势的概率）
+        if self.pose_index is not None:
+            result['pose_quality'] = self.pose_index.classify(points, handedness)
         
         # 4. 评分计算
-        score, feedback = self._calculate_score(result, hand_landmarks)
+        score, feedback = self._calculate_score(result, features, dt)
         result['score'] = score
         result['feedback'] = feedback
         
         return result
     
-    def _calculate_score(self, analysis_result, hand_landmarks):
+    def _calculate_score(self, analysis_result, features, dt):
         """
         计算采茶动作评分
         
+        Args:
+            analysis_result: analyze_hand 的中间结果
+            features: hand_features() 计算出的手部特征
+            dt: 距上一帧的时间（秒）
+        
         Returns:
             (score, feedback_list)
         """
@@ -102,10 +204,8 @@ class TeaPickingAnalyzer:
         feedback = []
         
         # 评分项1: 捏取姿势 (40分)
-        pinch_distance = analysis_result['pinch_distance']
+        pinch_score = float(pinch_scores(analysis_result['pinch_distance'], analysis_result['is_pinching']))
         if analysis_result['is_pinching']:
-            # 捏取时，距离越小越好
-            pinch_score = max(0, 40 - pinch_distance * 400)
             if pinch_score >= 35:
                 feedback.append("✓ 捏取姿势标准")
             elif pinch_score >= 25:
@@ -113,49 +213,32 @@ class TeaPickingAnalyzer:
             else:
                 feedback.append("✗ 捏取姿势需要调整")
         else:
-            pinch_score = 20  # 未捏取时给基础分
             feedback.append("○ 等待采摘动作...")
         
         # 评分项2: 手指伸展 (30分)
-        # 检查其他手指是否自然弯曲（不要太僵硬）
-        middle_tip = hand_landmarks[12]
-        ring_tip = hand_landmarks[16]
-        pinky_tip = hand_landmarks[20]
-        wrist = hand_landmarks[0]
-        
-        # 计算其他手指到手腕的距离
-        other_fingers_dist = (
-            calculate_distance(middle_tip, wrist) +
-            calculate_distance(ring_tip, wrist) +
-            calculate_distance(pinky_tip, wrist)
-        ) / 3
-        
-        if 0.15 < other_fingers_dist < 0.35:
-            finger_score = 30
-            feedback.append("✓ 手指姿态自然")
-        elif 0.1 < other_fingers_dist < 0.4:
-            finger_score = 20
-            feedback.append("△ 手指可以更放松")
+        pose_quality = analysis_result.get('pose_quality')
+        if pose_quality is not None:
+            # 有手势索引时：近邻中规范手势的加权占比
+            finger_score = 30 * pose_quality
+            feedback.append(POSE_QUALITY_FEEDBACK[0 if pose_quality >= 0.7 else 1 if pose_quality >= 0.4 else 2])
         else:
-            finger_score = 10
-            feedback.append("✗ 手指姿态需调整")
+            # 检查其他手指是否自然弯曲（不要太僵硬）
+            # 中指、无名指、小指指尖到手腕的平均距离
+            finger_score = int(finger_scores(features['other_fingers_dist']))
+            feedback.append(FINGER_FEEDBACK[finger_score])
         
         # 评分项3: 手部稳定性 (30分)
-        # 简化处理：基于手腕位置的稳定性
-        stability_score = 25  # 基础分，后续可以加入历史数据对比
-        feedback.append("✓ 动作较为稳定")
+        # 手腕与指尖轨迹的急动度、路径直度和抖动能量
+        stability_score, stability_feedback = self.stability.score(STABILITY_MAX_SCORE)
+        feedback.append(stability_feedback)
         
         # 总分
         score = pinch_score + finger_score + stability_score
         score = max(0, min(100, score))
         
-        self.current_score = smooth_value(score, self.current_score, 0.2)
+        self.current_score += time_constant_alpha(dt, self.score_tau) * (score - self.current_score)
         self.scores_history.append(self.current_score)
         
-        # 保持历史记录在合理范围
-        if len(self.scores_history) > 100:
-            self.scores_history = self.scores_history[-100:]
-        
         return int(self.current_score), feedback
     
     def analyze_pose(self, pose_landmarks):
@@ -179,11 +262,8 @@ class TeaPickingAnalyzer:
         
         # 分析手臂角度
         # 右臂: 肩膀-肘-手腕
-        right_shoulder = pose_landmarks[12]
-        right_elbow = pose_landmarks[14]
-        right_wrist = pose_landmarks[16]
-        
-        arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+        points = landmarks_to_array(pose_landmarks)
+        arm_angle = float(joint_angles(points, POSE_ANGLE_TRIPLETS)[0])
         result['arm_angle'] = arm_angle
         
         # 评分
@@ -207,13 +287,21 @@ class TeaPickingAnalyzer:
             return "准备中 ⏳"
     
     def get_statistics(self):
-        """获取统计数据"""
-        avg_score = np.mean(self.scores_history) if self.scores_history else 0
+        """
+        获取统计数据
+
+        average_score、total_actions 为整个会话的统计，recent_average_score 为最近窗口内的均值，
+        pick_quality 为所有采摘事件的平均质量（0~100）
+        """
+        history = self.scores_history
         return {
             'pick_count': self.pick_count,
             'current_score': int(self.current_score),
-            'average_score': int(avg_score),
-            'total_actions': len(self.scores_history)
+            'average_score': int(history.total_mean),
+            'recent_average_score': int(history.mean),
+            'best_score': int(history.total_max or 0),
+            'total_actions': history.total_count,
+            'pick_quality': int(self.segmenter.mean_quality * 100)
         }
     
     def reset(self):
@@ -222,6 +310,188 @@ class TeaPickingAnalyzer:
         self.pick_count = 0
         self.last_pinch_distance = None
         self.is_picking = False
-        self.scores_history = []
+        self.scores_history.clear()
         self.current_score = 0
+        self.segmenter.reset()
+        self.stability.reset()
+        if self.landmark_filter is not None:
+            self.landmark_filter.reset()
+        self.last_timestamp = None
+        self.last_event = None
+
+
+
+class MultiHandAnalyzer:
+    """
+    多手分析器 - 每条手部轨迹一份独立状态，所有轨迹一次向量化计算
+
+    状态按槽位存放在数组中（捏取距离、是否在采摘、采摘次数、当前得分），
+    每个槽位有自己的采摘分段器（与单手分析器的计数规则一致），关键点按轨迹各自滤波；轨迹编号由 HandTracker 提供，轨迹消失后其槽位和滤波状态被回收，
+    采摘次数累计到总数中。
+    """
+
+    def __init__(self, max_tracks=4, pinch_threshold=0.05, release_threshold=0.08,
+                 landmark_filter='one_euro', score_tau=0.15):
+        """
+        Args:
+            max_tracks: 最多同时分析的轨迹数
+            pinch_threshold: 捏取判定阈值
+            release_threshold: 释放判定阈值
+            landmark_filter: 关键点滤波器（'one_euro' / 'kalman'），None 表示不滤波
+            score_tau: 得分平滑的时间常数（秒）
+        """
+        self.max_tracks = max_tracks
+        self._pinch_threshold = pinch_threshold
+        self._release_threshold = release_threshold
+        self.filters = TrackFilters(landmark_filter) if landmark_filter else None
+        self.score_tau = score_tau
+        self.frame_interval = 1 / 30
+        self.reset()
+
+    @property
+    def pinch_threshold(self):
+        """捏取判定阈值（修改时同步到所有槽位的分段器）"""
+        return self._pinch_threshold
+
+    @pinch_threshold.setter
+    def pinch_threshold(self, value):
+        self._pinch_threshold = value
+        for segmenter in self._segmenters:
+            segmenter.pinch_threshold = value
+
+    @property
+    def release_threshold(self):
+        """释放判定阈值（修改时同步到所有槽位的分段器）"""
+        return self._release_threshold
+
+    @release_threshold.setter
+    def release_threshold(self, value):
+        self._release_threshold = value
+        for segmenter in self._segmenters:
+            segmenter.release_threshold = value
+
+    def _new_segmenter(self):
+        return PickSegmenter(pinch_threshold=self._pinch_threshold, release_threshold=self._release_threshold)
+
+    def reset(self):
+        """清空所有轨迹状态"""
+        n = self.max_tracks
+        self.last_pinch = np.full(n, np.nan)
+        self.is_picking = np.zeros(n, dtype=bool)
+        self.pick_counts = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros(n)
+        self._segmenters = [self._new_segmenter() for _ in range(n)]
+        self._stability = StabilityBank(n)
+        self.finished_picks = 0  # 已结束轨迹的采摘次数
+        self._slots = {}         # 轨迹编号 -> 槽位
+        self.last_timestamp = None
+        if self.filters is not None:
+            self.filters.reset()
+
+    def sync(self, active_ids):
+        """
+        回收已结束轨迹的槽位
+
+        Args:
+            active_ids: HandTracker.active_ids
+        """
+        active = set(active_ids)
+        if self.filters is not None:
+            self.filters.sync(active)
+        for track_id in [t for t in self._slots if t not in active]:
+            slot = self._slots.pop(track_id)
+            self.finished_picks += int(self.pick_counts[slot])
+            self.last_pinch[slot] = np.nan
+            self.is_picking[slot] = False
+            self.pick_counts[slot] = 0
+            self.scores[slot] = 0
+            self._segmenters[slot].reset()
+            self._stability.reset([slot])
+
+    def analyze(self, points, track_ids, timestamp=None):
+        """
+        一次分析所有轨迹的手
+
+        Args:
+            points: (K, 21, 3) 关键点数组
+            track_ids: 长度为 K 的轨迹编号列表（None 表示不分析）
+            timestamp: 帧时间戳（秒），不提供时按名义帧间隔推算
+
+        Returns:
+            字典，各项均为与有效轨迹对齐的数组：track_id、pinch_distance、is_pinching、
+            hand_angle、score、pick_count
+        """
+        valid = [i for i, t in enumerate(track_ids) if t is not None]
+        ids = [track_ids[i] for i in valid]
+        slots = np.array([self._slot_for(t) for t in ids], dtype=np.intp)
+        if len(slots) == 0:
+            empty = np.empty(0)
+            return {'track_id': [], 'pinch_distance': empty, 'is_pinching': empty.astype(bool),
+                    'hand_angle': empty, 'score': empty, 'pick_count': empty.astype(np.int64)}
+
+        if timestamp is None:
+            timestamp = 0.0 if self.last_timestamp is None else self.last_timestamp + self.frame_interval
+        dt = self.frame_interval if self.last_timestamp is None else max(timestamp - self.last_timestamp, 0.0)
+        self.last_timestamp = timestamp
+
+        # 关键点按轨迹滤波后再计算特征
+        points = points[valid]
+        if self.filters is not None:
+            points = self.filters(ids, points, timestamp)
+        features = hand_features(points)
+
+        pinch = features['pinch_distance'].astype(np.float64)
+        self.last_pinch[slots] = pinch
+
+        # 采摘分段：每个槽位一个分段器，释放完成计一次
+        wrists = points[:, 0, :2]
+        for k, slot in enumerate(slots):
+            segmenter = self._segmenters[slot]
+            segmenter.update(timestamp, pinch[k], wrists[k])
+            self.pick_counts[slot] = segmenter.event_count
+            self.is_picking[slot] = segmenter.holding
+        is_pinching = self.is_picking[slots]
+
+        # 评分（所有槽位的轨迹一次更新，稳定性一次计算）
+        self._stability.update(slots, points, timestamp)
+        stability = self._stability.scores(slots, STABILITY_MAX_SCORE)
+        raw_score = np.clip(pinch_scores(pinch, is_pinching) + finger_scores(features['other_fingers_dist'])
+                            + stability, 0, 100)
+        self.scores[slots] += time_constant_alpha(dt, self.score_tau) * (raw_score - self.scores[slots])
+
+        return {
+            'track_id': ids,
+            'pinch_distance': pinch,
+            'is_pinching': is_pinching,
+            'hand_angle': features['hand_angle'],
+            'score': self.scores[slots].astype(int),
+            'pick_count': self.pick_counts[slots].copy(),
+        }
+
+    @property
+    def total_picks(self):
+        """所有轨迹（含已结束轨迹）的采摘总次数"""
+        return self.finished_picks + int(self.pick_counts.sum())
+
+    def _slot_for(self, track_id):
+        """获取轨迹的槽位，新轨迹占用空闲槽位（必要时扩容）"""
+        slot = self._slots.get(track_id)
+        if slot is not None:
+            return slot
+        used = set(self._slots.values())
+        free = [s for s in range(self.max_tracks) if s not in used]
+        if not free:
+            self._grow()
+            free = [self.max_tracks - 1]
+        self._slots[track_id] = free[0]
+        return free[0]
 
+    def _grow(self):
+        """槽位不足时扩容一个"""
+        self.max_tracks += 1
+        self.last_pinch = np.append(self.last_pinch, np.nan)
+        self.is_picking = np.append(self.is_picking, False)
+        self.pick_counts = np.append(self.pick_counts, 0)
+        self.scores = np.append(self.scores, 0.0)
+        self._segmenters.append(self._new_segmenter())
+        self._stability.grow()
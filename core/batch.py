@@ -0,0 +1,336 @@
+"""
+离线批量视频分析 - 无界面运行，多进程并行处理录制好的采茶视频
+
+用法:
+    python -m core.batch 视频文件或目录 [...] -o 输出目录 [-j 进程数] [--chunk-seconds 秒]
+
+输出目录结构（<视频名> 为文件名加上完整路径的短哈希，不同目录下的同名视频互不覆盖）:
+    frames/<视频名>_<分段号>.csv   逐帧结果
+    summaries/<视频名>.json        单个视频汇总
+    summary.csv                    全部视频汇总
+    manifest.json                  已完成分段记录，中断后重新运行同一命令即可续跑
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detector_pool import get_detector_pool
+from core.detector_backend import BACKEND_ENV, available_backends
+from core.hand_detector import HAND_DETECTOR_OPTIONS
+from core.action_analyzer import TeaPickingAnalyzer
+from core.frame_context import FrameContext
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.webm')
+
+FRAME_COLUMNS = ['frame', 'time', 'hand_count', 'handedness', 'pinch_distance',
+                 'is_pinching', 'hand_angle', 'score', 'pick_count']
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def find_videos(paths):
+    """
+    展开输入路径中的视频文件
+
+    Args:
+        paths: 文件或目录路径列表
+
+    Returns:
+        排序后的视频文件路径列表
+    """
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.lower().endswith(VIDEO_EXTENSIONS):
+                        videos.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            videos.append(path)
+    return sorted(videos)
+
+
+def probe_video(path):
+    """
+    读取视频的帧数和帧率
+
+    Returns:
+        (frame_count, fps)，无法打开时返回 (0, 0)
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return 0, 0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return frame_count, fps
+
+
+def video_key(path):
+    """视频在输出目录中的名字（文件名去掉扩展名，加上绝对路径的短哈希）"""
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(path))[0]}_{digest}"
+
+
+def plan_chunks(videos, chunk_seconds):
+    """
+    把视频切分成分段任务，长视频可以分给多个进程
+
+    Args:
+        videos: 视频文件路径列表
+        chunk_seconds: 每段的时长（秒），<=0 表示不切分
+
+    Returns:
+        任务列表，每项为字典 (video, chunk, start, end, fps)
+    """
+    tasks = []
+    for video in videos:
+        frame_count, fps = probe_video(video)
+        if frame_count <= 0:
+            print(f"⚠️ 无法读取视频，已跳过: {video}", file=sys.stderr)
+            continue
+        chunk_frames = int(chunk_seconds * fps) if chunk_seconds > 0 else frame_count
+        chunk_frames = max(chunk_frames, 1)
+        for chunk, start in enumerate(range(0, frame_count, chunk_frames)):
+            tasks.append({
+                'video': video,
+                'chunk': chunk,
+                'start': start,
+                'end': min(start + chunk_frames, frame_count),
+                'fps': fps,
+            })
+    return tasks
+
+
+def task_id(task):
+    """分段任务的唯一标识"""
+    return f"{video_key(task['video'])}_{task['chunk']:04d}"
+
+
+def process_chunk(task, output_dir):
+    """
+    在子进程中分析一个视频分段，逐帧结果写入CSV
+
+    每个分段使用独立的分析器（检测器在进程内复用，但会清除跟踪状态），
+    跨越分段边界的一次采摘可能被计入后一段。
+
+    Args:
+        task: plan_chunks() 生成的任务
+        output_dir: 输出目录
+
+    Returns:
+        分段汇总字典
+    """
+    # 同一工作进程处理后续分段时复用检测器，不再重复创建模型
+    pool = get_detector_pool()
+    pose_detector = pool.acquire('pose')
+    hand_detector = pool.acquire('hands', **HAND_DETECTOR_OPTIONS)  # 与实时界面相同的检测参数
+    analyzer = TeaPickingAnalyzer()
+    frame_ctx = FrameContext(flip=False)  # 录制视频不需要镜像
+
+    cap = cv2.VideoCapture(task['video'])
+    cap.set(cv2.CAP_PROP_POS_FRAMES, task['start'])
+
+    frames_path = os.path.join(output_dir, 'frames', f"{task_id(task)}.csv")
+    tmp_path = frames_path + '.tmp'
+
+    summary = {
+        'id': task_id(task),
+        'video': task['video'],
+        'chunk': task['chunk'],
+        'frames': 0,
+        'hand_frames': 0,
+        'pick_count': 0,
+        'score_sum': 0.0,
+        'elapsed': 0.0,
+    }
+    started = time.time()
+
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(FRAME_COLUMNS)
+
+            for index in range(task['start'], task['end']):
+                ok, img = cap.read()
+                if not ok:
+                    break
+
+                frame_ctx.update(img)
+                pose_detector.detect(frame_ctx)
+                hand_detector.detect(frame_ctx)
+                hands_data = hand_detector.get_all_hands()
+
+                row = [index, round(index / task['fps'], 3), len(hands_data), '', '', '', '', '', analyzer.pick_count]
+                if hands_data:
+                    result = analyzer.analyze_hand(hands_data[0]['landmarks'], hands_data[0]['handedness'],
+                                                   timestamp=index / task['fps'])
+                    row[3:] = [hands_data[0]['handedness'] or '',
+                               round(result['pinch_distance'], 5),
+                               int(result['is_pinching']),
+                               round(result['hand_angle'], 2),
+                               result['score'],
+                               analyzer.pick_count]
+                    summary['hand_frames'] += 1
+                    summary['score_sum'] += result['score']
+
+                writer.writerow(row)
+                summary['frames'] += 1
+    finally:
+        cap.release()
+        pool.release(pose_detector)
+        pool.release(hand_detector)
+
+    # 写完再改名，中断时不会留下半截文件被当作已完成
+    os.replace(tmp_path, frames_path)
+
+    summary['pick_count'] = analyzer.pick_count
+    summary['elapsed'] = time.time() - started
+    return summary
+
+
+def load_manifest(output_dir):
+    """读取已完成分段记录"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    """原子方式写入已完成分段记录"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def summarize_videos(tasks, manifest, output_dir):
+    """
+    合并各分段汇总，写出单视频汇总和总表
+
+    Returns:
+        视频汇总列表
+    """
+    by_video = {}
+    for task in tasks:
+        by_video.setdefault(task['video'], []).append(task)
+
+    summaries = []
+    for video, video_tasks in by_video.items():
+        chunks = [manifest[task_id(t)] for t in video_tasks if task_id(t) in manifest]
+        if len(chunks) != len(video_tasks):
+            continue  # 还有分段没有完成
+
+        frames = sum(c['frames'] for c in chunks)
+        hand_frames = sum(c['hand_frames'] for c in chunks)
+        pick_count = sum(c['pick_count'] for c in chunks)
+        duration = frames / video_tasks[0]['fps']
+        summary = {
+            'video': video,
+            'frames': frames,
+            'duration': round(duration, 2),
+            'hand_frames': hand_frames,
+            'pick_count': pick_count,
+            'picks_per_minute': round(pick_count / (duration / 60), 2) if duration > 0 else 0,
+            'average_score': round(sum(c['score_sum'] for c in chunks) / hand_frames, 2) if hand_frames else 0,
+        }
+        with open(os.path.join(output_dir, 'summaries', f"{video_key(video)}.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        summaries.append(summary)
+
+    if summaries:
+        with open(os.path.join(output_dir, 'summary.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(summaries[0].keys()))
+            writer.writeheader()
+            writer.writerows(summaries)
+    return summaries
+
+
+def run_batch(paths, output_dir, workers=None, chunk_seconds=300, resume=True, backend=None):
+    """
+    批量分析视频
+
+    Args:
+        paths: 视频文件或目录列表
+        output_dir: 输出目录
+        workers: 进程数，默认使用全部CPU核心
+        chunk_seconds: 长视频切分的分段时长（秒）
+        resume: 是否跳过上次已完成的分段
+        backend: 检测后端名，默认由环境变量 TEA_AI_BACKEND 决定
+
+    Returns:
+        视频汇总列表
+    """
+    if backend:
+        # 工作进程继承环境变量，按同一后端创建检测器
+        os.environ[BACKEND_ENV] = backend
+    os.makedirs(os.path.join(output_dir, 'frames'), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, 'summaries'), exist_ok=True)
+
+    tasks = plan_chunks(find_videos(paths), chunk_seconds)
+    manifest = load_manifest(output_dir) if resume else {}
+    pending = [t for t in tasks if task_id(t) not in manifest]
+
+    total = len(tasks)
+    done = total - len(pending)
+    if done:
+        print(f"↩️ 续跑：{done}/{total} 个分段已完成")
+
+    started = time.time()
+    processed_frames = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_chunk, t, output_dir): t for t in pending}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"✗ {task_id(task)} 失败: {e}", file=sys.stderr)
+                continue
+
+            manifest[summary['id']] = summary
+            save_manifest(output_dir, manifest)
+
+            done += 1
+            processed_frames += summary['frames']
+            elapsed = time.time() - started
+            fps = processed_frames / elapsed if elapsed > 0 else 0
+            print(f"[{done}/{total}] {summary['id']}  {summary['frames']}帧  "
+                  f"采摘 {summary['pick_count']} 次  总吞吐 {fps:.1f} 帧/秒")
+
+    return summarize_videos(tasks, manifest, output_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量分析采茶视频")
+    parser.add_argument('inputs', nargs='+', help="视频文件或包含视频的目录")
+    parser.add_argument('-o', '--output', default='batch_output', help="输出目录")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="并行进程数（默认CPU核心数）")
+    parser.add_argument('--chunk-seconds', type=float, default=300,
+                        help="长视频按该时长切分给多个进程，0 表示不切分")
+    parser.add_argument('--no-resume', action='store_true', help="忽略已完成记录，全部重新分析")
+    parser.add_argument('--backend', choices=available_backends(), default=None,
+                        help="检测后端（默认 mediapipe；synthetic 生成合成动作，用于压测）")
+    args = parser.parse_args(argv)
+
+    summaries = run_batch(args.inputs, args.output, args.workers, args.chunk_seconds, not args.no_resume,
+                          args.backend)
+    for summary in summaries:
+        print(f"✓ {summary['video']}: 采摘 {summary['pick_count']} 次，"
+              f"平均得分 {summary['average_score']}，{summary['picks_per_minute']} 次/分钟")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+检测后端 - 姿态/手部检测器的统一接口与后端注册表
+
+检测器每帧调用一次 detect()，之后通过 get_landmarks() / get_all_hands() 取结果，
+关键点可以是 MediaPipe 关键点列表，也可以是 (N, 3) 数组（下游统一用
+landmarks_to_array 转换）；landmark_array() 直接返回数组形式。
+
+内置两个后端：
+- mediapipe: MediaPipe Pose / Hands（默认）
+- synthetic: 按脚本生成采茶动作的合成后端，不需要模型和摄像头，用于压测和CI
+
+后端通过环境变量 TEA_AI_BACKEND 选择，检测器池按所选后端创建检测器。
+"""
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import landmarks_to_array
+
+BACKEND_ENV = 'TEA_AI_BACKEND'
+DEFAULT_BACKEND = 'mediapipe'
+
+
+class PoseBackend(ABC):
+    """姿态检测后端接口"""
+
+    name = ''
+    model_complexity = 1
+
+    @abstractmethod
+    def detect(self, frame):
+        """
+        检测一帧
+
+        Args:
+            frame: BGR图像，或已完成翻转/颜色转换的 FrameContext
+
+        Returns:
+            BGR图像
+        """
+
+    @abstractmethod
+    def get_landmarks(self):
+        """最近一帧的 33 个姿态关键点，没有检测到时返回None"""
+
+    def landmark_array(self):
+        """最近一帧的 (33, 3) 关键点数组，没有检测到时返回None"""
+        landmarks = self.get_landmarks()
+        return None if landmarks is None else landmarks_to_array(landmarks)
+
+    def get_hand_regions(self, min_visibility=0.5, padding=1.6):
+        """手部候选区域 [(wrist_idx, cx, cy, size), ...]，供手部检测的 ROI 模式使用"""
+        return []
+
+    def is_detected(self):
+        """检查是否检测到人体"""
+        return self.get_landmarks() is not None
+
+    def reset(self):
+        """清除检测结果和跟踪状态"""
+
+    def release(self):
+        """释放资源"""
+
+
+class HandBackend(ABC):
+    """手部检测后端接口"""
+
+    name = ''
+    max_num_hands = 2
+    model_complexity = 1
+    roi_mode = False
+
+    @abstractmethod
+    def detect(self, frame, wrist_regions=None):
+        """
+        检测一帧
+
+        Args:
+            frame: BGR图像，或已完成翻转/颜色转换的 FrameContext
+            wrist_regions: ROI 模式下的手部候选区域
+
+        Returns:
+            BGR图像
+        """
+
+    @abstractmethod
+    def get_all_hands(self):
+        """最近一帧的手部列表 [{'landmarks': ..., 'handedness': 'Left'/'Right'/None}, ...]"""
+
+    def landmark_array(self):
+        """最近一帧的 (K, 21, 3) 关键点数组"""
+        hands = self.get_all_hands()
+        if not hands:
+            return np.empty((0, 21, 3), dtype=np.float32)
+        return np.stack([landmarks_to_array(h['landmarks']) for h in hands])
+
+    def get_hand_count(self):
+        """获取检测到的手部数量"""
+        return len(self.get_all_hands())
+
+    def is_detected(self):
+        """检查是否检测到手部"""
+        return self.get_hand_count() > 0
+
+    def reset(self):
+        """清除检测结果和跟踪状态"""
+
+    def release(self):
+        """释放资源"""
+
+
+def _load_mediapipe_backend():
+    from core.pose_detector import PoseDetector
+    from core.hand_detector import HandDetector
+    return {'pose': PoseDetector, 'hands': HandDetector}
+
+
+def _load_synthetic_backend():
+    from core.synthetic_backend import SyntheticPoseDetector, SyntheticHandDetector
+    return {'pose': SyntheticPoseDetector, 'hands': SyntheticHandDetector}
+
+
+# 后端名 -> 返回 {'pose': 类, 'hands': 类} 的加载函数（延迟导入）
+_BACKENDS = {
+    'mediapipe': _load_mediapipe_backend,
+    'synthetic': _load_synthetic_backend,
+}
+
+
+def register_backend(name, pose_cls, hands_cls):
+    """
+    注册新的检测后端
+
+    Args:
+        name: 后端名
+        pose_cls: 实现 PoseBackend 接口的类
+        hands_cls: 实现 HandBackend 接口的类
+    """
+    _BACKENDS[name] = lambda: {'pose': pose_cls, 'hands': hands_cls}
+
+
+def available_backends():
+    """已注册的后端名列表"""
+    return list(_BACKENDS)
+
+
+def default_backend():
+    """环境变量指定的后端名，未设置时为 mediapipe"""
+    return os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+
+
+def get_backend(name=None):
+    """
+    获取后端的检测器类
+
+    Args:
+        name: 后端名，默认 default_backend()
+
+    Returns:
+        {'pose': 姿态检测器类, 'hands': 手部检测器类}
+    """
+    name = name or default_backend()
+    if name not in _BACKENDS:
+        raise ValueError(f"未知的检测后端: {name}（可选: {', '.join(_BACKENDS)}）")
+    return _BACKENDS[name]()
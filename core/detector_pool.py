@@ -0,0 +1,160 @@
+"""
+检测器池 - 进程内共享、预热过的检测器实例
+
+创建 MediaPipe 的 Hands/Pose 图需要数秒，每次 WebRTC 会话开始或切换模式都重新创建，
+使用者就要等待。检测器池在应用启动时于后台线程预热，会话开始时借出，结束时归还
+（归还时清除跟踪状态），下一个会话直接复用。
+"""
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detector_backend import get_backend, default_backend
+from core.mediapipe_loader import load_mediapipe, import_seconds, mediapipe_error
+
+# 预热时送入的空白帧，触发模型的首次初始化
+WARMUP_FRAME_SHAPE = (240, 320, 3)
+
+
+class DetectorPool:
+    """检测器池"""
+
+    def __init__(self, backend=None, max_idle=4):
+        """
+        Args:
+            backend: 检测后端名（见 core.detector_backend），默认由环境变量 TEA_AI_BACKEND 决定
+            max_idle: 每种配置最多保留的空闲实例数，多余的归还时直接释放
+        """
+        self.backend = backend or default_backend()
+        self.kinds = get_backend(self.backend)
+        self.max_idle = max_idle
+        self._idle = defaultdict(list)   # 配置 -> 空闲实例列表
+        self._borrowed = {}              # id(实例) -> 配置
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        self._warmup_started = False
+        self._profile = {'warmup': {}, 'created': 0, 'reused': 0}
+
+    @staticmethod
+    def _key(kind, options):
+        return kind, tuple(sorted(options.items()))
+
+    def acquire(self, kind, **options):
+        """
+        借出一个检测器，没有空闲实例时新建
+
+        Args:
+            kind: 'pose' 或 'hands'
+            **options: 检测器构造参数
+
+        Returns:
+            检测器实例，用完后调用 release() 归还
+        """
+        key = self._key(kind, options)
+        with self._lock:
+            idle = self._idle[key]
+            detector = idle.pop() if idle else None
+            if detector is not None:
+                self._profile['reused'] += 1
+        if detector is None:
+            detector = self.kinds[kind](**options)
+            with self._lock:
+                self._profile['created'] += 1
+        with self._lock:
+            self._borrowed[id(detector)] = key
+        return detector
+
+    def release(self, detector):
+        """
+        归还检测器
+
+        Args:
+            detector: acquire() 借出的实例；不是本池借出的实例直接释放
+        """
+        if detector is None:
+            return
+        with self._lock:
+            key = self._borrowed.pop(id(detector), None)
+            keep = key is not None and len(self._idle[key]) < self.max_idle
+        if not keep:
+            detector.release()
+            return
+        detector.reset()
+        with self._lock:
+            self._idle[key].append(detector)
+
+    def warm_up(self, specs, background=True):
+        """
+        预先创建检测器并跑一帧空白图像（只在第一次调用时执行）
+
+        Args:
+            specs: [(类型名, 构造参数字典), ...]
+            background: 是否在后台线程中执行
+
+        Returns:
+            预热线程（同步执行，或之前已同步预热时为None）
+        """
+        with self._lock:
+            if self._warmup_started:
+                return self._warmup_thread
+            self._warmup_started = True
+            if background:
+                # 在锁内创建并启动，其他调用方拿到的总是已启动、可以 join() 的线程
+                self._warmup_thread = threading.Thread(target=self._warm_up, args=(list(specs),), daemon=True)
+                self._warmup_thread.start()
+                return self._warmup_thread
+        self._warm_up(list(specs))
+        return None
+
+    def _warm_up(self, specs):
+        if self.backend == 'mediapipe':
+            load_mediapipe()
+        blank = np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+        for kind, options in specs:
+            start = time.perf_counter()
+            detector = self.acquire(kind, **options)
+            detector.detect(blank)
+            self.release(detector)
+            with self._lock:
+                self._profile['warmup'][kind] = time.perf_counter() - start
+
+    def profile(self):
+        """
+        启动耗时统计
+
+        Returns:
+            字典：backend（后端名）、mediapipe_import（导入秒数）、mediapipe_error（导入失败原因）、
+            warmup（类型名 -> 预热秒数）、created / reused（新建与复用次数）、idle（空闲实例数）
+        """
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'mediapipe_error': mediapipe_error(),
+                'mediapipe_import': import_seconds(),
+                'warmup': dict(self._profile['warmup']),
+                'created': self._profile['created'],
+                'reused': self._profile['reused'],
+                'idle': sum(len(v) for v in self._idle.values()),
+            }
+
+
+# 进程级共享的检测器池，第一次使用时按当时的后端设置创建
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_detector_pool():
+    """获取进程级检测器池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DetectorPool()
+    return _pool
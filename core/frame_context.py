@@ -0,0 +1,96 @@
+"""
+帧上下文模块 - 每帧只做一次翻转和颜色转换，供各检测器共享
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameContext:
+    """
+    帧上下文
+
+    持有镜像后的 BGR 画面和对应的 RGB 缓冲区。缓冲区在分辨率不变时反复复用，
+    PoseDetector 与 HandDetector 直接读取同一个 RGB 缓冲区，不再各自转换。
+    inference_scale 小于 1 时 RGB 缓冲区是缩小后的画面（关键点为归一化坐标，不受影响），
+    BGR 画面保持原分辨率用于绘制和输出。
+    """
+
+    def __init__(self, flip=True, timers=None, inference_scale=1.0):
+        """
+        初始化帧上下文
+
+        Args:
+            flip: 是否水平镜像（自拍视角）
+            timers: 可选的 StageTimers，记录 flip / color 两个阶段的耗时（缩放计入 color）
+            inference_scale: 送入检测器的画面相对原画面的缩放比例
+        """
+        self.flip = flip
+        self.timers = timers
+        self.inference_scale = inference_scale
+        self.bgr = None
+        self.rgb = None
+        self._small = None  # 缩小后的 BGR 缓冲区
+        self.frame_index = -1
+
+    def update(self, frame):
+        """
+        载入新的一帧
+
+        Args:
+            frame: BGR格式的原始图像
+
+        Returns:
+            self，便于链式调用
+        """
+        if self.bgr is None or self.bgr.shape != frame.shape:
+            self.bgr = np.empty_like(frame)
+            self.rgb = np.empty_like(frame)
+            self._small = None
+
+        h, w = frame.shape[:2]
+        scale = self.inference_scale
+        small_size = (max(int(w * scale), 1), max(int(h * scale), 1)) if scale < 1 else (w, h)
+        if self.rgb.shape[1::-1] != small_size:
+            self.rgb = np.empty((small_size[1], small_size[0], 3), dtype=frame.dtype)
+            self._small = np.empty_like(self.rgb) if scale < 1 else None
+
+        # 翻转与颜色转换都写入预分配的缓冲区，不产生新的整帧拷贝
+        start = time.perf_counter()
+        if self.flip:
+            cv2.flip(frame, 1, dst=self.bgr)
+        else:
+            np.copyto(self.bgr, frame)
+        if self.timers is not None:
+            start = self.timers.lap('flip', start)
+        if self._small is not None:
+            cv2.resize(self.bgr, small_size, dst=self._small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        else:
+            cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        if self.timers is not None:
+            self.timers.lap('color', start)
+
+        self.frame_index += 1
+        return self
+
+    @property
+    def shape(self):
+        """画面尺寸 (h, w, c)"""
+        return None if self.bgr is None else self.bgr.shape
+
+
+def get_rgb(frame):
+    """
+    从 FrameContext 或 BGR 图像中取出 RGB 图像
+
+    Args:
+        frame: FrameContext 或 BGR格式的图像
+
+    Returns:
+        RGB格式的图像
+    """
+    if isinstance(frame, FrameContext):
+        return frame.rgb
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,183 @@
+"""
+自适应跳帧模块 - 根据处理预算和动作速度决定哪些帧需要完整推理
+跳过的帧用最近两次检测结果线性外推关键点
+"""
+import math
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import landmarks_to_array
+
+
+class AdaptiveFrameScheduler:
+    """自适应跳帧调度器"""
+
+    def __init__(self,
+                 target_fps=30,
+                 max_skip=4,
+                 slow_speed=0.05,
+                 fast_speed=0.6,
+                 max_extrapolation=0.2):
+        """
+        初始化调度器
+
+        Args:
+            target_fps: 目标显示帧率
+            max_skip: 两次推理之间最多间隔的帧数
+            slow_speed: 低于该速度（归一化坐标/秒）视为静止，可最大程度跳帧
+            fast_speed: 高于该速度视为快速运动，尽量每帧推理
+            max_extrapolation: 最长外推时间（秒），超过后保持最后位置
+        """
+        self.target_fps = target_fps
+        self.max_skip = max_skip
+        self.slow_speed = slow_speed
+        self.fast_speed = fast_speed
+        self.max_extrapolation = max_extrapolation
+
+        self.skip_interval = 1
+        self.frames_since_inference = 0
+        self.inference_time = None  # 推理耗时（秒）的指数平均
+        self.critical = False
+
+        # 每只手最近两次观测: 检测序号或轨迹编号 -> [(timestamp, ndarray(N, 3)), ...]
+        self._tracks = {}
+        self._handedness = {}
+        self._speed = 0.0
+
+    def should_infer(self):
+        """
+        判断当前帧是否需要执行完整推理
+
+        Returns:
+            True 表示需要推理，False 表示使用外推结果
+        """
+        if self.critical or not self._tracks:
+            return True
+        return self.frames_since_inference + 1 >= self.skip_interval
+
+    def set_critical(self, critical):
+        """
+        标记当前处于关键阶段（如捏取距离接近判定阈值），关键阶段每帧推理
+
+        Args:
+            critical: 是否为关键阶段
+        """
+        self.critical = critical
+
+    def record_inference(self, duration):
+        """
+        记录一次推理耗时并更新跳帧间隔
+
+        应在 observe_hands() 之后调用，使跳帧间隔用到本次检测得到的运动速度
+
+        Args:
+            duration: 推理耗时（秒）
+        """
+        if self.inference_time is None:
+            self.inference_time = duration
+        else:
+            self.inference_time = 0.2 * duration + 0.8 * self.inference_time
+        self.frames_since_inference = 0
+        self._update_interval()
+
+    def mark_skipped(self):
+        """记录一帧被跳过"""
+        self.frames_since_inference += 1
+
+    def observe_hands(self, hands_data, timestamp, keys=None):
+        """
+        保存本次推理得到的手部关键点并更新运动速度（跳帧间隔在 record_inference() 中计算）
+
+        Args:
+            hands_data: HandDetector.get_all_hands() 的返回值
+            timestamp: 帧时间戳（秒）
+            keys: 与 hands_data 对齐的轨迹编号（多手模式下来自 HandTracker，None 项按检测序号）；
+                不提供时按检测序号区分各只手。不按左右手区分：多人时常有几只手左右相同
+        """
+        seen = set()
+        speeds = []
+        for idx, hand in enumerate(hands_data):
+            key = ('track', keys[idx]) if keys is not None and keys[idx] is not None else idx
+            seen.add(key)
+            points = landmarks_to_array(hand['landmarks']).copy()
+
+            history = self._tracks.setdefault(key, [])
+            history.append((timestamp, points))
+            if len(history) > 2:
+                del history[0]
+            self._handedness[key] = hand['handedness']
+
+            if len(history) == 2:
+                (t0, p0), (t1, p1) = history
+                dt = t1 - t0
+                if dt > 0:
+                    speeds.append(float(np.abs(p1[:, :2] - p0[:, :2]).max(axis=1).mean()) / dt)
+
+        # 本帧没有出现的手不再外推
+        for key in list(self._tracks):
+            if key not in seen:
+                del self._tracks[key]
+                self._handedness.pop(key, None)
+
+        self._speed = max(speeds) if speeds else 0.0
+
+    def predict_hands(self, timestamp):
+        """
+        外推当前帧的手部关键点
+
+        Args:
+            timestamp: 帧时间戳（秒）
+
+        Returns:
+            与 HandDetector.get_all_hands() 格式相同的列表，关键点为 (21, 3) 数组
+        """
+        hands_data = []
+        for key, history in self._tracks.items():
+            t1, p1 = history[-1]
+            if len(history) == 2:
+                t0, p0 = history[0]
+                dt = t1 - t0
+                elapsed = min(timestamp - t1, self.max_extrapolation)
+                if dt > 0 and elapsed > 0:
+                    points = p1 + (p1 - p0) * (elapsed / dt)
+                else:
+                    points = p1
+            else:
+                points = p1
+            hands_data.append({
+                'landmarks': points,
+                'handedness': self._handedness.get(key)
+            })
+        return hands_data
+
+    def reset(self):
+        """清空调度状态"""
+        self.skip_interval = 1
+        self.frames_since_inference = 0
+        self.inference_time = None
+        self.critical = False
+        self._tracks = {}
+        self._handedness = {}
+        self._speed = 0.0
+
+    def _update_interval(self):
+        """根据处理预算和运动速度计算跳帧间隔"""
+        budget = 1.0 / self.target_fps
+
+        # 预算约束：一次推理占用几帧的时间，至少就要隔几帧推理一次
+        budget_skip = max(1, math.ceil((self.inference_time or 0.0) / budget))
+
+        # 运动约束：动作越慢，可以隔越多帧推理一次
+        if self._speed <= self.slow_speed:
+            motion_skip = self.max_skip
+        elif self._speed >= self.fast_speed:
+            motion_skip = 1
+        else:
+            ratio = (self._speed - self.slow_speed) / (self.fast_speed - self.slow_speed)
+            motion_skip = round(self.max_skip - ratio * (self.max_skip - 1))
+
+        self.skip_interval = int(min(self.max_skip, max(budget_skip, motion_skip)))
@@ -2,36 +2,48 @@
 手部检测模块 - 使用MediaPipe Hands（云端兼容版）
 """
 import cv2
+import sys
+import os
 
-MEDIAPIPE_AVAILABLE = False
-MEDIAPIPE_ERROR = ""
-mp = None
-
-try:
-    import mediapipe as mp
-    # 测试 solutions 是否可用
-    _ = mp.solutions.hands
-    MEDIAPIPE_AVAILABLE = True
-except ImportError as e:
-    MEDIAPIPE_ERROR = f"Import: {str(e)[:50]}"
-    MEDIAPIPE_AVAILABLE = False
-except AttributeError as e:
-    MEDIAPIPE_ERROR = f"Attr: {str(e)[:50]}"
-    MEDIAPIPE_AVAILABLE = False
-except Exception as e:
-    MEDIAPIPE_ERROR = f"Other: {str(e)[:50]}"
-    MEDIAPIPE_AVAILABLE = False
-
-
-class HandDetector:
-    """手部检测器"""
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_context import FrameContext, get_rgb
+from core.mediapipe_loader import load_mediapipe
+from core.detector_backend import HandBackend
+
+# 应用与批量分析共用的检测参数：降低检测置信度，更容易检测到手
+HAND_DETECTOR_OPTIONS = dict(min_detection_confidence=0.3, min_tracking_confidence=0.3)
+
+
+class _RoiResults:
+    """ROI 模式下合并后的检测结果，字段与 MediaPipe Hands 的结果一致"""
+
+    def __init__(self):
+        self.multi_hand_landmarks = None
+        self.multi_handedness = None
+
+    def add(self, hand_landmarks, handedness):
+        if self.multi_hand_landmarks is None:
+            self.multi_hand_landmarks = []
+            self.multi_handedness = []
+        self.multi_hand_landmarks.append(hand_landmarks)
+        self.multi_handedness.append(handedness)
+
+
+class HandDetector(HandBackend):
+    """手部检测器（MediaPipe 后端）"""
+
+    name = 'mediapipe'
 
     def __init__(self,
                  static_image_mode=False,
                  max_num_hands=2,
                  model_complexity=1,
                  min_detection_confidence=0.5,
-                 min_tracking_confidence=0.5):
+                 min_tracking_confidence=0.5,
+                 roi_mode=False,
+                 roi_max_size=256):
         """
         初始化手部检测器
 
@@ -41,14 +53,29 @@ class HandDetector:
             model_complexity: 模型复杂度 (0, 1)
             min_detection_confidence: 最小检测置信度
             min_tracking_confidence: 最小跟踪置信度
+            roi_mode: 是否只在姿态手腕附近的裁剪区域内检测手部
+            roi_max_size: 裁剪区域送入模型前统一缩放到的边长（像素）
         """
         self.results = None
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        self.roi_mode = roi_mode
+        self.roi_max_size = roi_max_size
+        self._roi_hands = {}  # 每条手臂（姿态手腕索引）一个跟踪图，延迟创建
+        self._hands_kwargs = dict(
+            static_image_mode=static_image_mode,
+            model_complexity=model_complexity,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
         self.mp_hands = None
         self.mp_draw = None
         self.mp_drawing_styles = None
         self.hands = None
 
-        if MEDIAPIPE_AVAILABLE:
+        # 延迟导入：第一次创建检测器时才加载 mediapipe
+        mp = load_mediapipe()
+        if mp is not None:
             try:
                 self.mp_hands = mp.solutions.hands
                 self.mp_draw = mp.solutions.drawing_utils
@@ -67,21 +94,85 @@ class HandDetector:
                 self.mp_drawing_styles = None
                 self.hands = None
 
-    def detect(self, frame):
+    def detect(self, frame, wrist_regions=None):
         """
         检测图像中的手部
 
         Args:
-            frame: BGR格式的图像
+            frame: BGR格式的图像，或已完成翻转/颜色转换的 FrameContext
+            wrist_regions: ROI 模式下的手部候选区域，来自 PoseDetector.get_hand_regions()；
+                为空时回退到全画面检测
 
         Returns:
-            处理后的图像
+            处理后的图像（BGR）
         """
-        if not MEDIAPIPE_AVAILABLE or self.hands is None:
-            return frame
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(rgb_frame)
-        return frame
+        bgr_frame = frame.bgr if isinstance(frame, FrameContext) else frame
+        if self.hands is None:
+            return bgr_frame
+        rgb_frame = get_rgb(frame)
+        if self.roi_mode and wrist_regions:
+            self.results = self._detect_in_regions(rgb_frame, wrist_regions)
+        else:
+            self.results = self.hands.process(rgb_frame)
+        return bgr_frame
+
+    def _detect_in_regions(self, rgb_frame, wrist_regions):
+        """
+        在手腕附近的裁剪区域中检测手部，并把关键点映射回整幅画面的归一化坐标
+
+        Args:
+            rgb_frame: RGB格式的整帧图像
+            wrist_regions: 区域列表，每项为 (wrist_idx, cx, cy, size)；wrist_idx 为姿态手腕索引，
+                其余均为归一化值（size 以画面宽度为单位）
+
+        Returns:
+            与 MediaPipe Hands 结果字段一致的对象
+        """
+        h, w = rgb_frame.shape[:2]
+        merged = _RoiResults()
+
+        for wrist_idx, cx, cy, size in wrist_regions:
+            # 正方形裁剪框，靠近边缘时平移到画面内而不是截断，保持输入尺寸固定
+            side = min(max(int(size * w), 32), w, h)
+            x0 = min(max(int(cx * w) - side // 2, 0), w - side)
+            y0 = min(max(int(cy * h) - side // 2, 0), h - side)
+            crop = rgb_frame[y0:y0 + side, x0:x0 + side]
+
+            # 统一缩放到 roi_max_size：近处的手缩小以省算力，远处的手放大以提高精度
+            interpolation = cv2.INTER_AREA if side > self.roi_max_size else cv2.INTER_LINEAR
+            crop = cv2.resize(crop, (self.roi_max_size, self.roi_max_size), interpolation=interpolation)
+
+            # 跟踪图按手臂区分：一侧手腕不可见时，另一侧仍使用自己的跟踪状态
+            results = self._get_roi_hands(wrist_idx).process(crop)
+            if not results.multi_hand_landmarks:
+                continue
+
+            for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                # 裁剪区域内的归一化坐标 -> 整帧归一化坐标（直接改写，绘制时可直接使用）
+                for lm in hand_landmarks.landmark:
+                    lm.x = (x0 + lm.x * side) / w
+                    lm.y = (y0 + lm.y * side) / h
+                    lm.z = lm.z * side / w
+
+                # 两个区域重叠时可能检测到同一只手，按手腕位置去重
+                wrist = hand_landmarks.landmark[0]
+                duplicate = False
+                for existing in merged.multi_hand_landmarks or []:
+                    other = existing.landmark[0]
+                    if abs(other.x - wrist.x) < 0.02 and abs(other.y - wrist.y) < 0.02:
+                        duplicate = True
+                        break
+                if not duplicate:
+                    merged.add(hand_landmarks, handedness)
+
+        return merged
+
+    def _get_roi_hands(self, wrist_idx):
+        """获取（必要时创建）某条手臂专用的检测图"""
+        hands = self._roi_hands.get(wrist_idx)
+        if hands is None:
+            hands = self._roi_hands[wrist_idx] = self.mp_hands.Hands(max_num_hands=1, **self._hands_kwargs)
+        return hands
 
     def draw_landmarks(self, frame):
         """
@@ -93,7 +184,7 @@ class HandDetector:
         Returns:
             绘制后的图像
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None:
             return frame
         if self.results and self.results.multi_hand_landmarks:
             for hand_landmarks in self.results.multi_hand_landmarks:
@@ -113,7 +204,7 @@ class HandDetector:
         Returns:
             列表，每个元素包含 (landmarks, handedness)
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None:
             return []
         hands_data = []
         if self.results and self.results.multi_hand_landmarks:
@@ -137,7 +228,7 @@ class HandDetector:
         Returns:
             字典，包含各指尖坐标
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None:
             return {}
         tips = {
             'thumb': hand_landmarks[self.mp_hands.HandLandmark.THUMB_TIP],
@@ -158,7 +249,7 @@ class HandDetector:
         Returns:
             捏取距离（归一化值）
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None:
             return 0.0
         thumb_tip = hand_landmarks[self.mp_hands.HandLandmark.THUMB_TIP]
         index_tip = hand_landmarks[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
@@ -170,20 +261,30 @@ class HandDetector:
 
     def is_detected(self):
         """检查是否检测到手部"""
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None:
             return False
         return self.results is not None and self.results.multi_hand_landmarks is not None
 
     def get_hand_count(self):
         """获取检测到的手部数量"""
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_hands is None:
             return 0
         if self.results and self.results.multi_hand_landmarks:
             return len(self.results.multi_hand_landmarks)
         return 0
 
+    def reset(self):
+        """清除上一段视频的检测结果和跟踪状态（检测器被复用时调用）"""
+        self.results = None
+        for graph in [self.hands, *self._roi_hands.values()]:
+            if graph is not None and hasattr(graph, 'reset'):
+                graph.reset()
+
     def release(self):
         """释放资源"""
         if self.hands:
             self.hands.close()
+        for roi_hands in self._roi_hands.values():
+            roi_hands.close()
+        self._roi_hands = {}
 
@@ -0,0 +1,127 @@
+"""
+手部跟踪模块 - 为跨帧的每只手分配稳定的编号
+
+按手腕位置最近邻 + 左右手一致性做贪心匹配，画面中有两只手或两个人时，
+每只手的分析状态都能跟随同一个编号，而不会在手之间跳动。
+"""
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import landmarks_to_array
+
+
+class HandTracker:
+    """轻量手部跟踪器"""
+
+    def __init__(self, max_tracks=4, max_distance=0.15, handedness_penalty=0.05, max_missed=5):
+        """
+        Args:
+            max_tracks: 同时跟踪的最多手数
+            max_distance: 手腕位移超过该值（归一化坐标）视为不同的手
+            handedness_penalty: 左右手标签不一致时附加的匹配代价
+            max_missed: 连续多少帧未出现后删除该轨迹
+        """
+        self.max_tracks = max_tracks
+        self.max_distance = max_distance
+        self.handedness_penalty = handedness_penalty
+        self.max_missed = max_missed
+
+        self._next_id = 0
+        self._ids = []                       # 活动轨迹编号
+        self._wrists = np.empty((0, 2), dtype=np.float32)
+        self._handedness = []
+        self._missed = np.empty(0, dtype=np.int32)
+        self._age = np.empty(0, dtype=np.int32)
+
+    @property
+    def active_ids(self):
+        """当前活动的轨迹编号"""
+        return list(self._ids)
+
+    def primary_id(self):
+        """持续时间最长的轨迹编号（作为主手），没有轨迹时返回None"""
+        if not self._ids:
+            return None
+        return self._ids[int(np.argmax(self._age))]
+
+    def update(self, hands_data, points=None):
+        """
+        用本帧检测结果更新轨迹
+
+        Args:
+            hands_data: HandDetector.get_all_hands() 格式的列表
+            points: 可选，已堆叠好的 (K, 21, 3) 关键点数组
+
+        Returns:
+            与 hands_data 对齐的轨迹编号列表；超出 max_tracks 的手为None
+        """
+        n = len(hands_data)
+        if points is None:
+            points = (np.stack([landmarks_to_array(h['landmarks']) for h in hands_data])
+                      if n else np.empty((0, 21, 3), dtype=np.float32))
+        wrists = points[:, 0, :2]
+        handedness = [h['handedness'] for h in hands_data]
+
+        assigned = [None] * n
+        matched = np.zeros(len(self._ids), dtype=bool)
+
+        if n and self._ids:
+            # 代价矩阵：手腕距离 + 左右手不一致惩罚
+            cost = np.linalg.norm(wrists[:, None, :] - self._wrists[None, :, :], axis=2)
+            mismatch = np.array([[a is not None and b is not None and a != b for b in self._handedness]
+                                 for a in handedness])
+            cost = cost + mismatch * self.handedness_penalty
+            cost[cost > self.max_distance] = np.inf
+
+            # 贪心匹配：每次取全局最小代价的一对
+            for _ in range(min(n, len(self._ids))):
+                flat = int(np.argmin(cost))
+                i, j = divmod(flat, cost.shape[1])
+                if not np.isfinite(cost[i, j]):
+                    break
+                assigned[i] = self._ids[j]
+                matched[j] = True
+                cost[i, :] = np.inf
+                cost[:, j] = np.inf
+
+        # 更新已匹配的轨迹
+        index_of = {track_id: j for j, track_id in enumerate(self._ids)}
+        for i, track_id in enumerate(assigned):
+            if track_id is not None:
+                j = index_of[track_id]
+                self._wrists[j] = wrists[i]
+                if handedness[i] is not None:
+                    self._handedness[j] = handedness[i]
+        self._missed[matched] = 0
+        self._missed[~matched] += 1
+        self._age += 1
+
+        # 删除长期未出现的轨迹
+        keep = self._missed <= self.max_missed
+        if not keep.all():
+            self._ids = [t for t, k in zip(self._ids, keep) if k]
+            self._handedness = [h for h, k in zip(self._handedness, keep) if k]
+            self._wrists = self._wrists[keep]
+            self._missed = self._missed[keep]
+            self._age = self._age[keep]
+
+        # 未匹配的手建立新轨迹
+        for i in range(n):
+            if assigned[i] is None and len(self._ids) < self.max_tracks:
+                assigned[i] = self._next_id
+                self._next_id += 1
+                self._ids.append(assigned[i])
+                self._handedness.append(handedness[i])
+                self._wrists = np.vstack([self._wrists, wrists[i:i + 1]])
+                self._missed = np.append(self._missed, 0)
+                self._age = np.append(self._age, 0)
+
+        return assigned
+
+    def reset(self):
+        """清空所有轨迹"""
+        self.__init__(self.max_tracks, self.max_distance, self.handedness_penalty, self.max_missed)
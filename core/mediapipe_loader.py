@@ -0,0 +1,61 @@
+"""
+MediaPipe 延迟加载 - 第一次创建检测器时才导入，进程内只导入一次
+
+导入 mediapipe 本身就要数秒，放到模块顶层会拖慢 `streamlit run` 的启动和每次重载；
+这里记录导入耗时和失败原因，供启动耗时统计和界面提示使用。
+"""
+import threading
+import time
+
+_lock = threading.Lock()
+_state = {
+    'loaded': False,   # 是否已尝试导入
+    'module': None,    # 导入成功的 mediapipe 模块
+    'error': "",       # 导入失败原因
+    'seconds': 0.0,    # 导入耗时
+}
+
+
+def load_mediapipe():
+    """
+    导入 mediapipe 并确认 solutions 可用（只在第一次调用时真正导入）
+
+    Returns:
+        mediapipe 模块，不可用时返回None
+    """
+    if _state['loaded']:
+        return _state['module']
+
+    with _lock:
+        if not _state['loaded']:
+            start = time.perf_counter()
+            try:
+                import mediapipe as mp
+                # 测试 solutions 是否可用
+                _ = mp.solutions.hands
+                _ = mp.solutions.pose
+                _state['module'] = mp
+            except ImportError as e:
+                _state['error'] = f"Import: {str(e)[:50]}"
+            except AttributeError as e:
+                _state['error'] = f"Attr: {str(e)[:50]}"
+            except Exception as e:
+                _state['error'] = f"Other: {str(e)[:50]}"
+            _state['seconds'] = time.perf_counter() - start
+            _state['loaded'] = True
+    return _state['module']
+
+
+def mediapipe_available():
+    """mediapipe 是否可用（未导入时会触发导入）"""
+    return load_mediapipe() is not None
+
+
+def mediapipe_error():
+    """导入失败原因，成功或尚未导入时为空字符串"""
+    return _state['error']
+
+
+def import_seconds():
+    """导入耗时（秒），尚未导入时为 0"""
+    return _state['seconds']
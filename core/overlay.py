@@ -0,0 +1,193 @@
+"""
+叠加绘制模块 - 骨骼与HUD信息的缓存化绘制
+
+- 骨骼直接从关键点数组绘制，所有连线一次 cv2.polylines 完成
+- 文字预先渲染成小图块并缓存，HUD 在独立的小区域内合成后一次性混合到画面上
+- enabled=False 时完全跳过绘制，供无界面分析使用
+"""
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import landmarks_to_array
+
+# 手部骨骼：每根手指一条折线，外加掌根横线
+HAND_CHAINS = [
+    [0, 1, 2, 3, 4],
+    [0, 5, 6, 7, 8],
+    [9, 10, 11, 12],
+    [13, 14, 15, 16],
+    [0, 17, 18, 19, 20],
+    [5, 9, 13, 17],
+]
+
+# 身体骨骼连线（与 MediaPipe POSE_CONNECTIONS 一致）
+POSE_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+], dtype=np.intp)
+
+# 绘制样式 (BGR)
+HAND_LINE_COLOR = (224, 224, 224)
+HAND_POINT_COLOR = (48, 48, 255)
+POSE_LINE_COLOR = (245, 117, 66)
+POSE_POINT_COLOR = (66, 245, 230)
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class OverlayRenderer:
+    """叠加信息渲染器"""
+
+    def __init__(self, enabled=True, hud_size=(260, 215), hud_alpha=0.35, text_cache_size=256):
+        """
+        Args:
+            enabled: 是否绘制
+            hud_size: HUD 区域大小 (宽, 高)
+            hud_alpha: HUD 背景的不透明度
+            text_cache_size: 文字图块缓存条数
+        """
+        self.enabled = enabled
+        self.hud_size = hud_size
+        self.hud_alpha = hud_alpha
+        self.text_cache_size = text_cache_size
+
+        w, h = hud_size
+        self._hud = np.zeros((h, w, 3), dtype=np.uint8)
+        self._hud_background = np.zeros((h, w, 3), dtype=np.uint8)
+        self._text_cache = OrderedDict()
+
+    # ---- 骨骼 ----
+
+    def draw_hands(self, img, hands_data):
+        """
+        绘制所有手部骨骼
+
+        Args:
+            img: BGR图像（原地绘制）
+            hands_data: HandDetector.get_all_hands() 格式的列表
+        """
+        if not self.enabled or not hands_data:
+            return
+        h, w = img.shape[:2]
+        scale = np.array([w, h], dtype=np.float32)
+
+        lines = []
+        points_px = []
+        for hand in hands_data:
+            pixels = (landmarks_to_array(hand['landmarks'])[:, :2] * scale).astype(np.int32)
+            lines.extend(pixels[chain] for chain in HAND_CHAINS)
+            points_px.append(pixels)
+
+        cv2.polylines(img, lines, False, HAND_LINE_COLOR, 2, cv2.LINE_AA)
+        for pixels in points_px:
+            for x, y in pixels:
+                cv2.circle(img, (int(x), int(y)), 3, HAND_POINT_COLOR, -1, cv2.LINE_AA)
+
+    def draw_pose(self, img, pose_landmarks, min_visibility=0.5):
+        """
+        绘制身体骨骼
+
+        Args:
+            img: BGR图像（原地绘制）
+            pose_landmarks: 姿态关键点列表，为None时不绘制
+            min_visibility: 低于该可见度的关键点不绘制
+        """
+        if not self.enabled or pose_landmarks is None:
+            return
+        h, w = img.shape[:2]
+        points = landmarks_to_array(pose_landmarks)
+        pixels = (points[:, :2] * np.array([w, h], dtype=np.float32)).astype(np.int32)
+
+        if isinstance(pose_landmarks, np.ndarray):
+            visible = np.ones(len(points), dtype=bool)
+        else:
+            visible = np.fromiter((lm.visibility for lm in pose_landmarks), dtype=np.float32,
+                                  count=len(points)) >= min_visibility
+
+        connections = POSE_CONNECTIONS[visible[POSE_CONNECTIONS[:, 0]] & visible[POSE_CONNECTIONS[:, 1]]]
+        if len(connections):
+            cv2.polylines(img, list(pixels[connections]), False, POSE_LINE_COLOR, 2, cv2.LINE_AA)
+        for x, y in pixels[visible]:
+            cv2.circle(img, (int(x), int(y)), 3, POSE_POINT_COLOR, -1, cv2.LINE_AA)
+
+    # ---- HUD ----
+
+    def draw_hud(self, img, lines, origin=(0, 0)):
+        """
+        绘制 HUD 文字
+
+        静态标签（如 "Score: "）与变化的数值分别渲染成图块缓存，
+        标签只渲染一次，数值按内容缓存。
+
+        Args:
+            img: BGR图像（原地绘制）
+            lines: [(标签, 数值文字, y, 字号, 颜色), ...]，y 为相对 HUD 顶部的基线位置
+            origin: HUD 在画面中的左上角位置
+        """
+        if not self.enabled or not lines:
+            return
+        hud_w, hud_h = self.hud_size
+        x0, y0 = origin
+        x1, y1 = min(x0 + hud_w, img.shape[1]), min(y0 + hud_h, img.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        hud = self._hud
+        hud.fill(0)
+        for label, value, y, scale, color in lines:
+            x = 10
+            for text in (label, value):
+                if not text:
+                    continue
+                sprite, mask = self._text_sprite(text, scale, color)
+                self._blit(hud, sprite, mask, x, y - sprite.shape[0] + 4)
+                x += sprite.shape[1] - 4
+
+        roi = img[y0:y1, x0:x1]
+        region = hud[:y1 - y0, :x1 - x0]
+        # 半透明背景一次混合，文字像素一次拷贝
+        cv2.addWeighted(roi, 1 - self.hud_alpha, self._hud_background[:y1 - y0, :x1 - x0],
+                        self.hud_alpha, 0, dst=roi)
+        np.copyto(roi, region, where=region.any(axis=2, keepdims=True))
+
+    def _text_sprite(self, text, scale, color, thickness=2):
+        """获取（必要时渲染）文字图块，LRU 缓存"""
+        key = (text, scale, color, thickness)
+        cached = self._text_cache.get(key)
+        if cached is not None:
+            self._text_cache.move_to_end(key)
+            return cached
+
+        (tw, th), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        sprite = np.zeros((th + baseline + 4, tw + 4, 3), dtype=np.uint8)
+        cv2.putText(sprite, text, (2, th + 2), FONT, scale, color, thickness, cv2.LINE_AA)
+        mask = sprite.any(axis=2)
+        cached = (sprite, mask)
+
+        self._text_cache[key] = cached
+        if len(self._text_cache) > self.text_cache_size:
+            self._text_cache.popitem(last=False)
+        return cached
+
+    @staticmethod
+    def _blit(dst, sprite, mask, x, y):
+        """把文字图块按掩码贴到目标图像上（自动裁剪越界部分）"""
+        h, w = sprite.shape[:2]
+        dx0, dy0 = max(x, 0), max(y, 0)
+        dx1, dy1 = min(x + w, dst.shape[1]), min(y + h, dst.shape[0])
+        if dx1 <= dx0 or dy1 <= dy0:
+            return
+        sx0, sy0 = dx0 - x, dy0 - y
+        sub_mask = mask[sy0:sy0 + dy1 - dy0, sx0:sx0 + dx1 - dx0]
+        np.copyto(dst[dy0:dy1, dx0:dx1], sprite[sy0:sy0 + dy1 - dy0, sx0:sx0 + dx1 - dx0],
+                  where=sub_mask[..., None])
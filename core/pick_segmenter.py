@@ -0,0 +1,323 @@
+"""
+采摘动作分段 - 把逐帧特征流切分为 靠近 → 捏取 → 上提 → 释放 四个阶段的采摘事件
+
+- 所有判断都基于帧时间戳：平滑按时间常数换算系数，阈值穿越时刻按相邻两帧线性插值，
+  最短捏取时长、最短间隔都以秒为单位，帧率变化时计数不受影响
+- 捏取后短暂张开又合上（抖动）回到原阶段，不会重复计数
+- 两帧间隔超过 max_gap（手离开画面）时放弃进行中的动作，不会把空白插值成一次释放
+- 最近的特征保存在预分配的环形窗口中，每帧只做常数次运算
+"""
+import math
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+PHASES = ('approach', 'pinch', 'lift', 'release')
+
+# 事件总体质量中各阶段的权重
+PHASE_WEIGHTS = {'approach': 0.2, 'pinch': 0.35, 'lift': 0.25, 'release': 0.2}
+
+
+@dataclass(frozen=True)
+class PhaseSpan:
+    """一个阶段的时间范围与质量（0~1）"""
+    start: float
+    end: float
+    quality: float
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+@dataclass(frozen=True)
+class PickEvent:
+    """一次完整的采摘"""
+    index: int
+    start: float
+    end: float
+    phases: dict = field(default_factory=dict)
+    quality: float = 0.0
+    lifted: bool = False
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class PickSegmenter:
+    """流式采摘分段器"""
+
+    def __init__(self,
+                 pinch_threshold=0.05,
+                 release_threshold=0.08,
+                 smoothing_tau=0.03,
+                 min_hold=0.04,
+                 min_gap=0.1,
+                 lift_threshold=0.01,
+                 still_speed=0.05,
+                 window=32,
+                 velocity_lag=4,
+                 max_events=50,
+                 max_gap=0.5):
+        """
+        初始化分段器
+
+        Args:
+            pinch_threshold: 捏取距离低于该值进入捏取
+            release_threshold: 捏取距离高于该值完成释放
+            smoothing_tau: 捏取距离平滑的时间常数（秒），与帧率无关
+            min_hold: 最短捏取时长（秒），更短的视为抖动
+            min_gap: 一次释放后到下一次捏取的最短间隔（秒）
+            lift_threshold: 捏住后手腕上移超过该值（归一化坐标）视为上提
+            still_speed: 手腕速度低于该值视为静止，靠近阶段从最后一次由静止转为运动时开始
+            window: 特征窗口帧数
+            velocity_lag: 计算手腕速度时向前回看的帧数
+            max_events: 保留的最近事件数
+            max_gap: 两帧间隔超过该值（秒）时视为手曾离开画面，放弃进行中的动作
+        """
+        self.pinch_threshold = pinch_threshold
+        self.release_threshold = release_threshold
+        self.smoothing_tau = smoothing_tau
+        self.min_hold = min_hold
+        self.min_gap = min_gap
+        self.lift_threshold = lift_threshold
+        self.still_speed = still_speed
+        self.velocity_lag = velocity_lag
+        self.max_gap = max_gap
+
+        # 特征窗口：时间戳、平滑后的捏取距离、手腕 x/y
+        self.window = window
+        self._t = np.zeros(window)
+        self._features = np.zeros((window, 3))
+        self.events = deque(maxlen=max_events)
+        self.reset()
+
+    def reset(self):
+        """清空窗口、状态和事件"""
+        self._head = 0
+        self._filled = 0
+        self.phase = 'idle'
+        self.event_count = 0
+        self.events.clear()
+        self._quality_sum = 0.0
+        self._last_event_end = -math.inf
+        self._begin_approach(None, None, None)
+
+    @property
+    def holding(self):
+        """是否处于捏住（捏取或上提）阶段"""
+        return self.phase in ('pinch', 'lift')
+
+    @property
+    def mean_quality(self):
+        """所有事件的平均质量"""
+        return self._quality_sum / self.event_count if self.event_count else 0.0
+
+    def recent(self, n=None):
+        """
+        窗口中最近的特征（按时间顺序）
+
+        Returns:
+            (时间戳 (n,), 特征 (n, 3))，特征列为平滑捏取距离、手腕 x、手腕 y
+        """
+        n = self._filled if n is None else min(n, self._filled)
+        idx = (self._head - n + np.arange(n)) % self.window
+        return self._t[idx], self._features[idx]
+
+    def update(self, timestamp, pinch_distance, wrist):
+        """
+        输入一帧
+
+        Args:
+            timestamp: 帧时间戳（秒）
+            pinch_distance: 原始捏取距离
+            wrist: 手腕位置 (x, y)
+
+        Returns:
+            本帧完成的 PickEvent，没有则为None
+        """
+        x, y = float(wrist[0]), float(wrist[1])
+        if self._filled and timestamp - self._t[(self._head - 1) % self.window] > self.max_gap:
+            self.lost()
+        if self._filled:
+            prev = (self._head - 1) % self.window
+            t0 = self._t[prev]
+            d0, x0, y0 = self._features[prev]
+            dt = timestamp - t0
+            if dt <= 0:  # 重复或乱序的时间戳
+                return None
+            # 按时间常数换算平滑系数，帧率变化时平滑效果不变
+            alpha = 1.0 - math.exp(-dt / self.smoothing_tau) if self.smoothing_tau > 0 else 1.0
+            d = d0 + alpha * (pinch_distance - d0)
+        else:
+            t0, d0, x0, y0 = timestamp, pinch_distance, x, y
+            d = pinch_distance
+
+        # 写入窗口
+        head = self._head
+        self._t[head] = timestamp
+        self._features[head] = (d, x, y)
+        self._head = (head + 1) % self.window
+        self._filled = min(self._filled + 1, self.window)
+
+        event = None
+        phase = self.phase
+        if phase == 'idle':
+            self._track_approach(timestamp, x, y, x0, y0)
+            if d < self.pinch_threshold and timestamp - self._last_event_end >= self.min_gap:
+                self._begin_pinch(self._crossing(t0, d0, timestamp, d, self.pinch_threshold), d, x, y)
+        elif phase in ('pinch', 'lift'):
+            self._min_pinch = min(self._min_pinch, d)
+            self._top_y = min(self._top_y, y)
+            if phase == 'pinch' and self._pinch_y - y > self.lift_threshold:
+                self.phase = 'lift'
+                self._lift_start = timestamp
+            if d > self.pinch_threshold:
+                self._release_start = self._crossing(t0, d0, timestamp, d, self.pinch_threshold)
+                self._held_phase = self.phase
+                self.phase = 'release'
+                # 快速采摘可能在一帧之内完成释放
+                if d > self.release_threshold:
+                    event = self._finish(self._crossing(t0, d0, timestamp, d, self.release_threshold), x, y)
+        elif phase == 'release':
+            if d < self.pinch_threshold:
+                # 没有完全张开又捏紧：抖动，回到原阶段
+                self.phase = self._held_phase
+                self._release_start = None
+            elif d > self.release_threshold:
+                event = self._finish(self._crossing(t0, d0, timestamp, d, self.release_threshold), x, y)
+        return event
+
+    def lost(self):
+        """手离开画面：放弃进行中的动作"""
+        self.phase = 'idle'
+        self._filled = 0
+        self._begin_approach(None, None, None)
+
+    @staticmethod
+    def _crossing(t0, d0, t1, d1, threshold):
+        """线性插值估计穿越阈值的时刻"""
+        if d1 == d0:
+            return t1
+        ratio = (threshold - d0) / (d1 - d0)
+        return t0 + min(max(ratio, 0.0), 1.0) * (t1 - t0)
+
+    def _begin_approach(self, timestamp, x, y):
+        self._approach_start = timestamp
+        self._approach_origin = (x, y)
+        self._approach_path = 0.0
+        self._rest = None  # 最近一个静止帧 (timestamp, x, y)，手开始运动时作为靠近阶段的起点
+
+    def _track_approach(self, timestamp, x, y, x0, y0):
+        """靠近阶段：从最后一次由静止转为运动的时刻开始累计手腕路径（运动后停顿再捏取不会清零）"""
+        if self._approach_start is None:
+            self._begin_approach(timestamp, x, y)
+            return
+        lag = min(self.velocity_lag, self._filled - 1)
+        if lag > 0:
+            back = (self._head - 1 - lag) % self.window
+            dt = timestamp - self._t[back]
+            speed = math.hypot(x - self._features[back, 1], y - self._features[back, 2]) / dt if dt > 0 else 0.0
+            if speed < self.still_speed:
+                self._rest = (timestamp, x, y)
+                return
+        if self._rest is not None:
+            self._begin_approach(*self._rest)
+        self._approach_path += math.hypot(x - x0, y - y0)
+
+    def _begin_pinch(self, start, d, x, y):
+        self.phase = 'pinch'
+        self._pinch_start = start
+        self._pinch_y = y
+        self._top_y = y
+        self._min_pinch = d
+        self._lift_start = None
+        self._release_start = None
+
+        # 靠近阶段质量：路径越直越好
+        ox, oy = self._approach_origin
+        path = self._approach_path
+        if ox is None or path < 1e-3:
+            straightness = 1.0
+        else:
+            straightness = min(math.hypot(x - ox, y - oy) / path, 1.0)
+        approach_start = self._approach_start if self._approach_start is not None else start
+        self._approach = PhaseSpan(min(approach_start, start), start, straightness)
+
+    def _finish(self, end, x, y):
+        """释放完成：生成事件（捏取过短视为抖动，不计数）"""
+        self.phase = 'idle'
+        self._begin_approach(end, x, y)
+        release_start = self._release_start
+        if release_start - self._pinch_start < self.min_hold:
+            return None
+
+        pinch_end = self._lift_start if self._lift_start is not None else release_start
+        tightness = min(max((self.pinch_threshold - self._min_pinch) / (self.pinch_threshold * 0.6), 0.0), 1.0)
+        rise = self._pinch_y - self._top_y
+        lift_quality = min(max(rise / (self.lift_threshold * 3), 0.0), 1.0)
+        release_quality = min(max(1.0 - (end - release_start - 0.1) / 0.4, 0.0), 1.0)
+
+        phases = {
+            'approach': self._approach,
+            'pinch': PhaseSpan(self._pinch_start, pinch_end, tightness),
+            'lift': PhaseSpan(pinch_end, release_start, lift_quality),
+            'release': PhaseSpan(release_start, end, release_quality),
+        }
+        quality = sum(PHASE_WEIGHTS[name] * span.quality for name, span in phases.items())
+
+        event = PickEvent(
+            index=self.event_count,
+            start=self._approach.start,
+            end=end,
+            phases=phases,
+            quality=quality,
+            lifted=self._lift_start is not None,
+        )
+        self.event_count += 1
+        self._quality_sum += quality
+        self._last_event_end = end
+        self.events.append(event)
+        return event
+
+
+def segment_frames(timestamps, pinch_distances, wrists, **options):
+    """
+    对整段序列分段，同时给出逐帧的捏住状态（回放批量评分使用）
+
+    Args:
+        timestamps: (N,) 时间戳
+        pinch_distances: (N,) 原始捏取距离
+        wrists: (N, 2) 手腕位置
+        **options: PickSegmenter 参数
+
+    Returns:
+        (PickEvent 列表, (N,) 布尔数组)，后者与实时分析中每帧的 holding 一致
+    """
+    segmenter = PickSegmenter(**options)
+    events = []
+    holding = np.zeros(len(timestamps), dtype=bool)
+    for i, (t, d, w) in enumerate(zip(timestamps, pinch_distances, wrists)):
+        event = segmenter.update(float(t), float(d), w)
+        if event is not None:
+            events.append(event)
+        holding[i] = segmenter.holding
+    return events, holding
+
+
+def segment_picks(timestamps, pinch_distances, wrists, **options):
+    """
+    对整段序列分段（回放、离线分析使用）
+
+    Args:
+        timestamps: (N,) 时间戳
+        pinch_distances: (N,) 原始捏取距离
+        wrists: (N, 2) 手腕位置
+        **options: PickSegmenter 参数
+
+    Returns:
+        PickEvent 列表
+    """
+    return segment_frames(timestamps, pinch_distances, wrists, **options)[0]
@@ -0,0 +1,119 @@
+"""
+推理流水线模块 - 解码与推理解耦，姿态/手部检测并行执行
+"""
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class InferencePipeline:
+    """
+    多线程推理流水线
+
+    回调线程只负责把解码好的帧放入有界队列并取回最近一次的处理结果，
+    推理在后台线程中进行。队列满时丢弃最旧的帧，保证延迟不会累积。
+    """
+
+    def __init__(self, process_fn, max_queue=2, num_workers=2):
+        """
+        初始化流水线
+
+        Args:
+            process_fn: 处理单帧的函数，输入原始帧，返回处理结果
+            max_queue: 待处理队列长度上限
+            num_workers: 并行执行检测任务的线程数
+        """
+        self.process_fn = process_fn
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=num_workers,
+                                           thread_name_prefix="inference")
+
+        self._queue = deque(maxlen=max_queue)
+        self._cond = threading.Condition()
+        self._latest = None
+        self._running = False
+        self._thread = None
+
+        # 统计
+        self.submitted_frames = 0
+        self.processed_frames = 0
+        self.dropped_frames = 0
+        self.failed_frames = 0
+
+    def start(self):
+        """启动后台推理线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并释放线程池"""
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.executor.shutdown(wait=False)
+
+    @property
+    def running(self):
+        """流水线是否在运行"""
+        return self._running
+
+    def submit(self, frame):
+        """
+        提交一帧待处理（不阻塞）
+
+        Args:
+            frame: 解码后的原始帧
+        """
+        with self._cond:
+            if len(self._queue) == self.max_queue:
+                # deque 设置了 maxlen，追加时会自动挤掉最旧的帧
+                self.dropped_frames += 1
+            self._queue.append(frame)
+            self.submitted_frames += 1
+            self._cond.notify()
+
+    def latest(self):
+        """获取最近一次处理完成的结果，尚无结果时返回None"""
+        return self._latest
+
+    def run_parallel(self, *tasks):
+        """
+        在线程池中并行执行多个无参任务
+
+        Args:
+            tasks: 可调用对象
+
+        Returns:
+            各任务的返回值列表（顺序与输入一致）
+        """
+        futures = [self.executor.submit(task) for task in tasks]
+        return [future.result() for future in futures]
+
+    def _run(self):
+        """后台推理循环"""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame = self._queue.popleft()
+
+            try:
+                self._latest = self.process_fn(frame)
+                self.processed_frames += 1
+            except Exception:
+                # 单帧处理失败不应终止流水线：计数，只记录第一次的堆栈，避免每帧刷屏
+                self.failed_frames += 1
+                if self.failed_frames == 1:
+                    logger.exception("推理流水线处理帧失败，后续失败只计数")
@@ -1,22 +1,21 @@
 """
 姿态检测模块 - 使用MediaPipe Pose（云端兼容版）
 """
-import cv2
+import sys
+import os
 
-MEDIAPIPE_AVAILABLE = False
-mp = None
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    import mediapipe as mp
-    # 测试 solutions 是否可用
-    _ = mp.solutions.pose
-    MEDIAPIPE_AVAILABLE = True
-except (ImportError, AttributeError):
-    MEDIAPIPE_AVAILABLE = False
+from core.frame_context import FrameContext, get_rgb
+from core.mediapipe_loader import load_mediapipe
+from core.detector_backend import PoseBackend
 
 
-class PoseDetector:
-    """身体姿态检测器"""
+class PoseDetector(PoseBackend):
+    """身体姿态检测器（MediaPipe 后端）"""
+
+    name = 'mediapipe'
 
     def __init__(self,
                  static_image_mode=False,
@@ -33,12 +32,16 @@ class PoseDetector:
             min_tracking_confidence: 最小跟踪置信度
         """
         self.results = None
+        self.frame_shape = None
+        self.model_complexity = model_complexity
         self.mp_pose = None
         self.mp_draw = None
         self.mp_drawing_styles = None
         self.pose = None
 
-        if MEDIAPIPE_AVAILABLE:
+        # 延迟导入：第一次创建检测器时才加载 mediapipe
+        mp = load_mediapipe()
+        if mp is not None:
             try:
                 self.mp_pose = mp.solutions.pose
                 self.mp_draw = mp.solutions.drawing_utils
@@ -61,20 +64,22 @@ class PoseDetector:
         检测图像中的人体姿态
 
         Args:
-            frame: BGR格式的图像
+            frame: BGR格式的图像，或已完成翻转/颜色转换的 FrameContext
 
         Returns:
-            处理后的图像
+            处理后的图像（BGR）
         """
-        if not MEDIAPIPE_AVAILABLE or self.pose is None:
-            return frame
-        # 转换颜色空间
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        bgr_frame = frame.bgr if isinstance(frame, FrameContext) else frame
+        if self.pose is None:
+            return bgr_frame
+        # 颜色空间转换由 FrameContext 统一完成（传入普通图像时在此转换）
+        rgb_frame = get_rgb(frame)
+        self.frame_shape = rgb_frame.shape
 
         # 进行检测
         self.results = self.pose.process(rgb_frame)
 
-        return frame
+        return bgr_frame
 
     def draw_landmarks(self, frame, draw_connections=True):
         """
@@ -87,7 +92,7 @@ class PoseDetector:
         Returns:
             绘制后的图像
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_pose is None:
             return frame
         if self.results and self.results.pose_landmarks:
             self.mp_draw.draw_landmarks(
@@ -105,7 +110,7 @@ class PoseDetector:
         Returns:
             关键点列表，如果没有检测到则返回None
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_pose is None:
             return None
         if self.results and self.results.pose_landmarks:
             return self.results.pose_landmarks.landmark
@@ -121,7 +126,7 @@ class PoseDetector:
         Returns:
             关键点对象，如果没有找到则返回None
         """
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_pose is None:
             return None
         landmarks = self.get_landmarks()
         if landmarks is None:
@@ -133,12 +138,58 @@ class PoseDetector:
         except (KeyError, IndexError):
             return None
 
+    def get_hand_regions(self, min_visibility=0.5, padding=1.6):
+        """
+        根据手肘和手腕位置估计手部所在的区域，供 HandDetector 的 ROI 模式使用
+
+        Args:
+            min_visibility: 手腕/手肘的最小可见度
+            padding: 裁剪框边长相对前臂长度的倍数
+
+        Returns:
+            区域列表，每项为 (wrist_idx, cx, cy, size)：wrist_idx 为姿态手腕关键点索引（15 左臂 / 16 右臂），
+            其余为归一化坐标，size 以画面宽度为单位
+        """
+        landmarks = self.get_landmarks()
+        if landmarks is None or self.frame_shape is None:
+            return []
+
+        h, w = self.frame_shape[:2]
+        aspect = h / w
+        regions = []
+        # (手肘, 手腕): 左臂 13/15，右臂 14/16
+        for elbow_idx, wrist_idx in ((13, 15), (14, 16)):
+            elbow = landmarks[elbow_idx]
+            wrist = landmarks[wrist_idx]
+            if wrist.visibility < min_visibility or elbow.visibility < min_visibility:
+                continue
+
+            # 前臂长度（以画面宽度为单位）
+            dx = wrist.x - elbow.x
+            dy = (wrist.y - elbow.y) * aspect
+            forearm = (dx ** 2 + dy ** 2) ** 0.5
+            if forearm < 1e-3:
+                continue
+
+            # 手掌沿前臂方向延伸，框中心向指尖方向偏移
+            cx = wrist.x + (wrist.x - elbow.x) * 0.35
+            cy = wrist.y + (wrist.y - elbow.y) * 0.35
+            regions.append((wrist_idx, cx, cy, forearm * padding))
+        return regions
+
     def is_detected(self):
         """检查是否检测到人体"""
-        if not MEDIAPIPE_AVAILABLE:
+        if self.mp_pose is None:
             return False
         return self.results is not None and self.results.pose_landmarks is not None
 
+    def reset(self):
+        """清除上一段视频的检测结果和跟踪状态（检测器被复用时调用）"""
+        self.results = None
+        self.frame_shape = None
+        if self.pose is not None and hasattr(self.pose, 'reset'):
+            self.pose.reset()
+
     def release(self):
         """释放资源"""
         if self.pose:
@@ -0,0 +1,251 @@
+"""
+手势嵌入与近邻索引 - 用标注过的好/坏采摘手势代替手写阈值判断手型
+
+每只手的 21 个关键点转换为与位置、大小、旋转无关的嵌入向量：
+以手腕为原点、除以手掌长度、旋转到手腕→中指根朝上、左手镜像为右手。
+索引把所有样本的嵌入存放在一个连续数组中，查询时用一次矩阵乘法算出到全部样本的距离，
+再取 k 个近邻按距离加权投票；批量查询同样只需一次矩阵乘法。
+索引以 .npy 文件保存，载入时内存映射，不需要读入整个文件。
+
+用法:
+    python -m core.pose_index build --good data/sessions/专家* --bad data/sessions/新手* -o data/pose_index
+    python -m core.pose_index classify data/sessions/session_xxx
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import WRIST, MIDDLE_FINGER_MCP
+
+POSE_INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'pose_index')
+
+GOOD, BAD = 1, 0
+EMBEDDING_DIM = 20 * 3
+
+
+def hand_embedding(points, handedness=None):
+    """
+    手部关键点的归一化嵌入
+
+    Args:
+        points: (..., 21, 3) 关键点数组
+        handedness: 'Left' 时镜像为右手；批量时可传与批次维度一致的字符串数组
+
+    Returns:
+        (..., 60) float32 嵌入（手腕之外 20 个点的归一化坐标）
+    """
+    p = np.asarray(points, dtype=np.float32)
+    p = p - p[..., WRIST:WRIST + 1, :]
+
+    if handedness is not None:
+        left = np.asarray(handedness) == 'Left'
+        p[..., 0] = np.where(left[..., None], -p[..., 0], p[..., 0])
+
+    # 旋转（绕 z 轴）使手腕→中指根指向 -y，并除以手掌长度
+    axis = p[..., MIDDLE_FINGER_MCP, :2]
+    palm = np.maximum(np.linalg.norm(axis, axis=-1), 1e-6)
+    c = -axis[..., 1] / palm
+    s = -axis[..., 0] / palm
+    x, y = p[..., 0], p[..., 1]
+    rotated = np.stack([c[..., None] * x - s[..., None] * y,
+                        s[..., None] * x + c[..., None] * y,
+                        p[..., 2]], axis=-1)
+    rotated /= palm[..., None, None]
+    return rotated[..., 1:, :].reshape(*rotated.shape[:-2], EMBEDDING_DIM)
+
+
+class PoseIndex:
+    """好/坏手势的近邻索引"""
+
+    def __init__(self, embeddings=None, labels=None, k=7, norms=None):
+        """
+        Args:
+            embeddings: (N, 60) 嵌入数组
+            labels: (N,) 标签（GOOD / BAD）
+            k: 投票的近邻数
+            norms: (N,) 嵌入的平方范数，不提供时计算
+        """
+        self.k = k
+        if embeddings is None:
+            embeddings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+            labels = np.empty(0, dtype=np.int8)
+        self.embeddings = embeddings
+        self.labels = labels
+        self.norms = norms if norms is not None else (np.asarray(embeddings, dtype=np.float32) ** 2).sum(axis=1)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, embeddings, labels):
+        """
+        追加样本
+
+        Args:
+            embeddings: (M, 60) 嵌入
+            labels: 标签，标量或 (M,) 数组
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        labels = np.broadcast_to(np.asarray(labels, dtype=np.int8), len(embeddings))
+        self.embeddings = np.concatenate([self.embeddings, embeddings])
+        self.labels = np.concatenate([self.labels, labels])
+        self.norms = np.concatenate([self.norms, (embeddings ** 2).sum(axis=1)])
+
+    def query(self, embeddings, k=None):
+        """
+        批量查询 k 个近邻
+
+        Args:
+            embeddings: (Q, 60) 或 (60,) 嵌入
+            k: 近邻数，默认 self.k
+
+        Returns:
+            (distances, indices)，形状均为 (Q, k)，按距离从近到远排列
+        """
+        q = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        k = min(k or self.k, len(self))
+        sq = (q ** 2).sum(axis=1)[:, None] + self.norms[None, :] - 2 * (q @ self.embeddings.T)
+        np.maximum(sq, 0, out=sq)
+        if k < len(self):
+            idx = np.argpartition(sq, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(len(self)), sq.shape).copy()
+        d = np.take_along_axis(sq, idx, axis=1)
+        order = np.argsort(d, axis=1)
+        return np.sqrt(np.take_along_axis(d, order, axis=1)), np.take_along_axis(idx, order, axis=1)
+
+    def good_probability(self, embeddings, k=None):
+        """
+        近邻按距离加权投票，得到“好手势”的概率
+
+        Args:
+            embeddings: (Q, 60) 或 (60,) 嵌入
+            k: 近邻数
+
+        Returns:
+            (Q,) 概率数组；索引为空时返回None
+        """
+        if len(self) == 0:
+            return None
+        distances, indices = self.query(embeddings, k)
+        weights = 1.0 / (distances + 1e-3)
+        good = (np.asarray(self.labels)[indices] == GOOD)
+        return (weights * good).sum(axis=1) / weights.sum(axis=1)
+
+    def classify(self, points, handedness=None, k=None):
+        """
+        判断一只手（或一批手）的手势
+
+        Args:
+            points: (21, 3) 或 (Q, 21, 3) 关键点
+            handedness: 左右手
+
+        Returns:
+            单只手时为概率标量，批量时为 (Q,) 数组；索引为空时返回None
+        """
+        probability = self.good_probability(hand_embedding(points, handedness), k)
+        if probability is None or np.ndim(points) == 3:
+            return probability
+        return float(probability[0])
+
+    def save(self, directory):
+        """保存为 .npy 文件（可内存映射载入）"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'embeddings.npy'), np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        np.save(os.path.join(directory, 'labels.npy'), np.asarray(self.labels, dtype=np.int8))
+        np.save(os.path.join(directory, 'norms.npy'), np.asarray(self.norms, dtype=np.float32))
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'count': len(self), 'dim': EMBEDDING_DIM, 'k': self.k,
+                       'good': int((np.asarray(self.labels) == GOOD).sum())}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        载入索引
+
+        Args:
+            directory: 索引目录
+            mmap: 是否内存映射（只读，启动时不读入整个文件）
+
+        Returns:
+            PoseIndex
+        """
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(directory, 'embeddings.npy'), mmap_mode=mode),
+                   np.load(os.path.join(directory, 'labels.npy'), mmap_mode=mode),
+                   k=meta.get('k', 7),
+                   norms=np.load(os.path.join(directory, 'norms.npy'), mmap_mode=mode))
+
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_pose_index(directory=POSE_INDEX_DIR):
+    """进程共享的手势索引，没有建立索引时返回None"""
+    global _index, _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            _index_loaded = True
+            if os.path.exists(os.path.join(directory, 'meta.json')):
+                _index = PoseIndex.load(directory)
+        return _index
+
+
+def _pick_embeddings(session_dirs, stride):
+    """录制会话中所有采摘动作的逐帧嵌入"""
+    from core.reference_motion import extract_picks
+
+    chunks = []
+    for directory in session_dirs:
+        for points, handedness, _ in extract_picks(directory):
+            chunks.append(hand_embedding(points[::stride], handedness))
+    return np.concatenate(chunks) if chunks else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="建立手势近邻索引，或用索引分析录制的会话")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="从标注好坏的会话建立索引")
+    build.add_argument('--good', nargs='+', required=True, help="动作规范的会话目录")
+    build.add_argument('--bad', nargs='+', default=[], help="动作不规范的会话目录")
+    build.add_argument('--stride', type=int, default=2, help="每隔几帧取一个样本")
+    build.add_argument('-o', '--output', default=POSE_INDEX_DIR, help="索引目录")
+    classify = sub.add_parser('classify', help="批量判断会话中每次采摘的手势")
+    classify.add_argument('sessions', nargs='+', help="会话目录")
+    classify.add_argument('--index', default=POSE_INDEX_DIR, help="索引目录")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        index = PoseIndex()
+        index.add(_pick_embeddings(args.good, args.stride), GOOD)
+        index.add(_pick_embeddings(args.bad, args.stride), BAD)
+        if len(index) == 0:
+            parser.error("会话中没有检测到完整的采摘动作")
+        index.save(args.output)
+        print(f"已建立索引: {len(index)} 个样本 -> {args.output}")
+        return
+
+    from core.reference_motion import extract_picks
+
+    index = PoseIndex.load(args.index)
+    for directory in args.sessions:
+        picks = extract_picks(directory)
+        print(f"{directory}: {len(picks)} 次采摘")
+        for k, (points, handedness, timestamps) in enumerate(picks, 1):
+            probability = index.classify(points, handedness)
+            print(f"  #{k:03d} {timestamps[0]:8.2f}s  规范帧比例 {float((probability >= 0.5).mean()):.0%}"
+                  f"  平均 {float(probability.mean()):.2f}")
+
+
+if __name__ == '__main__':
+    main()
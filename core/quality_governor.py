@@ -0,0 +1,158 @@
+"""
+画质调节模块 - 根据实测的单帧处理耗时调整推理分辨率和模型复杂度
+
+质量档位从低到高排列，处理耗时持续超出预算时降一档，持续有充足余量时升一档。
+防止来回振荡：
+- 降档与升档使用不同的阈值，中间留出不动区
+- 每次切换后需要重新积累一个完整的观测窗口
+- 升档后很快又被迫降回的档位会被暂时封锁，封锁时间每次加倍
+"""
+from collections import deque
+
+
+# 质量档位（从低到高）：推理分辨率比例、姿态模型复杂度 (0/1/2)、手部模型复杂度 (0/1)
+QUALITY_LEVELS = (
+    {'scale': 0.5, 'pose_complexity': 0, 'hand_complexity': 0},
+    {'scale': 0.75, 'pose_complexity': 0, 'hand_complexity': 0},
+    {'scale': 0.75, 'pose_complexity': 1, 'hand_complexity': 0},
+    {'scale': 1.0, 'pose_complexity': 1, 'hand_complexity': 1},
+    {'scale': 1.0, 'pose_complexity': 2, 'hand_complexity': 1},
+)
+
+# 未启用自动调节时使用的档位（与原来的固定设置一致）
+DEFAULT_LEVEL = 3
+
+
+class QualityGovernor:
+    """画质调节器"""
+
+    def __init__(self,
+                 target_fps=20,
+                 levels=QUALITY_LEVELS,
+                 start_level=DEFAULT_LEVEL,
+                 window=30,
+                 downgrade_ratio=1.0,
+                 upgrade_ratio=0.6,
+                 probation=90,
+                 block_frames=300):
+        """
+        初始化调节器
+
+        Args:
+            target_fps: 目标处理帧率，单帧预算为 1 / target_fps
+            levels: 质量档位列表（从低到高）
+            start_level: 初始档位
+            window: 观测窗口帧数，窗口平均耗时用于判断
+            downgrade_ratio: 平均耗时超过 预算×该值 时降档
+            upgrade_ratio: 平均耗时低于 预算×该值 时升档
+            probation: 升档后该帧数内被迫降回，视为升档失败
+            block_frames: 升档失败后封锁该档位的初始帧数
+        """
+        self.target_fps = target_fps
+        self.levels = levels
+        self.window = window
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.probation = probation
+        self.block_frames = block_frames
+        self.start_level = start_level
+        self.reset()
+
+    def reset(self):
+        """回到初始档位并清空观测"""
+        self.level = self.start_level
+        self.changes = 0
+        self._samples = deque(maxlen=self.window)
+        self._sum = 0.0
+        self._frame = 0
+        self._upgraded_at = None
+        self._blocked_until = {}   # 档位 -> 解除封锁的帧序号
+        self._block_length = {}    # 档位 -> 下次封锁的帧数
+
+    @property
+    def budget(self):
+        """单帧处理预算（秒）"""
+        return 1.0 / self.target_fps
+
+    @property
+    def settings(self):
+        """当前档位的设置"""
+        return self.levels[self.level]
+
+    @property
+    def average(self):
+        """窗口内的平均处理耗时（秒），窗口为空时为None"""
+        return self._sum / len(self._samples) if self._samples else None
+
+    def record(self, frame_seconds):
+        """
+        记录一帧的处理耗时，必要时切换档位
+
+        Args:
+            frame_seconds: 该帧的处理耗时（秒）
+
+        Returns:
+            是否切换了档位
+        """
+        self._frame += 1
+        if len(self._samples) == self._samples.maxlen:
+            self._sum -= self._samples[0]
+        self._samples.append(frame_seconds)
+        self._sum += frame_seconds
+
+        if len(self._samples) < self.window:
+            return False
+
+        average = self._sum / len(self._samples)
+        if average > self.budget * self.downgrade_ratio and self.level > 0:
+            self._downgrade()
+            return True
+        if average < self.budget * self.upgrade_ratio and self._can_upgrade():
+            self._set_level(self.level + 1)
+            self._upgraded_at = self._frame
+            return True
+        return False
+
+    def _can_upgrade(self):
+        target = self.level + 1
+        return target < len(self.levels) and self._frame >= self._blocked_until.get(target, 0)
+
+    def _downgrade(self):
+        # 刚升上来就撑不住：封锁该档位，连续失败时封锁时间加倍
+        if self._upgraded_at is not None and self._frame - self._upgraded_at <= self.probation:
+            length = self._block_length.get(self.level, self.block_frames)
+            self._blocked_until[self.level] = self._frame + length
+            self._block_length[self.level] = length * 2
+        self._upgraded_at = None
+        self._set_level(self.level - 1)
+
+    def _set_level(self, level):
+        self.level = level
+        self.changes += 1
+        # 切换后重新积累观测窗口
+        self._samples.clear()
+        self._sum = 0.0
+
+    def state(self, timing=True):
+        """
+        当前状态，供统计展示
+
+        Args:
+            timing: 是否包含窗口平均耗时；推送到会话快照时不包含，
+                    否则每帧都变化，面板无法只在内容变化时刷新
+
+        Returns:
+            字典：quality_level、inference_scale、pose_complexity、hand_complexity、
+            quality_changes，timing 为 True 时另有 frame_ms（窗口平均耗时）
+        """
+        state = {
+            'quality_level': self.level,
+            'inference_scale': self.settings['scale'],
+            'pose_complexity': self.settings['pose_complexity'],
+            'hand_complexity': self.settings['hand_complexity'],
+            'quality_changes': self.changes,
+        }
+        if timing:
+            average = self.average
+            state['frame_ms'] = round(average * 1000, 1) if average is not None else None
+        return state
@@ -0,0 +1,268 @@
+"""
+动作录制模块（传承模式）- 按列存储逐帧关键点与评分
+
+会话目录结构:
+    <会话目录>/meta.json
+    <会话目录>/chunk_00000/<列名>.npy
+    <会话目录>/chunk_00001/<列名>.npy
+    ...
+
+每个分块写满后整体落盘且不再修改（只追加），读取时按列内存映射，不需要逐行解析。
+"""
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import landmarks_to_array
+
+POSE_LANDMARKS = 33
+HAND_LANDMARKS = 21
+
+# 左右手编码：0 表示该位置没有手
+HANDEDNESS_CODES = {None: 0, 'Left': 1, 'Right': 2}
+HANDEDNESS_NAMES = {code: name for name, code in HANDEDNESS_CODES.items()}
+
+
+def _column_specs(max_hands):
+    """各列的 (每行形状, 数据类型, 空值)"""
+    return {
+        'timestamp': ((), np.float64, np.nan),
+        'pose': ((POSE_LANDMARKS, 3), np.float32, np.nan),
+        'hands': ((max_hands, HAND_LANDMARKS, 3), np.float32, np.nan),
+        'hand_count': ((), np.int8, 0),
+        'handedness': ((max_hands,), np.int8, 0),
+        'pinch_distance': ((), np.float32, np.nan),
+        'hand_angle': ((), np.float32, np.nan),
+        'score': ((), np.float32, np.nan),
+    }
+
+
+class SessionRecorder:
+    """
+    会话录制器
+
+    append() 在视频回调线程中调用，只做关键点到数组的转换并放入队列；
+    分块缓冲、落盘都在后台写入线程中完成，磁盘IO不会阻塞视频处理。
+    """
+
+    def __init__(self, directory, chunk_size=900, max_hands=2, max_pending=3000):
+        """
+        初始化录制器
+
+        Args:
+            directory: 会话目录（不存在则创建）
+            chunk_size: 每个分块的帧数
+            max_hands: 每帧最多记录的手数
+            max_pending: 写入队列上限，超过时丢弃新帧而不是阻塞视频线程
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.max_hands = max_hands
+        self.specs = _column_specs(max_hands)
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.chunks_written = 0
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._buffers = self._new_buffers()
+        self._fill = 0
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._write_meta()
+
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def append(self, timestamp, pose_landmarks, hands_data, result=None):
+        """
+        追加一帧（不阻塞）
+
+        Args:
+            timestamp: 帧时间戳（秒）
+            pose_landmarks: 姿态关键点列表或数组，没有检测到时为None
+            hands_data: HandDetector.get_all_hands() 格式的列表
+            result: 主手的 analyze_hand() 结果，没有手时为None
+        """
+        if self._closed:
+            return
+
+        # 在回调线程中复制出数组，MediaPipe 结果对象会被下一帧复用
+        pose = None if pose_landmarks is None else landmarks_to_array(pose_landmarks).copy()
+        hands = [(landmarks_to_array(h['landmarks']).copy(), h['handedness'])
+                 for h in hands_data[:self.max_hands]]
+        scalars = None
+        if result is not None:
+            scalars = (result['pinch_distance'], result['hand_angle'], result['score'])
+
+        try:
+            self._queue.put_nowait((timestamp, pose, hands, len(hands_data), scalars))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def close(self):
+        """写出剩余数据并结束写入线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._write_meta()
+
+    def _new_buffers(self):
+        """预分配一个分块的列缓冲区"""
+        buffers = {}
+        for name, (shape, dtype, empty) in self.specs.items():
+            buffers[name] = np.full((self.chunk_size,) + shape, empty, dtype=dtype)
+        return buffers
+
+    def _run(self):
+        """后台写入循环"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._store(item)
+            if self._fill == self.chunk_size:
+                self._flush()
+        self._flush()
+
+    def _store(self, item):
+        """把一帧写入当前分块缓冲区"""
+        timestamp, pose, hands, hand_count, scalars = item
+        row = self._fill
+        b = self._buffers
+
+        b['timestamp'][row] = timestamp
+        if pose is not None:
+            b['pose'][row] = pose[:POSE_LANDMARKS]
+        for slot, (points, handedness) in enumerate(hands):
+            b['hands'][row, slot] = points[:HAND_LANDMARKS]
+            b['handedness'][row, slot] = HANDEDNESS_CODES.get(handedness, 0)
+        b['hand_count'][row] = hand_count
+        if scalars is not None:
+            b['pinch_distance'][row], b['hand_angle'][row], b['score'][row] = scalars
+
+        self._fill += 1
+
+    def _flush(self):
+        """把当前分块写入磁盘"""
+        if self._fill == 0:
+            return
+
+        chunk_dir = os.path.join(self.directory, f"chunk_{self.chunks_written:05d}")
+        tmp_dir = chunk_dir + '.tmp'
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name, buffer in self._buffers.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), buffer[:self._fill])
+        # 整个分块写完后再改名，读取方永远看不到写了一半的分块
+        if os.path.exists(chunk_dir):
+            shutil.rmtree(chunk_dir)
+        os.replace(tmp_dir, chunk_dir)
+
+        self.frames_written += self._fill
+        self.chunks_written += 1
+        self._fill = 0
+        self._buffers = self._new_buffers()
+
+    def _write_meta(self):
+        """写入会话元数据"""
+        meta = {
+            'version': 1,
+            'max_hands': self.max_hands,
+            'chunk_size': self.chunk_size,
+            'frames': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'chunks': self.chunks_written,
+            'updated': time.time(),
+        }
+        with open(os.path.join(self.directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+
+class SessionReader:
+    """会话读取器 - 按列内存映射读取录制的数据"""
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: 会话目录
+        """
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.chunk_dirs = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.startswith('chunk_') and not name.endswith('.tmp')
+        )
+
+    def __len__(self):
+        """总帧数"""
+        return sum(len(chunk['timestamp']) for chunk in self.iter_chunks(['timestamp']))
+
+    def iter_chunks(self, columns=None):
+        """
+        逐个分块读取（内存映射，不会把数据整体读入内存）
+
+        Args:
+            columns: 需要的列名列表，默认全部
+
+        Yields:
+            列名 -> 数组 的字典
+        """
+        names = columns or list(_column_specs(self.meta['max_hands']).keys())
+        for chunk_dir in self.chunk_dirs:
+            yield {name: np.load(os.path.join(chunk_dir, f"{name}.npy"), mmap_mode='r') for name in names}
+
+    def column(self, name):
+        """
+        读取整列数据（各分块拼接为一个数组）
+
+        Args:
+            name: 列名，如 'hands'、'score'
+
+        Returns:
+            拼接后的数组
+        """
+        parts = [chunk[name] for chunk in self.iter_chunks([name])]
+        if not parts:
+            shape, dtype, _ = _column_specs(self.meta['max_hands'])[name]
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.concatenate(parts)
+
+
+def new_session_dir(root, name=None):
+    """
+    生成新的会话目录路径
+
+    Args:
+        root: 存放所有会话的目录
+        name: 会话名称（如使用者姓名）
+
+    Returns:
+        会话目录路径
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    prefix = f"{name}_" if name else ""
+    return os.path.join(root, f"{prefix}session_{timestamp}")
+
+
+def list_sessions(root):
+    """列出目录下所有已录制的会话"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        os.path.join(root, name) for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, 'meta.json'))
+    )
@@ -0,0 +1,374 @@
+"""
+标准动作对比 - 把学员最近一次采摘与专家录制的标准动作对齐，给出逐关键点的偏差
+
+参考动作库是一个目录，每个 .npz 文件保存一段专家采摘的手部关键点 (T, 21, 3)。
+对比时所有参考动作已预先归一化（以手腕为原点、除以手掌长度、左手镜像为右手）
+并堆叠成一个数组，学员的一段动作用带宽约束的动态时间规整（DTW）一次对齐全部参考：
+帧间距离用矩阵乘法一次算出，动态规划按反对角线推进，每条反对角线对所有参考同时计算。
+
+用法:
+    python -m core.reference_motion add data/sessions/session_xxx --name 专家A
+    python -m core.reference_motion list
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import WRIST, MIDDLE_FINGER_MCP, HAND_JOINT_NAMES, hand_features
+
+REFERENCES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'references')
+
+# 相似度 = 100 · exp(-平均偏差 / SIMILARITY_SCALE)，偏差以手掌长度为单位
+SIMILARITY_SCALE = 0.5
+
+
+def normalize_clip(points, handedness=None):
+    """
+    归一化一段手部动作
+
+    Args:
+        points: (T, 21, 3) 关键点数组
+        handedness: 'Left' 时水平镜像，与右手动作对比
+
+    Returns:
+        (T, 21, 2) float32，以手腕为原点、以手掌长度为单位
+    """
+    xy = np.asarray(points, dtype=np.float32)[..., :2]
+    out = xy - xy[:, WRIST:WRIST + 1]
+    palm = np.median(np.linalg.norm(out[:, MIDDLE_FINGER_MCP], axis=-1))
+    out /= max(float(palm), 1e-6)
+    if handedness == 'Left':
+        out[..., 0] = -out[..., 0]
+    return out
+
+
+def resample(clip, max_length):
+    """帧数超过 max_length 时均匀抽帧"""
+    if len(clip) <= max_length:
+        return clip
+    return clip[np.linspace(0, len(clip) - 1, max_length).round().astype(np.intp)]
+
+
+def banded_dtw(query, refs, lengths, band=0.25, ref_norms=None):
+    """
+    带宽约束的 DTW，一次对齐多条参考序列
+
+    Args:
+        query: (n, D) 学员序列
+        refs: (R, M, D) 参考序列（按最长者补齐）
+        lengths: (R,) 每条参考序列的实际长度
+        band: 带宽（占序列长度的比例），对齐路径偏离对角线超过该值的格子不可达
+        ref_norms: (R, M) 参考序列每帧的平方范数，可预先计算
+
+    Returns:
+        (distances, cumulative)：distances 为 (R,) 沿对齐路径的平均帧间距离，
+        cumulative 为 (R, n+1, M+1) 累计代价，用于回溯对齐路径
+    """
+    n, dim = query.shape
+    count, max_len = refs.shape[:2]
+    joints = dim // 2
+
+    # 帧间距离：所有关键点的均方根距离，用矩阵乘法一次算出
+    if ref_norms is None:
+        ref_norms = (refs ** 2).sum(axis=-1)
+    sq = (query ** 2).sum(axis=-1)[None, :, None] + ref_norms[:, None, :] - 2 * (refs @ query.T).swapaxes(1, 2)
+    cost = np.sqrt(np.maximum(sq, 0) / joints)
+
+    # 带宽约束与补齐部分
+    i = (np.arange(n) + 0.5) / n
+    j = np.arange(max_len)[None, :]
+    lengths = np.asarray(lengths)
+    rel = (j + 0.5) / lengths[:, None]
+    outside = (np.abs(i[None, :, None] - rel[:, None, :]) > band) | (j >= lengths[:, None])[:, None, :]
+    cost[outside] = np.inf
+
+    cumulative = np.full((count, n + 1, max_len + 1), np.inf)
+    cumulative[:, 0, 0] = 0.0
+    # 按反对角线推进：同一条反对角线上的格子只依赖前两条
+    for k in range(2, n + max_len + 1):
+        rows = np.arange(max(1, k - max_len), min(n, k - 1) + 1)
+        cols = k - rows
+        best = np.minimum(np.minimum(cumulative[:, rows - 1, cols - 1], cumulative[:, rows - 1, cols]),
+                          cumulative[:, rows, cols - 1])
+        cumulative[:, rows, cols] = cost[:, rows - 1, cols - 1] + best
+
+    distances = cumulative[np.arange(count), n, lengths] / (n + lengths)
+    return distances, cumulative
+
+
+def dtw_path(cumulative, n, m):
+    """
+    从累计代价回溯对齐路径
+
+    Args:
+        cumulative: (n+1, M+1) 单条参考的累计代价
+        n: 学员序列长度
+        m: 参考序列长度
+
+    Returns:
+        [(学员帧, 参考帧), ...]，按时间顺序
+    """
+    path = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        path.append((i - 1, j - 1))
+        steps = ((i - 1, j - 1), (i - 1, j), (i, j - 1))
+        i, j = min(steps, key=lambda s: cumulative[s])
+    path.reverse()
+    return path
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    """与标准动作的对比结果"""
+    name: str
+    distance: float
+    similarity: float
+    joint_deviation: np.ndarray
+    path: tuple
+
+    def worst_joints(self, count=3):
+        """偏差最大的关键点 [(名称, 偏差), ...]"""
+        order = np.argsort(self.joint_deviation)[::-1][:count]
+        return [(HAND_JOINT_NAMES[i], float(self.joint_deviation[i])) for i in order]
+
+    def stats(self):
+        """发布到统计快照中的字段"""
+        return {
+            'reference_name': self.name,
+            'reference_similarity': int(round(self.similarity)),
+            'reference_deviation': tuple((name, round(value, 2)) for name, value in self.worst_joints()),
+        }
+
+
+class ReferenceLibrary:
+    """参考动作库"""
+
+    def __init__(self, directory=REFERENCES_DIR, band=0.25, max_length=60):
+        """
+        Args:
+            directory: 参考动作目录
+            band: DTW 带宽（占序列长度的比例）
+            max_length: 参与对比的最大帧数，更长的序列均匀抽帧，限制单次对比耗时
+        """
+        self.directory = directory
+        self.band = band
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        self._clips = None     # 名称 -> 归一化后的 (T, 21, 2)
+        self._prepared = None  # 堆叠后的参考数组，参考变化时重建
+
+    def _load(self):
+        clips = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.npz'))):
+            with np.load(path) as data:
+                handedness = str(data['handedness']) if 'handedness' in data else None
+                clips[os.path.splitext(os.path.basename(path))[0]] = normalize_clip(data['points'], handedness)
+        return clips
+
+    @property
+    def clips(self):
+        """名称 -> 归一化后的参考动作（第一次访问时从磁盘载入）"""
+        with self._lock:
+            if self._clips is None:
+                self._clips = self._load()
+            return self._clips
+
+    def __len__(self):
+        return len(self.clips)
+
+    def reload(self):
+        """重新从磁盘载入"""
+        with self._lock:
+            self._clips = None
+            self._prepared = None
+
+    def add(self, name, points, handedness=None, timestamps=None):
+        """
+        保存一段参考动作
+
+        Args:
+            name: 名称（文件名）
+            points: (T, 21, 3) 关键点数组
+            handedness: 'Left' / 'Right'
+            timestamps: (T,) 时间戳，可选
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = {'points': np.asarray(points, dtype=np.float32), 'handedness': np.array(handedness or '')}
+        if timestamps is not None:
+            arrays['timestamps'] = np.asarray(timestamps, dtype=np.float64)
+        np.savez(os.path.join(self.directory, f"{name}.npz"), **arrays)
+        clip = normalize_clip(points, handedness)
+        with self._lock:
+            if self._clips is not None:
+                self._clips[name] = clip
+            self._prepared = None
+
+    def _prepare(self):
+        """把所有参考动作抽帧、补齐并堆叠，同时预先计算每帧的平方范数"""
+        clips = self.clips
+        with self._lock:
+            if self._prepared is None and clips:
+                names = list(clips)
+                resampled = [resample(clips[name], self.max_length).reshape(-1, 42) for name in names]
+                lengths = np.array([len(c) for c in resampled], dtype=np.intp)
+                stack = np.zeros((len(names), lengths.max(), 42), dtype=np.float32)
+                for k, clip in enumerate(resampled):
+                    stack[k, :len(clip)] = clip
+                self._prepared = (names, stack, lengths, (stack ** 2).sum(axis=-1))
+            return self._prepared
+
+    def compare(self, points, handedness=None):
+        """
+        把一段动作与所有参考动作对比，返回最相近的一条
+
+        Args:
+            points: (T, 21, 3) 学员动作
+            handedness: 'Left' / 'Right'
+
+        Returns:
+            MatchResult，参考库为空或动作过短时返回None
+        """
+        prepared = self._prepare()
+        if prepared is None or len(points) < 2:
+            return None
+        names, stack, lengths, norms = prepared
+
+        query = resample(normalize_clip(points, handedness), self.max_length)
+        flat = query.reshape(len(query), -1)
+        distances, cumulative = banded_dtw(flat, stack, lengths, self.band, norms)
+        best = int(np.argmin(distances))
+        distance = float(distances[best])
+        if not math.isfinite(distance):
+            return None
+
+        # 沿对齐路径统计每个关键点的平均偏差
+        path = dtw_path(cumulative[best], len(query), int(lengths[best]))
+        q_idx, r_idx = np.array(path).T
+        reference = stack[best, :lengths[best]].reshape(-1, 21, 2)
+        deviation = np.linalg.norm(query[q_idx] - reference[r_idx], axis=-1).mean(axis=0)
+        return MatchResult(
+            name=names[best],
+            distance=distance,
+            similarity=100.0 * math.exp(-distance / SIMILARITY_SCALE),
+            joint_deviation=deviation,
+            path=tuple(path),
+        )
+
+
+class PickClipBuffer:
+    """最近若干帧手部关键点的环形缓冲区，采摘完成时从中截取该次动作"""
+
+    def __init__(self, capacity=150):
+        """
+        Args:
+            capacity: 保存的帧数（30fps 下约 5 秒）
+        """
+        self.capacity = capacity
+        self._points = np.zeros((capacity, 21, 3), dtype=np.float32)
+        self._t = np.full(capacity, np.nan)
+        self._count = 0
+
+    def append(self, points, timestamp):
+        """写入一帧"""
+        i = self._count % self.capacity
+        self._points[i] = points
+        self._t[i] = timestamp
+        self._count += 1
+
+    def clip(self, start, end):
+        """
+        截取时间范围内的帧（按时间顺序）
+
+        Returns:
+            (T, 21, 3) 关键点数组
+        """
+        n = min(self._count, self.capacity)
+        order = (self._count - n + np.arange(n)) % self.capacity
+        t = self._t[order]
+        return self._points[order[(t >= start) & (t <= end)]]
+
+    def clear(self):
+        """清空"""
+        self._t[:] = np.nan
+        self._count = 0
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_reference_library():
+    """进程共享的参考动作库（归一化后的参考动作只载入和计算一次）"""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = ReferenceLibrary()
+        return _library
+
+
+def extract_picks(session_dir, hand_slot=0):
+    """
+    从录制的会话中切分出每次采摘
+
+    Returns:
+        [(关键点 (T, 21, 3), 左右手, 时间戳 (T,)), ...]
+    """
+    from core.pick_segmenter import segment_picks
+    from core.recorder import SessionReader, HANDEDNESS_NAMES
+    from utils.filters import filter_sequence
+
+    reader = SessionReader(session_dir)
+    hands = reader.column('hands')
+    valid = (reader.column('hand_count') > 0) & ~np.isnan(hands[:, hand_slot, 0, 0])
+    points = hands[valid, hand_slot]
+    timestamps = reader.column('timestamp')[valid]
+    handedness = reader.column('handedness')[valid, hand_slot]
+
+    # 与实时分析一致：滤波后的关键点用于分段，保存原始关键点
+    smoothed = filter_sequence(timestamps, points)
+    events = segment_picks(timestamps, hand_features(smoothed)['pinch_distance'], smoothed[:, 0, :2])
+    picks = []
+    for event in events:
+        mask = (timestamps >= event.start) & (timestamps <= event.end)
+        if mask.sum() >= 2:
+            codes = handedness[mask]
+            picks.append((points[mask], HANDEDNESS_NAMES.get(int(np.bincount(codes.astype(np.intp)).argmax())), timestamps[mask]))
+    return picks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="管理标准动作参考库")
+    parser.add_argument('--dir', default=REFERENCES_DIR, help="参考动作目录")
+    sub = parser.add_subparsers(dest='command', required=True)
+    add = sub.add_parser('add', help="从录制的会话中切分采摘动作加入参考库")
+    add.add_argument('session', help="会话目录")
+    add.add_argument('--name', required=True, help="参考动作名称前缀")
+    add.add_argument('--hand', type=int, default=0, help="使用第几只手")
+    sub.add_parser('list', help="列出参考动作")
+    args = parser.parse_args(argv)
+
+    library = ReferenceLibrary(args.dir)
+    if args.command == 'add':
+        picks = extract_picks(args.session, args.hand)
+        if not picks:
+            parser.error("会话中没有检测到完整的采摘动作")
+        for k, (points, handedness, timestamps) in enumerate(picks, 1):
+            library.add(f"{args.name}_{k:03d}", points, handedness, timestamps)
+        print(f"已添加 {len(picks)} 段参考动作到 {args.dir}")
+    else:
+        for name, clip in library.clips.items():
+            print(f"{name}: {len(clip)} 帧")
+
+
+if __name__ == '__main__':
+    main()
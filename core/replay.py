@@ -0,0 +1,219 @@
+"""
+回放引擎 - 直接用录制的关键点重新评分，不需要重新运行 MediaPipe
+
+用法:
+    python -m core.replay data/sessions --pinch 0.04 0.05 0.06 --release 0.07 0.08 0.09
+
+批量路径在载入时把关键点滤波、稳定性等与阈值无关的特征一次算好，评分按数组计算，
+采摘分段每帧只做常数次运算，可以在几分钟内对数周的录制数据扫描阈值组合。
+批量路径与 TeaPickingAnalyzer 逐帧分析的规则相同：捏取状态取自采摘分段器，得分按时间常数平滑。
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.action_analyzer import TeaPickingAnalyzer, pinch_scores, finger_scores
+from core.pick_segmenter import segment_frames
+from core.recorder import SessionReader, list_sessions
+from core.stability import stability_scores
+from utils.filters import filter_sequence
+from utils.landmarks import hand_features
+
+# 分块指数平滑的块长
+_EMA_BLOCK = 256
+
+# 第一帧的名义帧间隔（与 TeaPickingAnalyzer.frame_interval 一致）
+NOMINAL_FRAME_INTERVAL = 1 / 30
+
+
+def time_constant_ema(values, dt, tau, initial=0.0):
+    """
+    按时间常数的指数平滑（向量化），与逐帧调用 time_constant_alpha 平滑的结果一致
+
+    每帧系数 alpha[k] = 1 - exp(-dt[k] / tau)，递推式 y[k] = y[k-1] + alpha[k] * (x[k] - y[k-1])
+    按块展开：块内第 j 帧对第 k 帧的权重为 alpha[j] * exp(-(L[k] - L[j]))，L 为 dt / tau 的累加，
+    每块用一次下三角矩阵乘法完成，避免逐元素的Python循环。
+
+    Args:
+        values: 一维输入序列
+        dt: 与 values 等长的帧间隔（秒）
+        tau: 时间常数（秒）
+        initial: 初始值
+
+    Returns:
+        平滑后的 float64 数组
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n, dtype=np.float64)
+    if tau <= 0:
+        out[:] = x
+        return out
+
+    steps = np.asarray(dt, dtype=np.float64) / tau
+    alpha = -np.expm1(-steps)
+    prev = float(initial)
+    for begin in range(0, n, _EMA_BLOCK):
+        block = slice(begin, begin + _EMA_BLOCK)
+        decay = np.cumsum(steps[block])
+        lags = np.maximum(decay[:, None] - decay[None, :], 0.0)
+        weights = np.tril(np.exp(-lags)) * alpha[block][None, :]
+        out[block] = weights @ x[block] + np.exp(-decay) * prev
+        prev = out[min(begin + _EMA_BLOCK, n) - 1]
+    return out
+
+
+class ReplayEngine:
+    """回放引擎"""
+
+    def __init__(self, session_dirs, hand_slot=0, score_tau=0.15):
+        """
+        载入会话并预先计算特征
+
+        Args:
+            session_dirs: 会话目录列表
+            hand_slot: 使用第几只手（与实时分析一致，默认第一只）
+            score_tau: 得分平滑的时间常数（秒），与 TeaPickingAnalyzer.score_tau 一致
+        """
+        self.score_tau = score_tau
+        self.sessions = []
+        for directory in session_dirs:
+            reader = SessionReader(directory)
+            hands = reader.column('hands')
+            hand_count = reader.column('hand_count')
+            valid = (hand_count > 0) & ~np.isnan(hands[:, hand_slot, 0, 0])
+            points = np.ascontiguousarray(hands[valid, hand_slot])
+            timestamps = reader.column('timestamp')[valid]
+            # 与实时分析一致：先按时间戳滤波关键点，稳定性与阈值无关，只算一次
+            smoothed = filter_sequence(timestamps, points)
+            features = hand_features(smoothed)
+            # 帧间隔：第一帧按名义帧间隔，与分析器一致
+            dt = np.diff(timestamps, prepend=timestamps[:1] - NOMINAL_FRAME_INTERVAL)
+            self.sessions.append({
+                'directory': directory,
+                'frames': len(hand_count),
+                'timestamp': timestamps,
+                'dt': np.maximum(dt, 0.0),
+                'points': points,
+                'wrist': smoothed[:, 0, :2],
+                'pinch': features['pinch_distance'],
+                'finger_score': finger_scores(features['other_fingers_dist']),
+                'stability_score': stability_scores(timestamps, smoothed),
+            })
+
+    def run(self, pinch_threshold=0.05, release_threshold=0.08):
+        """
+        用给定阈值对所有会话重新评分（批量路径）
+
+        采摘分段器按录制的时间戳逐帧给出采摘次数和捏住状态，
+        评分按滤波后的捏取距离向量化计算，再按时间常数平滑
+
+        Returns:
+            每个会话的结果字典列表
+        """
+        results = []
+        for session in self.sessions:
+            pinch = session['pinch']
+            events, holding = segment_frames(session['timestamp'], pinch, session['wrist'],
+                                             pinch_threshold=pinch_threshold,
+                                             release_threshold=release_threshold)
+
+            raw_score = pinch_scores(pinch, holding) + session['finger_score'] + session['stability_score']
+            scores = time_constant_ema(np.clip(raw_score, 0, 100), session['dt'], self.score_tau)
+
+            results.append({
+                'directory': session['directory'],
+                'frames': session['frames'],
+                'hand_frames': len(pinch),
+                'pick_count': len(events),
+                'average_score': float(scores.mean()) if len(scores) else 0.0,
+                'scores': scores,
+            })
+        return results
+
+    def sweep(self, pinch_thresholds, release_thresholds):
+        """
+        扫描阈值组合
+
+        Args:
+            pinch_thresholds: 捏取阈值候选
+            release_thresholds: 释放阈值候选
+
+        Returns:
+            每个组合一行的汇总列表
+        """
+        rows = []
+        for pinch, release in itertools.product(pinch_thresholds, release_thresholds):
+            if release < pinch:
+                continue
+            results = self.run(pinch, release)
+            hand_frames = sum(r['hand_frames'] for r in results)
+            rows.append({
+                'pinch_threshold': pinch,
+                'release_threshold': release,
+                'pick_count': sum(r['pick_count'] for r in results),
+                'average_score': round(sum(r['average_score'] * r['hand_frames'] for r in results)
+                                       / hand_frames, 2) if hand_frames else 0.0,
+            })
+        return rows
+
+    def replay_with_analyzer(self, analyzer_factory=TeaPickingAnalyzer):
+        """
+        逐帧把关键点送入分析器（参考路径，用于核对批量路径的结果）
+
+        Args:
+            analyzer_factory: 创建分析器的函数，可在此设置阈值
+
+        Returns:
+            每个会话的 get_statistics() 结果列表
+        """
+        stats = []
+        for session in self.sessions:
+            analyzer = analyzer_factory()
+            for points, timestamp in zip(session['points'], session['timestamp']):
+                analyzer.analyze_hand(points, timestamp=float(timestamp))
+            stats.append(analyzer.get_statistics())
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="用录制的关键点回放并重新评分")
+    parser.add_argument('sessions', nargs='+', help="会话目录，或包含多个会话的目录")
+    parser.add_argument('--pinch', type=float, nargs='+', default=[0.05], help="捏取阈值候选")
+    parser.add_argument('--release', type=float, nargs='+', default=[0.08], help="释放阈值候选")
+    parser.add_argument('--csv', help="把扫描结果写入CSV文件")
+    args = parser.parse_args(argv)
+
+    session_dirs = []
+    for path in args.sessions:
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            session_dirs.append(path)
+        else:
+            session_dirs.extend(list_sessions(path))
+    if not session_dirs:
+        parser.error("没有找到录制的会话")
+
+    engine = ReplayEngine(session_dirs)
+    rows = engine.sweep(args.pinch, args.release)
+
+    print(f"{'pinch':>7} {'release':>8} {'picks':>7} {'avg':>7}")
+    for row in rows:
+        print(f"{row['pinch_threshold']:>7} {row['release_threshold']:>8} "
+              f"{row['pick_count']:>7} {row['average_score']:>7}")
+
+    if args.csv and rows:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
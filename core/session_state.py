@@ -0,0 +1,85 @@
+"""
+会话状态模块 - 每个 WebRTC 会话独立保存统计数据
+
+视频线程是唯一的写入方：每帧生成一份不可变快照，通过替换引用发布；
+界面线程直接读取当前快照，不需要加锁，不同使用者之间的数据也不会互相覆盖。
+"""
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.stats_channel import StatsChannel
+
+EMPTY_STATS = MappingProxyType({'pick_count': 0, 'current_score': 0, 'average_score': 0,
+                                'recent_average_score': 0, 'best_score': 0})
+
+# 每帧都会变化的计数：放在快照的 counters 中，不参与快照比较，不会每帧唤醒界面
+PER_FRAME_STATS = ('total_actions',)
+EMPTY_COUNTERS = MappingProxyType({'total_actions': 0})
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """某一时刻的统计快照（不可变）"""
+    score: int = 0
+    stats: MappingProxyType = field(default_factory=lambda: EMPTY_STATS)
+    feedback: tuple = ()
+    counters: MappingProxyType = field(default_factory=lambda: EMPTY_COUNTERS, compare=False)
+    start_time: float = field(default=None)
+
+
+class SessionState:
+    """单个会话的状态"""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.channel = StatsChannel(initial=StatsSnapshot(start_time=self.start_time))
+        self._reset_requested = False
+
+    @property
+    def snapshot(self):
+        """当前快照（读取引用即可，无需加锁）"""
+        return self.channel.snapshot
+
+    def publish(self, score, feedback, stats):
+        """
+        发布新的统计快照（视频线程调用）
+
+        Args:
+            score: 当前得分
+            feedback: 反馈文字列表
+            stats: TeaPickingAnalyzer.get_statistics() 的结果，PER_FRAME_STATS 中的项移入 counters
+        """
+        stats = dict(stats)
+        counters = {name: stats.pop(name) for name in PER_FRAME_STATS if name in stats}
+        self.channel.publish(StatsSnapshot(
+            score=score,
+            stats=MappingProxyType(stats),
+            counters=MappingProxyType(counters),
+            feedback=tuple(feedback),
+            start_time=self.start_time,
+        ))
+
+    def request_reset(self):
+        """请求重置（界面线程调用），由视频线程在下一帧执行"""
+        self._reset_requested = True
+
+    def consume_reset(self):
+        """
+        视频线程检查并清除重置请求
+
+        Returns:
+            是否需要重置
+        """
+        if not self._reset_requested:
+            return False
+        self._reset_requested = False
+        self.start_time = time.time()
+        self.channel.publish(StatsSnapshot(start_time=self.start_time))
+        return True
@@ -0,0 +1,346 @@
+"""
+动作稳定性 - 根据手腕与指尖的轨迹评估动作是否平稳、直接、没有抖动
+
+三项指标都在预分配的环形轨迹缓冲区上增量更新，每帧只处理新进入和移出窗口的一帧：
+- 急动度（jerk）：位置三阶差分的均方根，越小动作越流畅
+- 路径直度：窗口内位移与路径长度之比，越接近 1 路径越直接
+- 抖动能量：位置与其低通值之差的均方根，反映高频颤抖
+
+长度量均除以手掌长度（手腕到中指根），与手离镜头的远近无关。
+多只手的轨迹按槽位存放在同一组 (slots, window, ...) 数组中，一帧内所有手一次向量化更新。
+"""
+import math
+
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmarks import WRIST, THUMB_TIP, INDEX_FINGER_TIP, MIDDLE_FINGER_MCP
+
+# 跟踪的关键点：手腕、拇指尖、食指尖
+TRACKED_POINTS = np.array([WRIST, THUMB_TIP, INDEX_FINGER_TIP], dtype=np.intp)
+
+# 各指标的 (理想值, 不合格值)，介于两者之间按对数线性插值
+JERK_RANGE = (150.0, 1500.0)       # 手掌长度 / 秒³
+TREMOR_RANGE = (0.02, 0.10)        # 手掌长度
+STRAIGHTNESS_RANGE = (0.8, 0.3)
+# 窗口内路径短于该值（手掌长度）时视为静止，不评价路径直度
+MIN_PATH = 0.5
+
+
+def _grade(value, good, bad, log=True):
+    """把指标映射到 0~1，good 处为 1，bad 处为 0（标量和数组均可）"""
+    value = np.asarray(value, dtype=np.float64)
+    if log:
+        value, good, bad = np.log(np.maximum(value, 1e-9)), math.log(good), math.log(bad)
+    return np.clip((bad - value) / (bad - good), 0.0, 1.0)
+
+
+class StabilityBank:
+    """多个槽位（多只手）的稳定性跟踪器"""
+
+    # 按槽位存放的状态数组（第一维为槽位）
+    _STATE = ('_pos', '_vel', '_acc', '_step', '_jerk2', '_tremor2', '_has_jerk', '_lowpass',
+              '_count', '_t', '_scale', '_sum_step', '_sum_jerk2', '_sum_tremor2', '_n_jerk')
+
+    def __init__(self, slots=1, window=15, tremor_tau=0.1, max_gap=0.5, points=TRACKED_POINTS):
+        """
+        Args:
+            slots: 槽位数
+            window: 轨迹窗口帧数
+            tremor_tau: 抖动分离用低通滤波的时间常数（秒）
+            max_gap: 两帧间隔超过该值（秒）时清空该槽位的轨迹重新开始
+            points: 跟踪的手部关键点索引
+        """
+        self.window = window
+        self.tremor_tau = tremor_tau
+        self.max_gap = max_gap
+        self.points = points
+
+        n = len(points)
+        # 轨迹与逐帧指标的环形缓冲区
+        self._pos = np.zeros((0, window, n, 2))
+        self._vel = np.zeros((0, window, n, 2))
+        self._acc = np.zeros((0, window, n, 2))
+        self._step = np.zeros((0, window))     # 本帧移动距离
+        self._jerk2 = np.zeros((0, window))    # 本帧急动度平方
+        self._tremor2 = np.zeros((0, window))  # 本帧抖动平方
+        self._has_jerk = np.zeros((0, window), dtype=bool)
+        self._lowpass = np.zeros((0, n, 2))
+        # 窗口累计量
+        self._count = np.zeros(0, dtype=np.int64)
+        self._t = np.zeros(0)
+        self._scale = np.zeros(0)
+        self._sum_step = np.zeros(0)
+        self._sum_jerk2 = np.zeros(0)
+        self._sum_tremor2 = np.zeros(0)
+        self._n_jerk = np.zeros(0, dtype=np.int64)
+        self.slots = 0
+        self.grow(slots)
+
+    def grow(self, n=1):
+        """追加 n 个空槽位"""
+        for name in self._STATE:
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros((n,) + array.shape[1:], dtype=array.dtype)]))
+        self.slots += n
+        self.reset(np.arange(self.slots - n, self.slots))
+
+    def reset(self, slots=None):
+        """
+        清空轨迹
+
+        Args:
+            slots: 槽位索引，None 表示全部
+        """
+        idx = slice(None) if slots is None else np.asarray(slots, dtype=np.intp)
+        self._count[idx] = 0
+        self._t[idx] = np.nan
+        self._scale[idx] = np.nan
+        self._sum_step[idx] = 0.0
+        self._sum_jerk2[idx] = 0.0
+        self._sum_tremor2[idx] = 0.0
+        self._n_jerk[idx] = 0
+        self._has_jerk[idx] = False
+
+    def filled(self, slots):
+        """各槽位窗口内的帧数"""
+        return np.minimum(self._count[np.asarray(slots, dtype=np.intp)], self.window)
+
+    def update(self, slots, points, timestamp):
+        """
+        输入一帧中若干只手的关键点
+
+        Args:
+            slots: (K,) 互不相同的槽位索引
+            points: (K, 21, 3) 手部关键点数组
+            timestamp: 帧时间戳（秒）
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        points = np.asarray(points, dtype=np.float64)
+        dt = timestamp - self._t[slots]  # 新轨迹为 NaN
+        gap = dt > self.max_gap
+        if gap.any():
+            self.reset(slots[gap])
+        palm = np.linalg.norm(points[:, MIDDLE_FINGER_MCP, :2] - points[:, WRIST, :2], axis=-1)
+        keep = ~(dt <= 0) & (palm > 1e-6)  # 跳过重复或乱序的时间戳、退化的手
+        if not keep.all():
+            slots, points, palm = slots[keep], points[keep], palm[keep]
+        if len(slots) == 0:
+            return
+
+        # 手掌长度按帧平滑，避免单帧检测误差放大指标
+        scale = self._scale[slots]
+        scale = np.where(np.isnan(scale), palm, scale + 0.1 * (palm - scale))
+        self._scale[slots] = scale
+        pos = points[:, self.points, :2] / scale[:, None, None]
+
+        w = self.window
+        count = self._count[slots]
+        i = count % w
+        prev = (i - 1) % w
+        # 移出窗口的一帧
+        full = count >= w
+        old_jerk = full & self._has_jerk[slots, i]
+        self._sum_step[slots] -= np.where(full, self._step[slots, i], 0.0)
+        self._sum_tremor2[slots] -= np.where(full, self._tremor2[slots, i], 0.0)
+        self._sum_jerk2[slots] -= np.where(old_jerk, self._jerk2[slots, i], 0.0)
+        self._n_jerk[slots] -= old_jerk
+
+        # 轨迹的第一帧没有速度，低通值从当前位置开始
+        first = np.isnan(self._t[slots])
+        dt = np.where(first, 1.0, timestamp - self._t[slots])
+        dt3 = dt[:, None, None]
+        first3 = first[:, None, None]
+        delta = pos - self._pos[slots, prev]
+        vel = np.where(first3, 0.0, delta / dt3)
+        acc = np.where(first3, 0.0, (vel - self._vel[slots, prev]) / dt3)
+        has_jerk = ~first & (count >= 3)
+        jerk = (acc - self._acc[slots, prev]) / dt3
+        jerk2 = np.where(has_jerk, (jerk ** 2).sum(axis=-1).mean(axis=-1), 0.0)
+        step = np.where(first, 0.0, np.sqrt((delta ** 2).sum(axis=-1)).mean(axis=-1))
+
+        lowpass = self._lowpass[slots]
+        alpha = (1.0 - np.exp(-dt / self.tremor_tau))[:, None, None]
+        lowpass = np.where(first3, pos, lowpass + alpha * (pos - lowpass))
+        tremor2 = ((pos - lowpass) ** 2).sum(axis=-1).mean(axis=-1)
+
+        self._pos[slots, i] = pos
+        self._vel[slots, i] = vel
+        self._acc[slots, i] = acc
+        self._lowpass[slots] = lowpass
+        self._step[slots, i] = step
+        self._jerk2[slots, i] = jerk2
+        self._tremor2[slots, i] = tremor2
+        self._has_jerk[slots, i] = has_jerk
+        self._sum_step[slots] += step
+        self._sum_jerk2[slots] += jerk2
+        self._sum_tremor2[slots] += tremor2
+        self._n_jerk[slots] += has_jerk
+        self._count[slots] += 1
+        self._t[slots] = timestamp
+
+    def metrics(self, slots):
+        """
+        各槽位窗口内的稳定性指标
+
+        Args:
+            slots: (K,) 槽位索引
+
+        Returns:
+            (valid, metrics)：valid 为帧数足够的槽位掩码；metrics 字典含 jerk（急动度均方根）、
+            straightness（路径直度，静止时为 NaN）、tremor（抖动均方根），均为 (K,) 数组
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        count = self._count[slots]
+        filled = np.minimum(count, self.window)
+        n_jerk = self._n_jerk[slots]
+        newest = (count - 1) % self.window
+        oldest = (count - filled) % self.window
+        # 最旧一帧的移动距离发生在窗口之外
+        path = np.maximum(self._sum_step[slots] - self._step[slots, oldest], 0.0)
+        displacement = np.sqrt(((self._pos[slots, newest] - self._pos[slots, oldest]) ** 2)
+                               .sum(axis=-1)).mean(axis=-1)
+        moving = path >= MIN_PATH
+        metrics = {
+            'jerk': np.sqrt(np.maximum(self._sum_jerk2[slots], 0.0) / np.maximum(n_jerk, 1)),
+            'straightness': np.where(moving, np.minimum(displacement / np.where(moving, path, 1.0), 1.0), np.nan),
+            'tremor': np.sqrt(np.maximum(self._sum_tremor2[slots], 0.0) / np.maximum(filled, 1)),
+        }
+        return (filled >= 4) & (n_jerk > 0), metrics
+
+    def grades(self, slots):
+        """
+        各项指标映射到 0~1
+
+        Returns:
+            (valid, grades)：grades 字典含 jerk、tremor、straightness，均为 (K,) 数组
+        """
+        valid, metrics = self.metrics(slots)
+        straightness = metrics['straightness']
+        moving = ~np.isnan(straightness)
+        return valid, {
+            'jerk': _grade(metrics['jerk'], *JERK_RANGE),
+            'tremor': _grade(metrics['tremor'], *TREMOR_RANGE),
+            'straightness': np.where(moving, _grade(np.where(moving, straightness, 1.0),
+                                                    *STRAIGHTNESS_RANGE, log=False), 1.0),
+        }
+
+    def scores(self, slots, max_score=30):
+        """
+        各槽位的稳定性得分（帧数不足时为满分的一半）
+
+        Returns:
+            (K,) 得分数组
+        """
+        valid, grades = self.grades(slots)
+        return np.where(valid, max_score * sum(grades.values()) / len(grades), max_score * 0.5)
+
+
+# 单只手跟踪器使用的槽位
+_ONLY_SLOT = np.zeros(1, dtype=np.intp)
+
+
+class StabilityTracker:
+    """单只手的稳定性跟踪器（只有一个槽位的 StabilityBank）"""
+
+    def __init__(self, window=15, tremor_tau=0.1, max_gap=0.5, points=TRACKED_POINTS):
+        """
+        Args:
+            window: 轨迹窗口帧数
+            tremor_tau: 抖动分离用低通滤波的时间常数（秒）
+            max_gap: 两帧间隔超过该值（秒）时清空轨迹重新开始
+            points: 跟踪的手部关键点索引
+        """
+        self.bank = StabilityBank(1, window, tremor_tau, max_gap, points)
+
+    def reset(self):
+        """清空轨迹"""
+        self.bank.reset()
+
+    @property
+    def filled(self):
+        """窗口内的帧数"""
+        return int(self.bank.filled(_ONLY_SLOT)[0])
+
+    def update(self, points, timestamp):
+        """
+        输入一帧手部关键点
+
+        Args:
+            points: (21, 3) 手部关键点数组
+            timestamp: 帧时间戳（秒）
+        """
+        self.bank.update(_ONLY_SLOT, np.asarray(points)[None], timestamp)
+
+    def metrics(self):
+        """
+        窗口内的稳定性指标
+
+        Returns:
+            字典：jerk（急动度均方根）、straightness（路径直度，静止时为None）、
+            tremor（抖动均方根）；帧数不足时返回None
+        """
+        valid, metrics = self.bank.metrics(_ONLY_SLOT)
+        if not valid[0]:
+            return None
+        straightness = float(metrics['straightness'][0])
+        return {
+            'jerk': float(metrics['jerk'][0]),
+            'straightness': None if math.isnan(straightness) else straightness,
+            'tremor': float(metrics['tremor'][0]),
+        }
+
+    def score(self, max_score=30):
+        """
+        稳定性得分与反馈
+
+        Args:
+            max_score: 满分
+
+        Returns:
+            (得分, 反馈文字)
+        """
+        valid, grades = self.bank.grades(_ONLY_SLOT)
+        if not valid[0]:
+            return max_score * 0.5, "○ 正在评估动作稳定性..."
+
+        grades = {name: float(values[0]) for name, values in grades.items()}
+        score = max_score * sum(grades.values()) / len(grades)
+
+        worst = min(grades, key=grades.get)
+        if grades[worst] >= 0.7:
+            feedback = "✓ 动作较为稳定"
+        elif worst == 'tremor':
+            feedback = "△ 手部有抖动，放松手腕"
+        elif worst == 'jerk':
+            feedback = "△ 动作不够流畅，匀速移动"
+        else:
+            feedback = "△ 移动路径可以更直接"
+        if grades[worst] < 0.3:
+            feedback = "✗" + feedback[1:]
+        return score, feedback
+
+
+def stability_scores(timestamps, points, max_score=30, **options):
+    """
+    对整段序列逐帧计算稳定性得分（回放使用）
+
+    Args:
+        timestamps: (N,) 时间戳
+        points: (N, 21, 3) 手部关键点
+        max_score: 满分
+        **options: StabilityBank 参数
+
+    Returns:
+        (N,) 得分数组
+    """
+    bank = StabilityBank(1, **options)
+    scores = np.empty(len(timestamps))
+    for i, (t, p) in enumerate(zip(timestamps, points)):
+        bank.update(_ONLY_SLOT, p[None], float(t))
+        scores[i] = bank.scores(_ONLY_SLOT, max_score)[0]
+    return scores
@@ -0,0 +1,282 @@
+"""
+分阶段计时 - 每帧各处理阶段的耗时记录在固定大小的直方图中
+
+- 直方图按对数分桶（每10倍20个桶，相对误差约12%），记录一次只是一次下标计算和计数加一，
+  内存固定，不随运行时间增长
+- summary() 给界面面板使用；render_prometheus() 输出 Prometheus 文本格式，
+  MetricsExporter 按需写入本地文件或通过 HTTP /metrics 提供
+"""
+import math
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# recv 中的处理阶段，按执行顺序
+STAGES = ('decode', 'flip', 'color', 'pose', 'hands', 'analysis', 'draw', 'encode', 'total')
+
+STAGE_NAMES = {
+    'decode': '解码',
+    'flip': '翻转',
+    'color': '颜色转换',
+    'pose': '姿态检测',
+    'hands': '手部检测',
+    'analysis': '动作分析',
+    'draw': '绘制',
+    'encode': '编码',
+    'total': '整帧',
+}
+
+METRICS_FILE_ENV = 'TEA_AI_METRICS_FILE'
+METRICS_PORT_ENV = 'TEA_AI_METRICS_PORT'
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图"""
+
+    def __init__(self, min_seconds=1e-5, max_seconds=10.0, buckets_per_decade=20):
+        """
+        Args:
+            min_seconds: 第一个桶的上界
+            max_seconds: 最后一个有限桶的上界，更大的值计入溢出桶
+            buckets_per_decade: 每10倍区间的桶数
+        """
+        self._log_min = math.log10(min_seconds)
+        self._per_decade = buckets_per_decade
+        n = int(round((math.log10(max_seconds) - self._log_min) * buckets_per_decade))
+        # 第 i 个桶的上界；第 0 个桶收 <= min_seconds，最后一个桶为溢出桶
+        self.bounds = np.append(np.logspace(self._log_min, math.log10(max_seconds), n + 1), np.inf)
+        self.counts = np.zeros(len(self.bounds), dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """记录一次耗时（秒）"""
+        if seconds > 0:
+            index = math.ceil((math.log10(seconds) - self._log_min) * self._per_decade)
+            index = min(max(index, 0), len(self.counts) - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """
+        估计分位数
+
+        Args:
+            q: 0~100
+
+        Returns:
+            秒；没有数据时为 0
+        """
+        if self.count == 0:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, q / 100 * self.count))
+        return float(min(self.bounds[min(index, len(self.bounds) - 1)], self.max))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        self.counts.fill(0)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+# 所有存活的计时器，供指标导出使用
+_registry = weakref.WeakSet()
+
+
+class StageTimers:
+    """一个视频会话的分阶段计时器"""
+
+    def __init__(self, stages=STAGES, name=None):
+        """
+        Args:
+            stages: 阶段名列表
+            name: 导出指标时的会话标签
+        """
+        self.name = name or f"session-{id(self):x}"
+        self.enabled = True
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.counters = {}
+        _registry.add(self)
+
+    def record(self, stage, seconds):
+        """记录某阶段的一次耗时"""
+        if self.enabled:
+            self.histograms[stage].record(seconds)
+
+    def lap(self, stage, start):
+        """
+        记录从 start 到现在的耗时
+
+        Returns:
+            当前时间（perf_counter），作为下一阶段的起点
+        """
+        now = time.perf_counter()
+        if self.enabled:
+            self.histograms[stage].record(now - start)
+        return now
+
+    @contextmanager
+    def time(self, stage):
+        """计时上下文，用于包装无法插入 lap() 的调用"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def set_counter(self, name, value):
+        """更新计数器（如丢帧数）"""
+        self.counters[name] = value
+
+    def summary(self):
+        """
+        各阶段统计
+
+        Returns:
+            字典：stages（阶段名 -> count、mean_ms、p50_ms、p95_ms、p99_ms、max_ms）、counters
+        """
+        stages = {}
+        for stage, h in self.histograms.items():
+            stages[stage] = {
+                'count': h.count,
+                'mean_ms': h.mean * 1000,
+                'p50_ms': h.percentile(50) * 1000,
+                'p95_ms': h.percentile(95) * 1000,
+                'p99_ms': h.percentile(99) * 1000,
+                'max_ms': h.max * 1000,
+            }
+        return {'stages': stages, 'counters': dict(self.counters)}
+
+    def reset(self):
+        """清空所有统计"""
+        for h in self.histograms.values():
+            h.reset()
+        self.counters.clear()
+
+
+def render_prometheus(timers=None, prefix='tea_ai'):
+    """
+    以 Prometheus 文本格式输出计时统计
+
+    Args:
+        timers: StageTimers 列表，默认所有存活的计时器
+        prefix: 指标名前缀
+
+    Returns:
+        文本
+    """
+    timers = list(_registry) if timers is None else timers
+    lines = [
+        f"# HELP {prefix}_stage_seconds Per-stage frame processing latency.",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    counter_lines = []
+    for t in timers:
+        for stage, h in t.histograms.items():
+            labels = f'session="{t.name}",stage="{stage}"'
+            cumulative = np.cumsum(h.counts)
+            for bound, count in zip(h.bounds, cumulative):
+                le = '+Inf' if np.isinf(bound) else f"{bound:.6g}"
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{{labels}}} {h.total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{{labels}}} {h.count}')
+        for name, value in t.counters.items():
+            counter_lines.append(f'{prefix}_{name}{{session="{t.name}"}} {value}')
+    return "\n".join(lines + counter_lines) + "\n"
+
+
+class MetricsExporter:
+    """指标导出：定期写入本地文件，和/或在 HTTP /metrics 上提供"""
+
+    def __init__(self, path=None, port=None, interval=5.0):
+        """
+        Args:
+            path: 输出文件路径（例如供 node_exporter textfile collector 读取）
+            port: HTTP 端口
+            interval: 写文件的间隔（秒）
+        """
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self._server = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.path:
+            threading.Thread(target=self._write_loop, name="metrics-file", daemon=True).start()
+        if self.port:
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.rstrip('/') != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = render_prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(('', int(self.port)), Handler)
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def write_file(self):
+        """写出一次指标文件（先写临时文件再改名，读取方不会读到半截内容）"""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(render_prometheus())
+        os.replace(tmp, self.path)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_file()
+            except OSError:
+                pass
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter_from_env(environ=None):
+    """
+    按环境变量 TEA_AI_METRICS_FILE / TEA_AI_METRICS_PORT 启动进程级指标导出（只启动一次）
+
+    Returns:
+        MetricsExporter，未配置时返回None
+    """
+    global _exporter
+    environ = os.environ if environ is None else environ
+    path, port = environ.get(METRICS_FILE_ENV), environ.get(METRICS_PORT_ENV)
+    if not path and not port:
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = MetricsExporter(path=path, port=port).start()
+    return _exporter
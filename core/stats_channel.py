@@ -0,0 +1,70 @@
+"""
+统计数据推送通道 - 视频线程发布带版本号的快照，界面只在数据变化时刷新
+"""
+import threading
+
+
+class StatsChannel:
+    """
+    单发布者、多订阅者的快照通道
+
+    发布时若内容与上一份快照相同（按快照的 == 比较）则不增加版本号，订阅方因此不会被无意义地唤醒；
+    引用仍会替换，不参与比较的字段（如逐帧计数）在订阅方下一次读取时是最新的。
+    """
+
+    def __init__(self, initial=None):
+        """
+        Args:
+            initial: 初始快照
+        """
+        self._snapshot = initial
+        self._version = 0
+        self._event = threading.Event()
+
+    @property
+    def version(self):
+        """当前版本号"""
+        return self._version
+
+    @property
+    def snapshot(self):
+        """当前快照"""
+        return self._snapshot
+
+    def publish(self, snapshot):
+        """
+        发布新快照（视频线程调用）
+
+        Args:
+            snapshot: 新的统计快照，发布后不应再修改
+
+        Returns:
+            是否产生了新版本
+        """
+        changed = snapshot != self._snapshot
+        self._snapshot = snapshot
+        if not changed:
+            return False
+        self._version += 1
+        self._event.set()
+        return True
+
+    def wait(self, version, timeout=None):
+        """
+        等待比给定版本更新的快照
+
+        Args:
+            version: 订阅方已经看到的版本号
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            (version, snapshot)，超时时返回当前版本（可能与输入相同）
+        """
+        while self._version == version:
+            self._event.clear()
+            # 清除后再检查一次，避免错过清除前刚发布的版本
+            if self._version != version:
+                break
+            if not self._event.wait(timeout):
+                break
+        return self._version, self._snapshot
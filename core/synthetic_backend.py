@@ -0,0 +1,259 @@
+"""
+合成检测后端 - 按脚本生成确定性的采茶动作，不需要模型和摄像头
+
+每只手循环执行 靠近 → 捏取 → 上提 → 释放 → 复位，身体随之轻微摆动。
+轨迹只由帧序号和随机种子决定，同样的参数每次运行结果完全一致，
+每帧只做几十个点的数组运算，可以在CI上以每秒数百帧压测分析、界面和录制流程。
+
+启用方式: TEA_AI_BACKEND=synthetic streamlit run app.py
+"""
+import numpy as np
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detector_backend import PoseBackend, HandBackend
+from core.frame_context import FrameContext
+
+# 张开的左手，以手腕为原点、手掌长度（手腕到中指根）为单位，y 向上为负
+HAND_TEMPLATE = np.array([
+    [0.00, 0.00],                                                   # 手腕
+    [-0.25, -0.15], [-0.45, -0.30], [-0.60, -0.45], [-0.70, -0.60],  # 拇指
+    [-0.20, -0.90], [-0.22, -1.25], [-0.23, -1.50], [-0.24, -1.70],  # 食指
+    [0.00, -0.95], [0.00, -1.35], [0.00, -1.60], [0.00, -1.80],      # 中指
+    [0.18, -0.90], [0.20, -1.25], [0.21, -1.48], [0.22, -1.65],      # 无名指
+    [0.35, -0.80], [0.40, -1.05], [0.42, -1.22], [0.44, -1.38],      # 小指
+], dtype=np.float32)
+
+# 捏取时向拇指尖与食指尖中点收拢的关键点及收拢程度
+PINCH_WEIGHTS = np.zeros(21, dtype=np.float32)
+PINCH_WEIGHTS[[3, 4, 7, 8]] = [0.5, 0.96, 0.5, 0.96]
+
+# 每只手的静止位置 (x, y) 与左右手标签；前两只手属于画面中的主要人物
+HAND_SLOTS = [
+    (0.62, 0.60, 'Left'),
+    (0.38, 0.60, 'Right'),
+    (0.86, 0.55, 'Left'),
+    (0.14, 0.55, 'Right'),
+]
+
+# 站立姿态的 33 个关键点（归一化坐标），手肘和手腕每帧按手的位置重新计算
+POSE_TEMPLATE = np.array([
+    [0.50, 0.20],                                              # 鼻子
+    [0.51, 0.18], [0.52, 0.18], [0.53, 0.18],                  # 左眼
+    [0.49, 0.18], [0.48, 0.18], [0.47, 0.18],                  # 右眼
+    [0.55, 0.19], [0.45, 0.19],                                # 耳朵
+    [0.51, 0.23], [0.49, 0.23],                                # 嘴
+    [0.58, 0.33], [0.42, 0.33],                                # 肩
+    [0.62, 0.47], [0.38, 0.47],                                # 肘
+    [0.62, 0.60], [0.38, 0.60],                                # 腕
+    [0.63, 0.63], [0.37, 0.63], [0.62, 0.64], [0.38, 0.64],    # 小指、食指
+    [0.61, 0.62], [0.39, 0.62],                                # 拇指
+    [0.56, 0.68], [0.44, 0.68],                                # 髋
+    [0.57, 0.85], [0.43, 0.85],                                # 膝
+    [0.57, 1.00], [0.43, 1.00],                                # 踝
+    [0.58, 1.02], [0.42, 1.02],                                # 脚跟
+    [0.55, 1.04], [0.45, 1.04],                                # 脚尖
+], dtype=np.float32)
+
+
+def _smoothstep(t):
+    t = np.clip(t, 0.0, 1.0)
+    return t * t * (3 - 2 * t)
+
+
+class SyntheticScript:
+    """采茶动作脚本"""
+
+    def __init__(self, num_hands=2, fps=30.0, pick_period=1.5, hand_size=0.09, noise=0.002, seed=0):
+        """
+        Args:
+            num_hands: 画面中的手数（最多4只）
+            fps: 帧率，帧序号按此换算为时间
+            pick_period: 一次采摘的周期（秒）
+            hand_size: 手掌长度（归一化坐标）
+            noise: 关键点抖动的标准差
+            seed: 随机种子
+        """
+        self.num_hands = min(num_hands, len(HAND_SLOTS))
+        self.fps = fps
+        self.pick_period = pick_period
+        self.hand_size = hand_size
+        self.noise = noise
+        self.seed = seed
+
+    def _target(self, hand, cycle):
+        """某只手第 cycle 次采摘的目标位置（相对静止位置的偏移）"""
+        rng = np.random.default_rng((self.seed, hand, cycle))
+        return rng.uniform((-0.08, -0.06), (0.08, 0.02)).astype(np.float32)
+
+    def hand_pose(self, frame_index, hand):
+        """
+        某只手在某一帧的状态
+
+        Returns:
+            (手腕位置 (2,), 捏取程度 0~1, 手掌旋转角)
+        """
+        t = frame_index / self.fps
+        # 两只手错开半个周期
+        phase = t / self.pick_period + 0.5 * hand
+        cycle = int(np.floor(phase))
+        p = phase - cycle
+
+        base = np.array(HAND_SLOTS[hand][:2], dtype=np.float32)
+        target = base + self._target(hand, cycle)
+        lifted = target + np.array([0.0, -0.06], dtype=np.float32)
+
+        if p < 0.35:      # 靠近
+            position = base + (target - base) * _smoothstep(p / 0.35)
+            grip = 0.0
+        elif p < 0.5:     # 捏取
+            position = target
+            grip = _smoothstep((p - 0.35) / 0.15)
+        elif p < 0.75:    # 上提
+            position = target + (lifted - target) * _smoothstep((p - 0.5) / 0.25)
+            grip = 1.0
+        elif p < 0.9:     # 释放
+            position = lifted
+            grip = 1.0 - _smoothstep((p - 0.75) / 0.15)
+        else:             # 复位
+            position = lifted + (base - lifted) * _smoothstep((p - 0.9) / 0.1)
+            grip = 0.0
+
+        angle = 0.15 * np.sin(2 * np.pi * 0.3 * t + hand)
+        return position, float(grip), float(angle)
+
+    def hands(self, frame_index, max_hands=2):
+        """
+        生成一帧的手部关键点
+
+        Returns:
+            [((21, 3) float32 数组, 'Left'/'Right'), ...]
+        """
+        rng = np.random.default_rng((self.seed, frame_index))
+        result = []
+        for hand in range(min(self.num_hands, max_hands)):
+            position, grip, angle = self.hand_pose(frame_index, hand)
+            shape = HAND_TEMPLATE.copy()
+            if HAND_SLOTS[hand][2] == 'Right':
+                shape[:, 0] = -shape[:, 0]
+
+            # 拇指尖与食指尖向中点收拢
+            mid = (shape[4] + shape[8]) / 2
+            shape += (mid - shape) * (PINCH_WEIGHTS * grip)[:, None]
+
+            c, s = np.cos(angle), np.sin(angle)
+            rotation = np.array([[c, -s], [s, c]], dtype=np.float32)
+            points = np.zeros((21, 3), dtype=np.float32)
+            points[:, :2] = shape @ rotation.T * self.hand_size + position
+            points[:, 2] = -0.02 * PINCH_WEIGHTS * grip
+            points[:, :2] += rng.normal(0.0, self.noise, (21, 2))
+            result.append((points, HAND_SLOTS[hand][2]))
+        return result
+
+    def pose(self, frame_index):
+        """
+        生成一帧的姿态关键点（主要人物）
+
+        Returns:
+            (33, 3) float32 数组
+        """
+        t = frame_index / self.fps
+        points = np.zeros((33, 3), dtype=np.float32)
+        points[:, :2] = POSE_TEMPLATE
+        points[:, 0] += 0.01 * np.sin(2 * np.pi * 0.25 * t)  # 身体摆动
+
+        # 手腕跟随手，手肘位于肩与腕之间略偏下
+        for hand, (shoulder, elbow, wrist) in enumerate(((11, 13, 15), (12, 14, 16))):
+            if hand < self.num_hands:
+                position, _, _ = self.hand_pose(frame_index, hand)
+                points[wrist, :2] = position
+            points[elbow, :2] = (points[shoulder, :2] + points[wrist, :2]) / 2 + (0.0, 0.06)
+        return points
+
+
+class SyntheticPoseDetector(PoseBackend):
+    """合成姿态检测器"""
+
+    name = 'synthetic'
+
+    def __init__(self, script=None, model_complexity=1, **options):
+        """
+        Args:
+            script: SyntheticScript，默认使用默认参数的脚本
+            model_complexity: 与 PoseDetector 接口一致，只做记录
+            **options: MediaPipe 检测器的其他参数，忽略
+        """
+        self.script = script or SyntheticScript()
+        self.model_complexity = model_complexity
+        self.frame_index = 0
+        self.frame_shape = None
+        self._landmarks = None
+
+    def detect(self, frame):
+        bgr_frame = frame.bgr if isinstance(frame, FrameContext) else frame
+        self.frame_shape = bgr_frame.shape
+        self._landmarks = self.script.pose(self.frame_index)
+        self.frame_index += 1
+        return bgr_frame
+
+    def get_landmarks(self):
+        return self._landmarks
+
+    def landmark_array(self):
+        return self._landmarks
+
+    def get_hand_regions(self, min_visibility=0.5, padding=1.6):
+        """与 PoseDetector.get_hand_regions() 相同的估计方法（合成关键点总是可见）"""
+        if self._landmarks is None or self.frame_shape is None:
+            return []
+        h, w = self.frame_shape[:2]
+        elbows = self._landmarks[[13, 14], :2]
+        wrists = self._landmarks[[15, 16], :2]
+        forearm = np.hypot(wrists[:, 0] - elbows[:, 0], (wrists[:, 1] - elbows[:, 1]) * h / w)
+        centers = wrists + (wrists - elbows) * 0.35
+        return [(wrist_idx, float(cx), float(cy), float(f * padding))
+                for wrist_idx, (cx, cy), f in zip((15, 16), centers, forearm)]
+
+    def reset(self):
+        self.frame_index = 0
+        self.frame_shape = None
+        self._landmarks = None
+
+
+class SyntheticHandDetector(HandBackend):
+    """合成手部检测器"""
+
+    name = 'synthetic'
+
+    def __init__(self, max_num_hands=2, script=None, roi_mode=False, model_complexity=1, **options):
+        """
+        Args:
+            max_num_hands: 最多返回的手数
+            script: SyntheticScript，默认使用默认参数的脚本
+            roi_mode: 与 HandDetector 接口一致，合成数据不需要裁剪，忽略
+            model_complexity: 与 HandDetector 接口一致，只做记录
+            **options: MediaPipe 检测器的其他参数，忽略
+        """
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        self.roi_mode = roi_mode
+        self.script = script or SyntheticScript()
+        self.frame_index = 0
+        self._hands = []
+
+    def detect(self, frame, wrist_regions=None):
+        bgr_frame = frame.bgr if isinstance(frame, FrameContext) else frame
+        self._hands = [{'landmarks': points, 'handedness': handedness}
+                       for points, handedness in self.script.hands(self.frame_index, self.max_num_hands)]
+        self.frame_index += 1
+        return bgr_frame
+
+    def get_all_hands(self):
+        return list(self._hands)
+
+    def reset(self):
+        self.frame_index = 0
+        self._hands = []
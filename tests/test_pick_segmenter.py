@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.pick_segmenter import PickSegmenter, PHASES, segment_picks
+
+
+def synthetic_pick(fps=30.0, jitter=False):
+    """静止 → 移向茶芽并停顿 → 捏紧并上提 → 张开 的合成序列"""
+    timestamps, pinch, wrists = [], [], []
+    t = 0.0
+
+    def add(d, x, y):
+        nonlocal t
+        timestamps.append(t)
+        pinch.append(d)
+        wrists.append((x, y))
+        t += 1.0 / fps
+
+    for _ in range(int(0.3 * fps)):           # 静止
+        add(0.15, 0.3, 0.6)
+    moves = int(0.3 * fps)
+    for i in range(1, moves + 1):              # 靠近
+        add(0.15, 0.3 + 0.3 * i / moves, 0.6)
+    for _ in range(int(0.15 * fps)):          # 捏取前停顿
+        add(0.15, 0.6, 0.6)
+    hold = int(0.4 * fps)
+    for i in range(hold):                      # 捏取并上提
+        d = 0.07 if jitter and i == hold // 2 else 0.02
+        add(d, 0.6, 0.6 - 0.05 * i / hold)
+    for _ in range(int(0.3 * fps)):            # 释放
+        add(0.15, 0.6, 0.55)
+    return np.array(timestamps), np.array(pinch), np.array(wrists)
+
+
+def test_pinch_lift_release_makes_one_event():
+    segmenter = PickSegmenter()
+    events = []
+    for t, d, w in zip(*synthetic_pick()):
+        event = segmenter.update(float(t), float(d), w)
+        if event is not None:
+            events.append(event)
+
+    assert segmenter.event_count == 1
+    assert segmenter.phase == 'idle'
+    event = events[0]
+    assert event.lifted
+    assert list(event.phases) == list(PHASES)
+    spans = [event.phases[name] for name in PHASES]
+    for earlier, later in zip(spans, spans[1:]):
+        assert earlier.end <= later.start + 1e-9
+    assert 0.0 <= event.quality <= 1.0
+
+    # 靠近阶段从静止转为运动时开始，包含运动后的停顿
+    approach = event.phases['approach']
+    assert approach.duration > 0.3
+    assert 0.2 <= approach.start <= 0.35
+    assert event.start == approach.start
+
+
+def test_hand_leaving_mid_pinch_is_not_counted():
+    segmenter = PickSegmenter()
+    fps = 30.0
+    t = 0.0
+    for _ in range(int(0.9 * fps)):            # 捏住 0.9 秒
+        segmenter.update(t, 0.02, (0.5, 0.5))
+        t += 1 / fps
+    assert segmenter.holding
+
+    t += 3.0                                    # 手离开画面 3 秒后张开回来
+    for _ in range(10):
+        segmenter.update(t, 0.15, (0.5, 0.5))
+        t += 1 / fps
+    assert segmenter.event_count == 0
+    assert segmenter.phase == 'idle'
+
+
+def test_jitter_during_hold_is_not_counted_twice():
+    assert len(segment_picks(*synthetic_pick(jitter=True))) == 1
+
+
+def test_count_does_not_depend_on_frame_rate():
+    for fps in (15.0, 30.0, 60.0):
+        assert len(segment_picks(*synthetic_pick(fps=fps))) == 1
+
+
+def test_reset_and_lost_clear_state():
+    segmenter = PickSegmenter()
+    timestamps, pinch, wrists = synthetic_pick()
+    for t, d, w in zip(timestamps, pinch, wrists):
+        segmenter.update(float(t), float(d), w)
+        if segmenter.holding:
+            break
+    assert segmenter.holding
+
+    segmenter.lost()
+    assert segmenter.phase == 'idle'
+    segmenter.reset()
+    assert segmenter.event_count == 0
+    assert len(segmenter.recent()[0]) == 0
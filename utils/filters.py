@@ -0,0 +1,266 @@
+"""
+关键点滤波 - 按帧时间戳平滑关键点，丢帧或推理变慢时平滑效果不变
+
+- OneEuroFilter: One-Euro 滤波，静止时强平滑去抖，快速运动时自动减小延迟
+- KalmanFilter: 匀速模型的卡尔曼滤波，每个坐标独立，可按时间外推
+- TrackFilters: 按轨迹编号各自保存一份滤波状态
+
+滤波器对任意形状的数组逐元素工作，一次调用即可滤波手部 (21, 3) 或姿态 (33, 3) 的全部关键点。
+"""
+import math
+
+import numpy as np
+
+
+def time_constant_alpha(dt, tau):
+    """
+    按时间常数换算指数平滑系数，使平滑效果与帧间隔无关
+
+    Args:
+        dt: 距上一帧的时间（秒）
+        tau: 时间常数（秒），越大越平滑
+
+    Returns:
+        平滑系数 alpha（新值的权重）
+    """
+    if tau <= 0:
+        return 1.0
+    return 1.0 - math.exp(-dt / tau)
+
+
+class OneEuroFilter:
+    """One-Euro 滤波器"""
+
+    def __init__(self, min_cutoff=1.5, beta=5.0, d_cutoff=1.0, max_gap=0.5):
+        """
+        Args:
+            min_cutoff: 静止时的截止频率（Hz），越小越平滑
+            beta: 截止频率随速度增加的系数，越大快速运动时延迟越小
+            d_cutoff: 速度估计的截止频率（Hz）
+            max_gap: 两帧间隔超过该值（秒）时重新开始，不与过时的状态混合
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        """清除滤波状态"""
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        return 1.0 / (1.0 + 1.0 / (2 * np.pi * cutoff * dt))
+
+    def __call__(self, x, timestamp):
+        """
+        输入一帧
+
+        Args:
+            x: 关键点数组（任意形状），NaN 表示该点缺失，沿用上一帧的值
+            timestamp: 帧时间戳（秒）
+
+        Returns:
+            与 x 同形状的滤波结果
+        """
+        x = np.asarray(x, dtype=np.float64)
+        prev = self._x
+        if prev is None or prev.shape != x.shape or timestamp - self._t > self.max_gap:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self._t = timestamp
+            return x.copy()
+
+        dt = timestamp - self._t
+        if dt <= 0:  # 重复或乱序的时间戳
+            return prev.copy()
+        self._t = timestamp
+        x = np.where(np.isnan(x), prev, x)
+        np.copyto(prev, x, where=np.isnan(prev))  # 之前缺失的点直接取新值
+
+        dx = (x - prev) / dt
+        self._dx += self._alpha(self.d_cutoff, dt) * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        prev += self._alpha(cutoff, dt) * (x - prev)
+        return prev.copy()
+
+
+class KalmanFilter:
+    """
+    匀速模型卡尔曼滤波器
+
+    每个坐标的状态为（位置，速度），过程噪声为连续白噪声加速度；
+    协方差只需 3 个数组（2×2 对称矩阵），所有坐标一次向量化更新。
+    """
+
+    def __init__(self, process_noise=10.0, measurement_noise=1e-5, max_gap=0.5):
+        """
+        Args:
+            process_noise: 加速度噪声谱密度，越大越跟手
+            measurement_noise: 观测噪声方差（归一化坐标的平方）
+            max_gap: 两帧间隔超过该值（秒）时重新开始
+        """
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        """清除滤波状态"""
+        self._pos = None
+        self._vel = None
+        self._p00 = self._p01 = self._p11 = None
+        self._t = None
+
+    def _start(self, z, timestamp):
+        self._pos = z.copy()
+        self._vel = np.zeros_like(z)
+        self._p00 = np.full_like(z, self.measurement_noise)
+        self._p01 = np.zeros_like(z)
+        self._p11 = np.full_like(z, 1.0)  # 初始速度未知
+        self._t = timestamp
+
+    def predict(self, timestamp):
+        """
+        外推到给定时刻的位置（不修改状态），没有状态时返回None
+
+        Args:
+            timestamp: 时间戳（秒）
+        """
+        if self._pos is None:
+            return None
+        return self._pos + self._vel * max(timestamp - self._t, 0.0)
+
+    def __call__(self, z, timestamp):
+        """
+        输入一帧观测
+
+        Args:
+            z: 关键点数组（任意形状），NaN 表示该点缺失，只做预测
+            timestamp: 帧时间戳（秒）
+
+        Returns:
+            与 z 同形状的滤波结果
+        """
+        z = np.asarray(z, dtype=np.float64)
+        if self._pos is None or self._pos.shape != z.shape or timestamp - self._t > self.max_gap:
+            self._start(z, timestamp)
+            return z.copy()
+
+        dt = timestamp - self._t
+        if dt <= 0:
+            return self._pos.copy()
+        self._t = timestamp
+        missing = np.isnan(z)
+        np.copyto(self._pos, z, where=np.isnan(self._pos) & ~missing)
+
+        # 预测
+        q = self.process_noise
+        self._pos += self._vel * dt
+        p00, p01, p11 = self._p00, self._p01, self._p11
+        p00 += 2 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3
+        p01 += dt * p11 + q * dt * dt / 2
+        p11 += q * dt
+
+        # 更新（缺失的点增益为 0）
+        s = p00 + self.measurement_noise
+        k0 = np.where(missing, 0.0, p00 / s)
+        k1 = np.where(missing, 0.0, p01 / s)
+        residual = np.where(missing, 0.0, z - self._pos)
+        self._pos += k0 * residual
+        self._vel += k1 * residual
+        p11 -= k1 * p01
+        p00 *= 1 - k0
+        p01 *= 1 - k0
+        return self._pos.copy()
+
+
+FILTERS = {
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter,
+}
+
+
+def make_filter(kind, **options):
+    """
+    按名称创建滤波器
+
+    Args:
+        kind: 'one_euro' 或 'kalman'
+        **options: 滤波器参数
+
+    Returns:
+        滤波器实例
+    """
+    if kind not in FILTERS:
+        raise ValueError(f"未知的滤波器: {kind}（可选: {', '.join(FILTERS)}）")
+    return FILTERS[kind](**options)
+
+
+class TrackFilters:
+    """按轨迹编号保存的一组滤波器"""
+
+    def __init__(self, kind='one_euro', **options):
+        """
+        Args:
+            kind: 滤波器名称，见 FILTERS
+            **options: 滤波器参数
+        """
+        self.kind = kind
+        self.options = options
+        self._filters = {}
+
+    def __call__(self, track_ids, points, timestamp):
+        """
+        滤波一帧中所有轨迹的关键点
+
+        Args:
+            track_ids: 长度为 K 的轨迹编号列表（None 表示不滤波，原样返回）
+            points: (K, N, 3) 关键点数组
+            timestamp: 帧时间戳（秒）
+
+        Returns:
+            (K, N, 3) 滤波结果
+        """
+        out = np.array(points, dtype=np.float64)
+        for i, track_id in enumerate(track_ids):
+            if track_id is None:
+                continue
+            flt = self._filters.get(track_id)
+            if flt is None:
+                flt = self._filters[track_id] = make_filter(self.kind, **self.options)
+            out[i] = flt(out[i], timestamp)
+        return out
+
+    def sync(self, active_ids):
+        """丢弃已结束轨迹的滤波状态"""
+        active = set(active_ids)
+        for track_id in [t for t in self._filters if t not in active]:
+            del self._filters[track_id]
+
+    def reset(self):
+        """清除所有轨迹的滤波状态"""
+        self._filters.clear()
+
+
+def filter_sequence(timestamps, values, kind='one_euro', **options):
+    """
+    对整段序列逐帧滤波（回放、离线分析使用，结果与实时逐帧调用一致）
+
+    Args:
+        timestamps: (N,) 时间戳
+        values: (N, ...) 逐帧数据
+        kind: 滤波器名称
+        **options: 滤波器参数
+
+    Returns:
+        与 values 同形状的 float64 数组
+    """
+    flt = make_filter(kind, **options)
+    out = np.empty(np.shape(values), dtype=np.float64)
+    for i, (t, value) in enumerate(zip(timestamps, values)):
+        out[i] = flt(value, float(t))
+    return out
@@ -0,0 +1,83 @@
+"""
+字体注册表 - 进程内按 (字体族, 字号) 缓存字体，每个字体族只探测一次
+"""
+import threading
+
+from PIL import ImageFont
+
+# 各字体族的候选字体文件，按优先级排列（Windows -> Linux中文 -> 通用）
+FONT_CANDIDATES = {
+    'sans': [
+        "msyh.ttc",                                          # 微软雅黑
+        "simhei.ttf",                                        # 黑体
+        "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",      # 文泉驿正黑（packages.txt）
+        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",   # 无中文字形，最后的选择
+    ],
+}
+
+
+class FontRegistry:
+    """字体注册表"""
+
+    def __init__(self, candidates=None):
+        """
+        Args:
+            candidates: 字体族 -> 候选字体文件列表
+        """
+        self.candidates = dict(candidates or FONT_CANDIDATES)
+        self._paths = {}   # 字体族 -> 可用的字体文件（None 表示都不可用）
+        self._fonts = {}   # (字体族, 字号) -> 字体对象
+        self._lock = threading.Lock()
+
+    def resolve(self, family='sans'):
+        """
+        找到字体族中第一个可以加载的字体文件
+
+        Returns:
+            字体文件路径，全部不可用时返回None
+        """
+        if family not in self._paths:
+            path = None
+            for candidate in self.candidates.get(family, []):
+                try:
+                    ImageFont.truetype(candidate, 12)
+                    path = candidate
+                    break
+                except (OSError, IOError):
+                    continue
+            self._paths[family] = path
+        return self._paths[family]
+
+    def get(self, size, family='sans'):
+        """
+        获取指定字号的字体
+
+        Args:
+            size: 字号
+            family: 字体族
+
+        Returns:
+            PIL 字体对象；没有可用字体文件时返回默认字体
+        """
+        key = (family, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            return font
+
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is None:
+                path = self.resolve(family)
+                font = ImageFont.truetype(path, size) if path else ImageFont.load_default()
+                self._fonts[key] = font
+        return font
+
+
+# 进程级共享的注册表
+_registry = FontRegistry()
+
+
+def get_font(size, family='sans'):
+    """从进程级注册表获取字体"""
+    return _registry.get(size, family)
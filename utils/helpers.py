@@ -2,8 +2,15 @@
 辅助工具函数
 """
 import numpy as np
-import cv2
-from PIL import Image, ImageDraw, ImageFont
+import sys
+import os
+from functools import lru_cache
+from PIL import Image, ImageDraw
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fonts import get_font
 
 
 def calculate_angle(point1, point2, point3):
@@ -33,28 +40,51 @@ def calculate_distance(point1, point2):
     return np.sqrt((point1.x - point2.x)**2 + (point1.y - point2.y)**2)
 
 
+@lru_cache(maxsize=512)
+def render_text_patch(text, font_size=30, family='sans'):
+    """
+    把文字光栅化为只覆盖文字包围盒的透明度掩码（按内容缓存）
+
+    Args:
+        text: 文字
+        font_size: 字号
+        family: 字体族
+
+    Returns:
+        (alpha, offset)：alpha 为 (h, w, 1) float32 不透明度，offset 为包围盒相对绘制原点的偏移
+    """
+    font = get_font(font_size, family)
+    left, top, right, bottom = font.getbbox(text)
+    width, height = max(right - left, 1), max(bottom - top, 1)
+
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    alpha = np.asarray(mask, dtype=np.float32)[..., None] / 255.0
+    alpha.setflags(write=False)
+    return alpha, (left, top)
+
+
 def draw_chinese_text(img, text, position, font_size=30, color=(0, 255, 0)):
     """
     在OpenCV图像上绘制中文文字
+
+    只在文字包围盒内混合，直接修改传入的图像（同时返回该图像，兼容原有用法）
     """
-    # 转换为PIL图像
-    img_pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-    draw = ImageDraw.Draw(img_pil)
-    
-    # 尝试加载中文字体
-    try:
-        font = ImageFont.truetype("msyh.ttc", font_size)  # 微软雅黑
-    except:
-        try:
-            font = ImageFont.truetype("simhei.ttf", font_size)  # 黑体
-        except:
-            font = ImageFont.load_default()
-    
-    # 绘制文字
-    draw.text(position, text, font=font, fill=color[::-1])  # BGR转RGB
-    
-    # 转回OpenCV格式
-    return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
+    alpha, (dx, dy) = render_text_patch(text, font_size)
+    h, w = alpha.shape[:2]
+    x0, y0 = position[0] + dx, position[1] + dy
+
+    # 裁剪到画面范围内
+    ix0, iy0 = max(x0, 0), max(y0, 0)
+    ix1, iy1 = min(x0 + w, img.shape[1]), min(y0 + h, img.shape[0])
+    if ix1 <= ix0 or iy1 <= iy0:
+        return img
+
+    roi = img[iy0:iy1, ix0:ix1]
+    a = alpha[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0]
+    blended = roi + (np.asarray(color, dtype=np.float32) - roi) * a
+    roi[:] = blended.astype(np.uint8)
+    return img
 
 
 def get_landmark_coords(landmark, frame_shape):
@@ -65,16 +95,6 @@ def get_landmark_coords(landmark, frame_shape):
     return int(landmark.x * w), int(landmark.y * h)
 
 
-def smooth_value(current, previous, alpha=0.3):
-    """
-    平滑数值，减少抖动
-    alpha: 平滑系数，越小越平滑
-    """
-    if previous is None:
-        return current
-    return alpha * current + (1 - alpha) * previous
-
-
 def get_score_color(score):
     """
     根据分数返回颜色 (BGR格式)
@@ -0,0 +1,140 @@
+"""
+关键点数组工具 - 每帧把 MediaPipe 关键点列表转换为一个 (N, 3) float32 数组，
+角度、距离、归一化等几何特征都在数组上批量计算
+"""
+import numpy as np
+
+# 手部关键点索引
+WRIST = 0
+THUMB_TIP = 4
+INDEX_FINGER_TIP = 8
+MIDDLE_FINGER_MCP = 9
+MIDDLE_FINGER_TIP = 12
+RING_FINGER_TIP = 16
+PINKY_TIP = 20
+
+# 21 个手部关键点的名称（用于动作对比报告）
+HAND_JOINT_NAMES = (
+    '手腕',
+    '拇指根', '拇指中节', '拇指末节', '拇指尖',
+    '食指根', '食指中节', '食指末节', '食指尖',
+    '中指根', '中指中节', '中指末节', '中指尖',
+    '无名指根', '无名指中节', '无名指末节', '无名指尖',
+    '小指根', '小指中节', '小指末节', '小指尖',
+)
+
+# 分析器用到的距离对：捏取距离 + 中指/无名指/小指指尖到手腕
+HAND_DISTANCE_PAIRS = np.array([
+    [THUMB_TIP, INDEX_FINGER_TIP],
+    [MIDDLE_FINGER_TIP, WRIST],
+    [RING_FINGER_TIP, WRIST],
+    [PINKY_TIP, WRIST],
+], dtype=np.intp)
+
+# 分析器用到的角度（中间为顶点）：手腕-中指根-中指尖
+HAND_ANGLE_TRIPLETS = np.array([
+    [WRIST, MIDDLE_FINGER_MCP, MIDDLE_FINGER_TIP],
+], dtype=np.intp)
+
+# 姿态角度：右肩-右肘-右腕
+POSE_ANGLE_TRIPLETS = np.array([
+    [12, 14, 16],
+], dtype=np.intp)
+
+
+def landmarks_to_array(landmarks, out=None):
+    """
+    将关键点列表转换为连续的 (N, 3) float32 数组
+
+    Args:
+        landmarks: MediaPipe 关键点列表（具有 x/y/z 属性），或已经是数组
+        out: 可选的预分配输出数组
+
+    Returns:
+        (N, 3) float32 数组
+    """
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float32, copy=False)
+
+    n = len(landmarks)
+    if out is None or out.shape != (n, 3):
+        out = np.empty((n, 3), dtype=np.float32)
+    out.reshape(-1)[:] = np.fromiter(
+        (value for lm in landmarks for value in (lm.x, lm.y, lm.z)),
+        dtype=np.float32, count=3 * n
+    )
+    return out
+
+
+def pairwise_distances(points, pairs, dims=2):
+    """
+    批量计算关键点对之间的欧氏距离
+
+    Args:
+        points: (..., N, 3) 关键点数组，可带任意批次维度
+        pairs: (P, 2) 索引数组
+        dims: 参与计算的坐标维数，2 表示只用 x/y
+
+    Returns:
+        (..., P) 距离数组
+    """
+    diff = points[..., pairs[:, 0], :dims] - points[..., pairs[:, 1], :dims]
+    return np.sqrt(np.einsum('...i,...i->...', diff, diff))
+
+
+def joint_angles(points, triplets, dims=2):
+    """
+    批量计算三点夹角（每组中间的点为顶点）
+
+    Args:
+        points: (..., N, 3) 关键点数组
+        triplets: (T, 3) 索引数组
+        dims: 参与计算的坐标维数
+
+    Returns:
+        (..., T) 角度数组（0-180度）
+    """
+    vertex = points[..., triplets[:, 1], :dims]
+    ba = points[..., triplets[:, 0], :dims] - vertex
+    bc = points[..., triplets[:, 2], :dims] - vertex
+    dot = np.einsum('...i,...i->...', ba, bc)
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    cosine = np.clip(dot / (norms + 1e-6), -1.0, 1.0)
+    return np.degrees(np.arccos(cosine))
+
+
+def normalize_landmarks(points, origin=WRIST, scale_pair=(WRIST, MIDDLE_FINGER_MCP)):
+    """
+    平移到原点关键点并按参考骨段长度缩放，消除位置和远近的影响
+
+    Args:
+        points: (..., N, 3) 关键点数组
+        origin: 作为原点的关键点索引
+        scale_pair: 作为尺度参考的关键点对
+
+    Returns:
+        (..., N, 3) 归一化后的数组
+    """
+    centered = points - points[..., origin:origin + 1, :]
+    ref = points[..., scale_pair[1], :2] - points[..., scale_pair[0], :2]
+    scale = np.linalg.norm(ref, axis=-1)[..., None, None]
+    return centered / np.maximum(scale, 1e-6)
+
+
+def hand_features(points):
+    """
+    一次性计算分析器需要的全部手部特征
+
+    Args:
+        points: (..., 21, 3) 手部关键点数组
+
+    Returns:
+        字典：pinch_distance、other_fingers_dist、hand_angle（形状与批次维度一致）
+    """
+    distances = pairwise_distances(points, HAND_DISTANCE_PAIRS)
+    angles = joint_angles(points, HAND_ANGLE_TRIPLETS)
+    return {
+        'pinch_distance': distances[..., 0],
+        'other_fingers_dist': distances[..., 1:].mean(axis=-1),
+        'hand_angle': angles[..., 0],
+    }
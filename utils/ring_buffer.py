@@ -0,0 +1,180 @@
+"""
+定长环形缓冲区 - 数组存储，窗口统计量与全程统计量均为增量更新
+"""
+from collections import deque
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    定长环形缓冲区
+
+    窗口统计（最近 capacity 个值）：和、均值、方差、最小值、最大值；
+    全程统计（自创建或清空以来的所有值）：个数、均值、方差、最小值、最大值。
+    每次追加均为 O(1)（最小/最大值为均摊 O(1)），不产生新的列表或数组。
+    """
+
+    def __init__(self, capacity=100, dtype=np.float64):
+        """
+        Args:
+            capacity: 窗口大小
+            dtype: 存储的数据类型
+        """
+        if capacity <= 0:
+            raise ValueError("capacity 必须为正数")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.clear()
+
+    def clear(self):
+        """清空所有数据与统计量"""
+        self._count = 0          # 累计追加次数，同时作为写入位置
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._min_queue = deque()  # 单调递增 (序号, 值)
+        self._max_queue = deque()  # 单调递减 (序号, 值)
+
+        # 全程统计（Welford 算法）
+        self._total_mean = 0.0
+        self._total_m2 = 0.0
+        self._total_min = None
+        self._total_max = None
+
+    def append(self, value):
+        """
+        追加一个值，窗口已满时覆盖最旧的值
+
+        Args:
+            value: 数值
+        """
+        value = float(value)
+        index = self._count
+        slot = index % self.capacity
+
+        if index >= self.capacity:
+            old = float(self._data[slot])
+            self._sum -= old
+            self._sumsq -= old * old
+        self._data[slot] = value
+        self._sum += value
+        self._sumsq += value * value
+        self._count += 1
+
+        # 每写满一轮按当前窗口重新求和，消除浮点累积误差（均摊 O(1)）
+        if self._count % self.capacity == 0:
+            window = self._data
+            self._sum = float(window.sum())
+            self._sumsq = float(np.dot(window, window))
+
+        # 窗口最小/最大值：单调队列
+        oldest = self._count - self.capacity
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((index, value))
+        while self._min_queue[0][0] < oldest:
+            self._min_queue.popleft()
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((index, value))
+        while self._max_queue[0][0] < oldest:
+            self._max_queue.popleft()
+
+        # 全程统计
+        delta = value - self._total_mean
+        self._total_mean += delta / self._count
+        self._total_m2 += delta * (value - self._total_mean)
+        self._total_min = value if self._total_min is None else min(self._total_min, value)
+        self._total_max = value if self._total_max is None else max(self._total_max, value)
+
+    def __len__(self):
+        """窗口内的值个数"""
+        return min(self._count, self.capacity)
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __getitem__(self, key):
+        """
+        按时间顺序索引，支持负数下标和切片（切片返回数组拷贝）
+        """
+        if isinstance(key, slice):
+            return self.to_array()[key]
+        n = len(self)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("RingBuffer 下标越界")
+        return self._data[(self._count - n + key) % self.capacity]
+
+    def __iter__(self):
+        return iter(self.to_array())
+
+    def to_array(self):
+        """按时间顺序返回窗口内数据的拷贝"""
+        n = len(self)
+        if self._count <= self.capacity:
+            return self._data[:n].copy()
+        start = self._count % self.capacity
+        return np.concatenate((self._data[start:], self._data[:start]))
+
+    def recent(self, n):
+        """最近 n 个值（按时间顺序）"""
+        return self[-n:] if n > 0 else self._data[:0].copy()
+
+    def last(self, default=None):
+        """最新的值，为空时返回 default"""
+        return self[-1] if self._count else default
+
+    # ---- 窗口统计 ----
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def mean(self):
+        n = len(self)
+        return self._sum / n if n else 0.0
+
+    @property
+    def var(self):
+        n = len(self)
+        if n == 0:
+            return 0.0
+        mean = self._sum / n
+        return max(self._sumsq / n - mean * mean, 0.0)
+
+    @property
+    def std(self):
+        return self.var ** 0.5
+
+    @property
+    def min(self):
+        return self._min_queue[0][1] if self._min_queue else None
+
+    @property
+    def max(self):
+        return self._max_queue[0][1] if self._max_queue else None
+
+    # ---- 全程统计 ----
+
+    @property
+    def total_count(self):
+        return self._count
+
+    @property
+    def total_mean(self):
+        return self._total_mean
+
+    @property
+    def total_var(self):
+        return self._total_m2 / self._count if self._count else 0.0
+
+    @property
+    def total_min(self):
+        return self._total_min
+
+    @property
+    def total_max(self):
+        return self._total_max
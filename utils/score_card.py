@@ -0,0 +1,142 @@
+"""
+成绩卡生成 - 静态模板按尺寸缓存，每张卡只绘制动态内容
+
+模板包括渐变背景、边框、分隔线和固定标签；生成卡片时复制模板再填入
+姓名、日期、分数和统计数据。
+"""
+import os
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fonts import get_font
+from utils.helpers import get_score_level
+
+DEFAULT_SIZE = (600, 800)
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _layout(size):
+    """按设计尺寸 600x800 等比换算坐标和字号"""
+    width, height = size
+    sx, sy = width / 600, height / 800
+    s = min(sx, sy)
+    return {
+        'x': lambda v: int(v * sx),
+        'y': lambda v: int(v * sy),
+        'title': get_font(max(int(36 * s), 8)),
+        'large': get_font(max(int(48 * s), 8)),
+        'normal': get_font(max(int(24 * s), 8)),
+        'small': get_font(max(int(18 * s), 8)),
+    }
+
+
+def _gradient(size):
+    """用 NumPy 一次生成竖直渐变背景"""
+    width, height = size
+    t = np.arange(height, dtype=np.float64) / height
+    # 与逐行 int() 取整的结果一致
+    column = np.stack([232 - t * 30, 245 - t * 20, 233 - t * 30], axis=1).astype(np.uint8)
+    return np.ascontiguousarray(np.broadcast_to(column[:, None, :], (height, width, 3)))
+
+
+def _build_template(size):
+    """绘制静态模板"""
+    width, height = size
+    L = _layout(size)
+    x, y = L['x'], L['y']
+
+    img = Image.fromarray(_gradient(size), 'RGB')
+    draw = ImageDraw.Draw(img)
+
+    # 边框
+    draw.rectangle([x(20), y(20), width - x(20), height - y(20)], outline='#2E7D32', width=3)
+
+    # 标题
+    draw.text((width // 2, y(60)), "智茶AI", font=L['title'], fill='#1B5E20', anchor='mm')
+    draw.text((width // 2, y(100)), "- 采茶成绩卡 -", font=L['normal'], fill='#2E7D32', anchor='mm')
+    draw.line([(x(50), y(140)), (width - x(50), y(140))], fill='#81C784', width=2)
+
+    # 固定标签
+    draw.text((width // 2, y(370)), "当前得分", font=L['small'], fill='#666666', anchor='mm')
+    draw.line([(x(50), y(470)), (width - x(50), y(470))], fill='#81C784', width=1)
+    draw.text((x(150), y(520)), "采摘次数", font=L['small'], fill='#666666', anchor='mm')
+    draw.text((x(300), y(520)), "平均得分", font=L['small'], fill='#666666', anchor='mm')
+    draw.text((x(450), y(520)), "总动作数", font=L['small'], fill='#666666', anchor='mm')
+    draw.line([(x(50), y(610)), (width - x(50), y(610))], fill='#81C784', width=1)
+    draw.text((width // 2, y(650)), "最近得分记录", font=L['small'], fill='#666666', anchor='mm')
+    draw.text((width // 2, y(760)), "© 2026 智茶AI", font=L['small'], fill='#999999', anchor='mm')
+    return img
+
+
+def get_template(size=DEFAULT_SIZE):
+    """获取（必要时构建）指定尺寸的模板"""
+    template = _templates.get(size)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(size)
+            if template is None:
+                template = _build_template(size)
+                _templates[size] = template
+    return template
+
+
+def render_score_card(user_name, score, stats, scores_history=(), when=None, size=DEFAULT_SIZE):
+    """
+    生成成绩卡
+
+    Args:
+        user_name: 使用者姓名
+        score: 当前得分
+        stats: TeaPickingAnalyzer.get_statistics() 格式的统计数据
+        scores_history: 得分记录（取最后5条）
+        when: 生成时间，默认当前时间
+        size: 卡片尺寸 (宽, 高)
+
+    Returns:
+        PIL 图像
+    """
+    when = when or datetime.now()
+    width, _ = size
+    L = _layout(size)
+    x, y = L['x'], L['y']
+
+    img = get_template(size).copy()
+    draw = ImageDraw.Draw(img)
+
+    # 用户信息
+    draw.text((width // 2, y(180)), f"使用者: {user_name}", font=L['normal'], fill='#333333', anchor='mm')
+    draw.text((width // 2, y(220)), when.strftime("%Y年%m月%d日 %H:%M"), font=L['small'], fill='#666666', anchor='mm')
+
+    # 分数
+    draw.text((width // 2, y(320)), str(score), font=L['large'], fill='#2E7D32', anchor='mm')
+    level_text = get_score_level(score).split()[0]
+    draw.text((width // 2, y(420)), level_text, font=L['normal'], fill='#FF6F00', anchor='mm')
+
+    # 统计
+    draw.text((x(150), y(560)), str(stats.get('pick_count', 0)), font=L['normal'], fill='#1976D2', anchor='mm')
+    draw.text((x(300), y(560)), str(stats.get('average_score', 0)), font=L['normal'], fill='#1976D2', anchor='mm')
+    draw.text((x(450), y(560)), str(stats.get('total_actions', 0)), font=L['normal'], fill='#1976D2', anchor='mm')
+
+    # 历史
+    recent = list(scores_history[-5:]) if len(scores_history) else []
+    if recent:
+        draw.text((width // 2, y(690)), " → ".join([f"{s:.3f}" for s in recent]), font=L['small'], fill='#333333', anchor='mm')
+    else:
+        draw.text((width // 2, y(690)), "暂无记录", font=L['small'], fill='#999999', anchor='mm')
+
+    return img
+
+
+def card_filename(user_name, when=None):
+    """成绩卡文件名（精确到毫秒，同一秒内多次导出不会互相覆盖）"""
+    when = when or datetime.now()
+    return f"{user_name}_efficiency_{when.strftime('%Y%m%d_%H%M%S')}_{when.microsecond // 1000:03d}.png"